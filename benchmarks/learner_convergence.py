@@ -0,0 +1,110 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Convergence curve of the Learner Player
+# --------------------------------------------------------------------
+"""Convergence of the LearnerPlayer trained against the MinimaxPlayer,
+    for several learning methods: the one step update during the
+    games, the TD(lambda) backup at the end of the game (lambda = 0,
+    0.5 and 1, the Monte Carlo backup) and the TD(0) backup with an
+    experience replay buffer.
+    For every method, the learner plays the given number of games
+    (playing first in half of them), and the defeats of every window
+    of games are counted: the convergence curve is the list of these
+    counts. The games needed to converge are the games played before
+    the first window without defeats.
+    Usage:
+        python benchmarks/learner_convergence.py [-g 5000] [-w 250]
+            [-s seed] [-o results.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+# pylint: disable=wrong-import-position
+from jokettt.board import Board
+from jokettt.learnerplayer import LearnerPlayer
+from jokettt.minimaxplayer import MinimaxPlayer
+from jokettt.replaybuffer import ReplayBuffer
+# pylint: enable=wrong-import-position
+
+# name -> LearnerPlayer options
+METHODS = (('one-step', {}),
+           ('td(0)', {'td_lambda': 0.0}),
+           ('td(0.5)', {'td_lambda': 0.5}),
+           ('monte-carlo', {'td_lambda': 1.0}),
+           ('td(0)+replay', {'td_lambda': 0.0, 'replay': True}))
+
+# ----------------------------------------------------------------------------------------
+def convergence_curve(options, num_games, window, seed):
+    """Train a learner against a minimax player. Returns the list of
+        the defeats of every window of games."""
+    options = dict(options)
+    if options.pop('replay', False):
+        options['replay_buffer'] = ReplayBuffer()
+    board = Board('x', 'o')
+    learner = LearnerPlayer('x', board, **options)
+    rival = MinimaxPlayer('o')
+    # LearnerPlayer constructor seeds the random generator
+    random.seed(seed)
+    curve = []
+    for game in range(num_games):
+        if game % window == 0:
+            curve.append(0)
+        board.reset()
+        players = (learner, rival) if game % 2 == 0 else (rival, learner)
+        ply = 0
+        while True:
+            player = players[ply % 2]
+            _x, _y = player.move(board)
+            _, score = board.place_pawn(_x, _y, player.piece)
+            ply += 1
+            if score != 0 or board.is_full():
+                break
+        if score != 0 and player is rival:
+            curve[-1] += 1
+        learner.learn_from_game(board)
+    return curve
+
+# ----------------------------------------------------------------------------------------
+def games_to_converge(curve, window):
+    """Returns the games played before the first window without
+        defeats (None if the learner did not converge)."""
+    for ndx, defeats in enumerate(curve):
+        if defeats == 0:
+            return ndx * window
+    return None
+
+# ----------------------------------------------------------------------------------------
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="jokettt learner convergence")
+    parser.add_argument('-g', '--games', type=int, default=5000,
+                        help="training games for every method (default %(default)s)")
+    parser.add_argument('-w', '--window', type=int, default=250,
+                        help="games in every point of the curve (default %(default)s)")
+    parser.add_argument('-s', '--seed', type=int, default=1, help="random seed")
+    parser.add_argument('-o', '--output', help="write the results in this JSON file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, options in METHODS:
+        curve = convergence_curve(options, args.games, args.window, args.seed)
+        converged = games_to_converge(curve, args.window)
+        results[name] = {'defeats': curve, 'games_to_converge': converged}
+        print("%-14s converged after %6s games, defeats every %d games: %s" %
+              (name, converged if converged is not None else "-", args.window,
+               " ".join(str(defeats) for defeats in curve)))
+    if args.output:
+        with open(args.output, 'w') as out_file:
+            json.dump(results, out_file, indent=2, sort_keys=True)
+    return 0
+
+# ----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.exit(main())
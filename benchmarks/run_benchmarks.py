@@ -0,0 +1,301 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Benchmark suite
+# --------------------------------------------------------------------
+"""Reproducible benchmarks of the jokettt library (all the random
+    choices use fixed seeds):
+      - Board.place_pawn/remove_pawn, evaluate and valid_moves
+        throughput (operations per second)
+      - MinimaxPlayer.move latency from every position reachable in
+        a legal game (p50 and p99, with an empty transposition table,
+        of the best time of every position over a few runs)
+      - LearnerPlayer self-play throughput (games per second, best of
+        a few runs)
+      - import time of the core modules, measured in a new interpreter
+        (without the interpreter start up time)
+    The results are written in JSON format and compared with a stored
+    baseline: the script exits with status 1 if a result is worse
+    than the baseline by more than the given tolerance.
+    Usage:
+        python benchmarks/run_benchmarks.py [-o results.json]
+            [-b benchmarks/baseline.json] [-t 0.25] [-e engine] [--save-baseline]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+# pylint: disable=wrong-import-position
+from jokettt.board import Board
+from jokettt.learnerplayer import LearnerPlayer
+from jokettt.minimaxplayer import MinimaxPlayer
+from jokettt.searchstats import StatsAggregator
+# pylint: enable=wrong-import-position
+
+RESULTS_VERSION = 1
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_TOLERANCE = 0.25
+SEED = 12345
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+# every benchmark is repeated, and the best run is kept
+REPEATS = 20
+# the tolerance of the results noisier than the others is multiplied
+# by these factors (the tail of the latency depends on a few moves)
+TOLERANCE_FACTORS = {'minimax_move_p99': 2.0}
+
+# ----------------------------------------------------------------------------------------
+def _random_games(num_games, seed):
+    """Returns num_games random games, as lists of (x, y, piece) moves."""
+    rng = random.Random(seed)
+    board = Board('x', 'o')
+    games = []
+    for _ in range(num_games):
+        board.reset()
+        moves = []
+        piece = 'x'
+        while True:
+            _x, _y = rng.choice(board.valid_moves())
+            _, score = board.place_pawn(_x, _y, piece)
+            moves.append((_x, _y, piece))
+            if score != 0 or board.is_full():
+                break
+            piece = 'o' if piece == 'x' else 'x'
+        games.append(moves)
+    return games
+
+# ----------------------------------------------------------------------------------------
+def _best_rate(function, num_ops):
+    """Returns the best number of operations per second over REPEATS runs."""
+    best = None
+    for _ in range(REPEATS):
+        start_time = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return num_ops / best
+
+# ----------------------------------------------------------------------------------------
+def bench_board(num_games):
+    """Board primitives throughput, replaying random games."""
+    games = _random_games(num_games, SEED)
+    board = Board('x', 'o')
+    num_moves = sum(len(moves) for moves in games)
+
+    def place_remove():
+        for moves in games:
+            for _x, _y, piece in moves:
+                board.place_pawn(_x, _y, piece)
+            for _x, _y, _ in moves:
+                board.remove_pawn(_x, _y)
+
+    # the boards after every move of the games, to be evaluated
+    positions = []
+    for moves in games:
+        for ndx, (_, _, piece) in enumerate(moves):
+            position = Board('x', 'o')
+            for _x, _y, moved_piece in moves[:ndx + 1]:
+                position.place_pawn(_x, _y, moved_piece)
+            positions.append((position, piece))
+
+    def evaluate():
+        for position, piece in positions:
+            position.evaluate(piece)
+
+    def valid_moves():
+        for position, _ in positions:
+            position.valid_moves()
+
+    results = {'board_place_remove': _best_rate(place_remove, 2 * num_moves),
+               'board_evaluate': _best_rate(evaluate, num_moves),
+               'board_valid_moves': _best_rate(valid_moves, num_moves)}
+    return {name: (value, 'ops/s', True) for name, value in results.items()}
+
+# ----------------------------------------------------------------------------------------
+def _reachable_positions():
+    """Returns the move sequences leading to every position reachable
+        in a legal game, not yet ended and with at least two pieces
+        (with less pieces the minimax player does not search)."""
+    board = Board('x', 'o')
+    seen = set()
+    positions = []
+
+    def visit(moves, piece):
+        ndx = board.get_state_index()
+        if ndx in seen:
+            return
+        seen.add(ndx)
+        if len(moves) >= 2:
+            positions.append(list(moves))
+        other_piece = 'o' if piece == 'x' else 'x'
+        for _x, _y in board.valid_moves():
+            _, score = board.place_pawn(_x, _y, piece)
+            moves.append((_x, _y, piece))
+            if score == 0 and not board.is_full():
+                visit(moves, other_piece)
+            moves.pop()
+            board.remove_pawn(_x, _y)
+
+    visit([], 'x')
+    return positions
+
+# ----------------------------------------------------------------------------------------
+def bench_minimax(engine='minimax', repeats=REPEATS):
+    """MinimaxPlayer.move latency from every reachable position. The
+        moves are repeated, and the best time of every position is
+        kept: a single slow run does not change the percentiles."""
+    best = None
+    for _ in range(repeats):
+        aggregator = StatsAggregator()
+        board = Board('x', 'o')
+        for moves in _reachable_positions():
+            board.reset()
+            for _x, _y, piece in moves:
+                board.place_pawn(_x, _y, piece)
+            random.seed(SEED)
+            to_move = 'o' if moves[-1][2] == 'x' else 'x'
+            MinimaxPlayer(to_move, stats_callback=aggregator, engine=engine).move(board)
+        if best is None:
+            best = aggregator
+        else:
+            # the searches are seeded: the same positions, in the same order
+            best.stats = [min(old, new, key=lambda stats: stats.elapsed)
+                          for old, new in zip(best.stats, aggregator.stats)]
+    summary = best.summary()
+    return {'minimax_move_p50': (summary['p50'] * 1000.0, 'ms', False),
+            'minimax_move_p99': (summary['p99'] * 1000.0, 'ms', False),
+            'minimax_nodes_per_move': (summary['nodes_per_move'], 'nodes', False)}
+
+# ----------------------------------------------------------------------------------------
+def bench_learner(num_games, repeats=REPEATS):
+    """LearnerPlayer self-play throughput (best of repeats runs, every
+        one with new players)."""
+    best = None
+    for _ in range(repeats):
+        rate = _learner_rate(num_games)
+        best = rate if best is None else max(best, rate)
+    return {'learner_selfplay': (best, 'games/s', True)}
+
+# ----------------------------------------------------------------------------------------
+def _learner_rate(num_games):
+    """Returns the games per second of a self-play run of new learners."""
+    board = Board('x', 'o')
+    first = LearnerPlayer('x', board, eps=0.1)
+    second = LearnerPlayer('o', board, eps=0.1)
+    random.seed(SEED)
+    start_time = time.perf_counter()
+    for game in range(num_games):
+        board.reset()
+        players = (first, second) if game % 2 == 0 else (second, first)
+        ply = 0
+        while True:
+            player = players[ply % 2]
+            _x, _y = player.move(board)
+            _, score = board.place_pawn(_x, _y, player.piece)
+            ply += 1
+            if score != 0 or board.is_full():
+                break
+        if score != 0:
+            players[ply % 2].learn_from_defeat(board)
+    return num_games / (time.perf_counter() - start_time)
+
+# ----------------------------------------------------------------------------------------
+def _best_run_time(code, repeats):
+    """Returns the best wall time of a new interpreter running code."""
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(ROOT_DIR))
+    best = None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], env=env, check=True)
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+# ----------------------------------------------------------------------------------------
+def bench_import(repeats):
+    """Import time of the core modules (the players and the board)."""
+    interpreter = _best_run_time("pass", repeats)
+    core = _best_run_time("import jokettt.board, jokettt.minimaxplayer, "
+                          "jokettt.learnerplayer", repeats)
+    return {'import_core': (max(core - interpreter, 0.0) * 1000.0, 'ms', False)}
+
+# ----------------------------------------------------------------------------------------
+def run_benchmarks(quick=False, engine='minimax'):
+    """Run all the benchmarks. Returns the results dictionary."""
+    results = {}
+    results.update(bench_board(200 if quick else 2000))
+    results.update(bench_minimax(engine, 5))
+    results.update(bench_learner(500 if quick else 2000, 10))
+    results.update(bench_import(5 if quick else REPEATS))
+    return {'version': RESULTS_VERSION,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': {name: {'value': value, 'unit': unit, 'higher_is_better': higher}
+                        for name, (value, unit, higher) in results.items()}}
+
+# ----------------------------------------------------------------------------------------
+def compare(results, baseline, tolerance):
+    """Compare the results with the baseline. Returns the list of the
+        (name, value, baseline value, relative change) of the results
+        worse than the baseline by more than tolerance (multiplied by
+        the factor in TOLERANCE_FACTORS, if any)."""
+    regressions = []
+    for name, result in results['results'].items():
+        base = baseline['results'].get(name)
+        if base is None or not base['value']:
+            continue
+        change = (result['value'] - base['value']) / base['value']
+        allowed = tolerance * TOLERANCE_FACTORS.get(name, 1.0)
+        if result['higher_is_better']:
+            worse = change < -allowed
+        else:
+            worse = change > allowed
+        print("%-24s %12.4g %-8s baseline %12.4g  %+7.1f%%%s" %
+              (name, result['value'], result['unit'], base['value'], 100.0 * change,
+               "  REGRESSION" if worse else ""))
+        if worse:
+            regressions.append((name, result['value'], base['value'], change))
+    return regressions
+
+# ----------------------------------------------------------------------------------------
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="jokettt benchmarks")
+    parser.add_argument('-o', '--output', help="write the results in this JSON file")
+    parser.add_argument('-b', '--baseline', default=DEFAULT_BASELINE,
+                        help="baseline JSON file to compare with")
+    parser.add_argument('-t', '--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative worsening (default %(default)s)")
+    parser.add_argument('--quick', action='store_true', help="shorter runs")
+    parser.add_argument('-e', '--engine', default='minimax',
+                        help="search engine of the minimax player (default %(default)s)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="store the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.quick, args.engine)
+    if args.output:
+        with open(args.output, 'w') as out_file:
+            json.dump(results, out_file, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as out_file:
+            json.dump(results, out_file, indent=2, sort_keys=True)
+        print("baseline saved in %s" % args.baseline)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(json.dumps(results, indent=2, sort_keys=True))
+        return 0
+    with open(args.baseline) as in_file:
+        baseline = json.load(in_file)
+    return 1 if compare(results, baseline, args.tolerance) else 0
+
+# ----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,2 +1,5 @@
 """jokettt: a Tic Tac Toe game developed by joke"""
-__all__ = ["board", "player", "consoleplayer", "minimaxplayer", "learnerplayer"]
+__all__ = ["arena", "asyncplayer", "batchsimulator", "board", "player", "consoleplayer",
+           "gamerecord", "minimaxplayer", "learnerplayer", "mctsplayer", "moveordering",
+           "offlinetrainer", "replaybuffer", "searchengines", "searchstats", "tablebase",
+           "tracing", "training", "transpositiontable", "valuestore"]
@@ -0,0 +1,290 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Arena: matches and tournaments between players
+# --------------------------------------------------------------------
+"""Implementation of the arena, that plays series of games between
+    players and collects the results:
+      - play_game(): a single game between two Player objects (any
+        player, also a ConsolePlayer)
+      - head_to_head(): a series of games between two players
+      - round_robin(): a series of games between every pair of players
+      - iter_games(): the games of a list of pairings, yielded as soon
+        as they are played (the other functions are based on it)
+    The series are split in chunks of games played in a pool of worker
+    processes. The players are described by PlayerSpec objects, and
+    built again by the workers for every chunk. Every game has its
+    own random seed, derived from the seed of the series and from the
+    number of the game, so the result of every game does not depend on
+    the number of workers. The players alternate as first player.
+    The results are collected in an ArenaResult: wins, draws and losses
+    of every player and of every pairing, and the move times of every
+    player (measured by the arena, with the nodes searched if the
+    player reports them).
+"""
+__all__ = ['PlayerSpec', 'GameResult', 'ArenaResult', 'play_game', 'iter_games',
+           'head_to_head', 'round_robin', 'minimax_player', 'learner_player', 'mcts_player']
+
+import copy
+import itertools
+import multiprocessing
+import random
+import time
+
+from .board import Board
+from .learnerplayer import LearnerPlayer
+from .mctsplayer import MCTSPlayer
+from .minimaxplayer import MinimaxPlayer
+from .searchstats import SearchStats, StatsAggregator
+
+DEFAULT_CHUNK_SIZE = 50
+# the keyword arguments of the players that are changed by the games
+_PLAYER_STATE_KWARGS = ('init_values', 'replay_buffer')
+
+# ----------------------------------------------------------------------------------------
+def minimax_player(piece, board, **kwargs):
+    """Player factory: returns a MinimaxPlayer (board is not used)."""
+    del board
+    return MinimaxPlayer(piece, **kwargs)
+
+# ----------------------------------------------------------------------------------------
+def learner_player(piece, board, **kwargs):
+    """Player factory: returns a LearnerPlayer."""
+    return LearnerPlayer(piece, board, **kwargs)
+
+# ----------------------------------------------------------------------------------------
+def mcts_player(piece, board, **kwargs):
+    """Player factory: returns a MCTSPlayer (board is not used)."""
+    del board
+    return MCTSPlayer(piece, **kwargs)
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+# pylint: disable=too-few-public-methods
+class PlayerSpec:
+    """Description of a player, used to build it in the worker processes."""
+
+    # ------------------------------------------------------
+    def __init__(self, name, factory=minimax_player, **kwargs):
+        """PlayerSpec class constructor. name identifies the player in
+            the results, factory is a function (defined at module level,
+            so that it can be sent to the workers) called as
+            factory(piece, board, **kwargs) to build the player."""
+        self.name = name
+        self.factory = factory
+        self.kwargs = kwargs
+
+    # ------------------------------------------------------
+    def create(self, piece, board):
+        """Returns a new player with the given piece. The player gets
+            its own copy of the keyword arguments that it changes (the
+            initial values and the replay buffer of a learner), as when
+            it is built by a worker process, so the games do not depend
+            on the workers. The other arguments (e.g. a tablebase) are
+            passed as they are."""
+        kwargs = dict(self.kwargs)
+        for name in _PLAYER_STATE_KWARGS:
+            if kwargs.get(name) is not None:
+                kwargs[name] = copy.deepcopy(kwargs[name])
+        return self.factory(piece, board, **kwargs)
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+class GameResult:
+    """The result of a game played in the arena."""
+
+    # ------------------------------------------------------
+    # pylint: disable=too-many-arguments
+    def __init__(self, game_id, first, second, winner, plies, move_stats):
+        """GameResult class constructor. first and second are the names
+            of the players, winner the name of the winner (None for a
+            draw), move_stats the list of the (player name, move time,
+            nodes searched) of every move."""
+        self.game_id = game_id
+        self.first = first
+        self.second = second
+        self.winner = winner
+        self.plies = plies
+        self.move_stats = move_stats
+    # pylint: enable=too-many-arguments
+
+    # ------------------------------------------------------
+    def __repr__(self):
+        return "GameResult(%d, %s vs %s, winner=%s, plies=%d)" % \
+            (self.game_id, self.first, self.second, self.winner, self.plies)
+# pylint: enable=too-few-public-methods
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+class ArenaResult:
+    """The results of a series of games."""
+
+    # ------------------------------------------------------
+    def __init__(self):
+        """ArenaResult class constructor."""
+        self.num_games = 0
+        self.elapsed = 0.0
+        # player name -> [wins, draws, losses]
+        self.scores = {}
+        # (name, name), sorted -> [wins of the first, draws, wins of the second]
+        self.pairings = {}
+        # player name -> StatsAggregator of the moves
+        self.move_stats = {}
+
+    # ------------------------------------------------------
+    def add(self, game):
+        """Add the result of a game."""
+        self.num_games += 1
+        pairing = tuple(sorted((game.first, game.second)))
+        counts = self.pairings.setdefault(pairing, [0, 0, 0])
+        for name in pairing:
+            score = self.scores.setdefault(name, [0, 0, 0])
+            if game.winner is None:
+                score[1] += 1
+            elif game.winner == name:
+                score[0] += 1
+            else:
+                score[2] += 1
+        if game.winner is None:
+            counts[1] += 1
+        else:
+            counts[0 if game.winner == pairing[0] else 2] += 1
+        for name, elapsed, nodes in game.move_stats:
+            self.move_stats.setdefault(name, StatsAggregator())(
+                SearchStats(name, nodes=nodes, elapsed=elapsed))
+
+    # ------------------------------------------------------
+    def summary(self):
+        """Returns a dictionary with, for every player, the games
+            played, the wins, draws and losses, the score (1 point for
+            a win, 0.5 for a draw, divided by the games played) and the
+            p50 and p99 move times."""
+        summary = {}
+        for name, (wins, draws, losses) in sorted(self.scores.items()):
+            games = wins + draws + losses
+            moves = self.move_stats.get(name, StatsAggregator())
+            summary[name] = {'games': games, 'wins': wins, 'draws': draws, 'losses': losses,
+                             'score': (wins + 0.5 * draws) / games if games else 0.0,
+                             'move_p50': moves.latency_percentile(50),
+                             'move_p99': moves.latency_percentile(99)}
+        return summary
+
+    # ------------------------------------------------------
+    def __str__(self):
+        lines = ["%-16s %7s %7s %7s %7s %7s %10s %10s" %
+                 ("player", "games", "wins", "draws", "losses", "score",
+                  "p50 ms", "p99 ms")]
+        for name, row in self.summary().items():
+            lines.append("%-16s %7d %7d %7d %7d %7.3f %10.3f %10.3f" %
+                         (name, row['games'], row['wins'], row['draws'], row['losses'],
+                          row['score'], 1000.0 * (row['move_p50'] or 0.0),
+                          1000.0 * (row['move_p99'] or 0.0)))
+        return "\n".join(lines)
+
+# ----------------------------------------------------------------------------------------
+def play_game(first, second, board):
+    """Play a game on board (reset before starting) between two
+        players with different pieces: first moves first. Returns
+        the winner (None for a draw), the number of plies and the list
+        of the (player, move time, nodes searched) of every move."""
+    board.reset()
+    players = (first, second)
+    move_stats = []
+    ply = 0
+    while True:
+        player = players[ply % 2]
+        start_time = time.perf_counter()
+        _x, _y = player.move(board)
+        elapsed = time.perf_counter() - start_time
+        stats = getattr(player, 'last_stats', None)
+        move_stats.append((player, elapsed, stats.nodes if stats is not None else 0))
+        _, score = board.place_pawn(_x, _y, player.piece)
+        ply += 1
+        if score != 0:
+            return player, ply, move_stats
+        if board.is_full():
+            return None, ply, move_stats
+
+# ----------------------------------------------------------------------------------------
+def _game_seed(seed, game_id):
+    """Returns the random seed of a game."""
+    return (seed * 1000003 + game_id) & 0xffffffff
+
+# ----------------------------------------------------------------------------------------
+def _play_chunk(args):
+    """Worker function: play a chunk of games between two players.
+        Returns the list of the GameResults."""
+    spec_a, spec_b, first_game_id, num_games, seed, board_size = args
+    width, height, win_length = board_size
+    board = Board('x', 'o', width=width, height=height, win_length=win_length)
+    player_a = spec_a.create('x', board)
+    player_b = spec_b.create('o', board)
+    names = {player_a: spec_a.name, player_b: spec_b.name}
+    results = []
+    for game_id in range(first_game_id, first_game_id + num_games):
+        random.seed(_game_seed(seed, game_id))
+        first, second = (player_a, player_b) if game_id % 2 == 0 else (player_b, player_a)
+        winner, plies, move_stats = play_game(first, second, board)
+        results.append(GameResult(game_id, names[first], names[second],
+                                  names[winner] if winner is not None else None, plies,
+                                  [(names[player], elapsed, nodes)
+                                   for player, elapsed, nodes in move_stats]))
+    return results
+
+# ----------------------------------------------------------------------------------------
+# pylint: disable=too-many-arguments
+def iter_games(pairings, games_per_pairing, num_workers=None, seed=0,
+               chunk_size=DEFAULT_CHUNK_SIZE, width=3, height=3, win_length=3):
+    """Play games_per_pairing games for every (PlayerSpec, PlayerSpec)
+        pair in pairings, with num_workers processes (default: the
+        number of cores), and yield the GameResults as soon as they
+        are available (not in order)."""
+    if num_workers is None:
+        num_workers = multiprocessing.cpu_count()
+    tasks = []
+    game_id = 0
+    for spec_a, spec_b in pairings:
+        if spec_a.name == spec_b.name:
+            raise ValueError("the players shall have different names")
+        for first_game in range(0, games_per_pairing, chunk_size):
+            num_games = min(chunk_size, games_per_pairing - first_game)
+            tasks.append((spec_a, spec_b, game_id + first_game, num_games, seed,
+                          (width, height, win_length)))
+        game_id += games_per_pairing
+    if num_workers <= 1:
+        for task in tasks:
+            yield from _play_chunk(task)
+        return
+    with multiprocessing.Pool(num_workers) as pool:
+        for results in pool.imap_unordered(_play_chunk, tasks):
+            yield from results
+
+# ----------------------------------------------------------------------------------------
+def head_to_head(spec_a, spec_b, num_games, callback=None, **kwargs):
+    """Play num_games games between two players (see iter_games() for
+        the other arguments). callback, if given, is called with every
+        GameResult. Returns an ArenaResult."""
+    return _collect(iter_games([(spec_a, spec_b)], num_games, **kwargs), callback)
+
+# ----------------------------------------------------------------------------------------
+def round_robin(specs, games_per_pairing, callback=None, **kwargs):
+    """Play games_per_pairing games between every pair of the given
+        players (see iter_games() for the other arguments). callback,
+        if given, is called with every GameResult. Returns an
+        ArenaResult."""
+    return _collect(iter_games(list(itertools.combinations(specs, 2)), games_per_pairing,
+                               **kwargs), callback)
+# pylint: enable=too-many-arguments
+
+# ----------------------------------------------------------------------------------------
+def _collect(games, callback):
+    """Collect the given GameResults in an ArenaResult."""
+    result = ArenaResult()
+    start_time = time.perf_counter()
+    for game in games:
+        result.add(game)
+        if callback is not None:
+            callback(game)
+    result.elapsed = time.perf_counter() - start_time
+    return result
@@ -0,0 +1,274 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Asyncio players and game session manager
+# --------------------------------------------------------------------
+"""Implementation of the asyncio version of the players, to serve many
+    games at the same time on a single event loop (e.g. a chat bot):
+      - AsyncPlayer: base class of the asyncio players, whose move()
+        method is a coroutine
+      - AsyncPlayerAdapter: runs a synchronous Player (e.g. a
+        MinimaxPlayer) in an executor, so that a long search does not
+        stall the event loop (or inline, for the fast players); the
+        moves of a synchronous player are serialized, so the same
+        player can be shared by many sessions
+      - QueuePlayer: a human player, whose moves are submitted from
+        outside (e.g. by the chat messages handler)
+      - SessionManager: runs every game in its own asyncio task; a game
+        waiting for a human move costs only the memory of its board
+"""
+__all__ = ['AsyncPlayer', 'AsyncPlayerAdapter', 'QueuePlayer', 'GameSession',
+           'SessionManager']
+
+import asyncio
+from abc import ABC, abstractmethod
+import weakref
+
+from .board import Board
+from .player import Player
+
+# the lock of every synchronous player wrapped by an AsyncPlayerAdapter:
+# the players are not thread safe (e.g. the transposition table of the
+# MinimaxPlayer), so a player moves in one session at a time
+_PLAYER_LOCKS = weakref.WeakKeyDictionary()
+
+class AsyncPlayer(ABC):
+    """A Tic Tac Toe asyncio player base class."""
+
+    # ------------------------------------------------------
+    def __init__(self, piece):
+        """AsyncPlayer class constructor."""
+        self.piece = piece
+        self.other_piece = "o" if piece == "x" else "x"
+
+    # ------------------------------------------------------
+    @abstractmethod
+    async def move(self, board):
+        """Coroutine that returns the (x, y) move. The board shall
+            not be changed by the caller until the move is returned."""
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+class AsyncPlayerAdapter(AsyncPlayer):
+    """An asyncio player that wraps a synchronous Player."""
+
+    # ------------------------------------------------------
+    def __init__(self, player, executor=None, inline=False):
+        """AsyncPlayerAdapter class constructor. The moves of player
+            are computed in the given executor (None for the default
+            executor of the event loop), or directly in the event loop
+            if inline is True (for the players that move in a few
+            microseconds, as the LearnerPlayer).
+            The executor shall run the moves in the same process (e.g.
+            a ThreadPoolExecutor), otherwise the changes to the state
+            of the player (transposition table, learned values) would
+            be lost.
+            The moves of the same player are run one at a time, also
+            if it is wrapped by many adapters (e.g. shared by many
+            sessions): they wait for each other, without blocking the
+            event loop. For more parallel moves, create a player for
+            every session."""
+        AsyncPlayer.__init__(self, player.piece)
+        self.player = player
+        self.__executor = executor
+        self.__inline = inline
+
+    # ------------------------------------------------------
+    async def move(self, board):
+        """Returns the move of the wrapped player."""
+        # created in the event loop, at the first move of the player
+        lock = _PLAYER_LOCKS.get(self.player)
+        if lock is None:
+            lock = _PLAYER_LOCKS[self.player] = asyncio.Lock()
+        async with lock:
+            if self.__inline:
+                return self.player.move(board)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.__executor, self.player.move, board)
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+class QueuePlayer(AsyncPlayer):
+    """An asyncio player whose moves are submitted from outside."""
+
+    # ------------------------------------------------------
+    def __init__(self, piece):
+        """QueuePlayer class constructor."""
+        AsyncPlayer.__init__(self, piece)
+        # created by move(), in the event loop
+        self.__moves = None
+        self.__waiting = False
+
+    # ------------------------------------------------------
+    @property
+    def waiting(self):
+        """True if the player is waiting for a move"""
+        return self.__waiting
+
+    # ------------------------------------------------------
+    def submit(self, board, move):
+        """Submit a move in the <row><col> format (e.g. "A1"). Returns
+            False if the player is not waiting for a move, or the move
+            is not valid on board."""
+        if not self.__waiting or not board.is_valid_move(move):
+            return False
+        self.__waiting = False
+        self.__moves.put_nowait(board.convert_movestring_to_indexes(move))
+        return True
+
+    # ------------------------------------------------------
+    async def move(self, board):
+        """Wait for a valid move to be submitted."""
+        if self.__moves is None:
+            self.__moves = asyncio.Queue()
+        self.__waiting = True
+        try:
+            return await self.__moves.get()
+        finally:
+            self.__waiting = False
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+# pylint: disable=too-few-public-methods,too-many-instance-attributes
+class GameSession:
+    """A game played by the SessionManager."""
+
+    # ------------------------------------------------------
+    def __init__(self, session_id, board, first, second):
+        """GameSession class constructor."""
+        self.session_id = session_id
+        self.board = board
+        self.players = (first, second)
+        self.moves = []
+        self.finished = False
+        # the piece of the winner (None for a draw or unfinished game)
+        self.winner = None
+        self.task = None
+
+    # ------------------------------------------------------
+    @property
+    def player_to_move(self):
+        """The player that shall move (None if the game is finished)"""
+        if self.finished:
+            return None
+        return self.players[len(self.moves) % 2]
+# pylint: enable=too-few-public-methods,too-many-instance-attributes
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+class SessionManager:
+    """Runs many games on the same asyncio event loop."""
+
+    # ------------------------------------------------------
+    def __init__(self, executor=None, on_move=None, on_end=None):
+        """SessionManager class constructor. executor is used to run
+            the moves of the synchronous players (None for the default
+            executor of the event loop). on_move(session, move) is called
+            after every move, on_end(session) at the end of every game."""
+        self.__executor = executor
+        self.__on_move = on_move
+        self.__on_end = on_end
+        self.__sessions = {}
+
+    # ------------------------------------------------------
+    def __len__(self):
+        return len(self.__sessions)
+
+    # ------------------------------------------------------
+    def __contains__(self, session_id):
+        return session_id in self.__sessions
+
+    # ------------------------------------------------------
+    def get(self, session_id):
+        """Returns the GameSession with the given id (None if not found)."""
+        return self.__sessions.get(session_id)
+
+    # ------------------------------------------------------
+    def wrap(self, player, inline=False):
+        """Returns an asyncio player for the given synchronous Player,
+            running in the executor of the manager."""
+        return AsyncPlayerAdapter(player, self.__executor, inline)
+
+    # ------------------------------------------------------
+    # pylint: disable=too-many-arguments
+    def start_game(self, session_id, first, second, width=3, height=3, win_length=3):
+        """Start a new game between first and second (asyncio players,
+            or synchronous Players that are wrapped with wrap()) in a
+            new task of the running event loop. Returns the
+            GameSession."""
+        if session_id in self.__sessions:
+            raise ValueError("session %s already exists" % session_id)
+        if isinstance(first, Player):
+            first = self.wrap(first)
+        if isinstance(second, Player):
+            second = self.wrap(second)
+        board = Board(first.piece, second.piece, width=width, height=height,
+                      win_length=win_length)
+        session = GameSession(session_id, board, first, second)
+        self.__sessions[session_id] = session
+        session.task = asyncio.get_running_loop().create_task(self.__play(session))
+        return session
+    # pylint: enable=too-many-arguments
+
+    # ------------------------------------------------------
+    def submit_move(self, session_id, move):
+        """Submit a move, in the <row><col> format, for the QueuePlayer
+            that shall move in the given session. Returns False if the
+            session is not found, or it is not the turn of a QueuePlayer,
+            or the move is not valid."""
+        session = self.__sessions.get(session_id)
+        if session is None:
+            return False
+        player = session.player_to_move
+        if not isinstance(player, QueuePlayer):
+            return False
+        return player.submit(session.board, move)
+
+    # ------------------------------------------------------
+    def cancel(self, session_id):
+        """Stop and forget the given game."""
+        session = self.__sessions.pop(session_id, None)
+        if session is not None and session.task is not None:
+            session.task.cancel()
+
+    # ------------------------------------------------------
+    async def wait(self, session_id):
+        """Wait for the end of the given game. Returns the GameSession."""
+        session = self.__sessions[session_id]
+        await session.task
+        return session
+
+    # ------------------------------------------------------
+    async def wait_all(self):
+        """Wait for the end of all the games."""
+        tasks = [session.task for session in self.__sessions.values()]
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    # ------------------------------------------------------
+    def remove_finished(self):
+        """Forget the finished games. Returns the removed sessions."""
+        finished = [session for session in self.__sessions.values() if session.finished]
+        for session in finished:
+            del self.__sessions[session.session_id]
+        return finished
+
+    # ------------------------------------------------------
+    async def __play(self, session):
+        """Task that plays a game."""
+        board = session.board
+        while True:
+            player = session.player_to_move
+            move = await player.move(board)
+            _, score = board.place_pawn(move[0], move[1], player.piece)
+            session.moves.append(tuple(move))
+            if score != 0 or board.is_full():
+                session.finished = True
+                session.winner = player.piece if score != 0 else None
+            if self.__on_move is not None:
+                self.__on_move(session, move)
+            if session.finished:
+                break
+        if self.__on_end is not None:
+            self.__on_end(session)
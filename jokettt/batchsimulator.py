@@ -0,0 +1,240 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Vectorized batch game simulator
+# --------------------------------------------------------------------
+"""Implementation of the BatchSimulator class: N games played at the
+    same time, stored in a (N, cells) int8 NumPy array (0 = empty cell,
+    1 = first piece, 2 = second piece, the cell x*width+y is the [x, y]
+    board position). The moves of all the games are applied with
+    vectorized operations, and the wins of the whole batch are detected
+    with a single reduction of the piece masks over the winning lines.
+    All the games move in lockstep: at every ply the same player is to
+    move in all the games not yet finished.
+    The moves are chosen by policies: callables that receive the
+    simulator and a numpy random Generator and return a cell for every
+    game. Available policies:
+      - random_policy: a random valid move
+      - ValuePolicy: greedy move on a value table (e.g. the values of
+        a LearnerPlayer)
+      - TablebasePolicy: random optimal move from a Tablebase
+"""
+__all__ = ['BatchSimulator', 'random_policy', 'ValuePolicy', 'TablebasePolicy']
+
+import numpy as np
+
+from .board import _get_geometry
+
+# the masks of the pieces are stored in int64
+_MAX_CELLS = 63
+
+class BatchSimulator:
+    """A batch of tic tac toe games simulated with NumPy."""
+
+    # ------------------------------------------------------
+    def __init__(self, num_games, width=3, height=3, win_length=3):
+        """BatchSimulator class constructor. Allocate num_games
+            empty boards of the given size."""
+        geometry = _get_geometry(height, width, win_length)
+        if geometry.num_cells > _MAX_CELLS:
+            raise ValueError("board too large for the batch simulator")
+        self.num_games = num_games
+        self.num_cells = geometry.num_cells
+        self.width = width
+        self.height = height
+        self.win_length = win_length
+        self.lines = np.array(geometry.lines, dtype=np.int64)
+        # on small boards the wins are looked up in a table indexed by mask
+        self.__is_winning = None if geometry.is_winning is None else \
+            np.array(geometry.is_winning, dtype=bool)
+        self.boards = np.zeros((num_games, self.num_cells), dtype=np.int8)
+        self.masks = np.zeros((num_games, 2), dtype=np.int64)
+        self.winner = np.zeros(num_games, dtype=np.int8)
+        self.finished = np.zeros(num_games, dtype=bool)
+        self.ply = 0
+
+    # ------------------------------------------------------
+    def reset(self):
+        """Empty all the boards."""
+        self.boards[:] = 0
+        self.masks[:] = 0
+        self.winner[:] = 0
+        self.finished[:] = False
+        self.ply = 0
+
+    # ------------------------------------------------------
+    @property
+    def player(self):
+        """The piece to move (1 = first, 2 = second) in the active games"""
+        return 1 + self.ply % 2
+
+    # ------------------------------------------------------
+    def active_games(self):
+        """Returns the indexes of the games not yet finished."""
+        return np.flatnonzero(~self.finished)
+
+    # ------------------------------------------------------
+    def valid_moves(self):
+        """Returns a (N, cells) bool array, True for the empty cells
+            of the games not yet finished."""
+        return (self.boards == 0) & ~self.finished[:, None]
+
+    # ------------------------------------------------------
+    def play(self, cells):
+        """Play the given cell (one for each game; the values for
+            the games already finished are ignored) in all the
+            active games, and update the winner and finished vectors."""
+        rows = self.active_games()
+        cells = np.asarray(cells, dtype=np.int64)[rows]
+        if np.any(self.boards[rows, cells] != 0):
+            raise ValueError("move on a busy cell")
+        player = self.player
+        self.boards[rows, cells] = player
+        masks = self.masks[rows, player - 1] | np.left_shift(np.int64(1), cells)
+        self.masks[rows, player - 1] = masks
+
+        self.ply += 1
+        if self.ply == self.num_cells:
+            self.finished[rows] = True
+        if (self.ply + 1) // 2 < self.win_length:
+            # not enough pieces on the boards to win
+            return
+        if self.__is_winning is not None:
+            won = self.__is_winning[masks]
+        else:
+            won = ((masks[:, None] & self.lines) == self.lines).any(axis=1)
+        self.winner[rows[won]] = player
+        self.finished[rows[won]] = True
+
+    # ------------------------------------------------------
+    def run(self, first_policy, second_policy, rng=None):
+        """Play all the games until the end, with the given policies
+            for the first and the second player. Returns the winner
+            vector (0 = draw, 1 = first piece, 2 = second piece)."""
+        if rng is None:
+            rng = np.random.default_rng()
+        while not self.finished.all():
+            policy = first_policy if self.player == 1 else second_policy
+            self.play(policy(self, rng))
+        return self.winner
+
+# ----------------------------------------------------------------------------------------
+def random_policy(simulator, rng):
+    """Policy that plays a random valid move in every game."""
+    # all the active games have the same number of empty cells:
+    # choose the n-th empty cell, with n random
+    nth = rng.integers(0, simulator.num_cells - simulator.ply, simulator.num_games,
+                       dtype=np.int8)
+    empty_count = np.cumsum(simulator.boards == 0, axis=1, dtype=np.int8)
+    return (empty_count > nth[:, None]).argmax(axis=1)
+
+# ----------------------------------------------------------------------------------------
+def _choose_best(simulator, scores, rng):
+    """Returns the valid move with the highest score in every game
+        (ties are broken randomly)."""
+    scores = scores + rng.random(scores.shape) * 1e-6
+    scores[~simulator.valid_moves()] = -np.inf
+    return scores.argmax(axis=1)
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+class ValuePolicy:
+    """Policy that plays, in every game, the move that leads to the
+        board with the highest value in a value table (e.g. the values
+        of a LearnerPlayer). The key of the table can be:
+          - 'zhash': the Zobrist hash, computed with zhash_table (the
+            table of the Board used to learn the values)
+          - 'state': the board state index (Board.get_state_index())
+          - 'canonical': the canonical index (Board.get_canonical_index())
+        The boards not in the table have value default_value. With
+        probability eps a random move is played instead."""
+
+    # pylint: disable=too-many-arguments
+    # ------------------------------------------------------
+    def __init__(self, values, key='zhash', zhash_table=None, default_value=0.5, eps=0.0):
+        """ValuePolicy class constructor. Convert the value table
+            in sorted arrays, to look it up with vectorized searches."""
+        if key not in ('zhash', 'state', 'canonical'):
+            raise ValueError("unknown key type: %s" % key)
+        if key == 'zhash' and zhash_table is None:
+            raise ValueError("zhash_table is needed for 'zhash' keys")
+        self.__key = key
+        self.__zhash_table = None if zhash_table is None else \
+            np.asarray(zhash_table, dtype=np.int64)
+        self.__default_value = default_value
+        self.__eps = eps
+        keys = np.fromiter(values.keys(), dtype=np.int64, count=len(values))
+        vals = np.fromiter(values.values(), dtype=np.float64, count=len(values))
+        order = np.argsort(keys)
+        self.__keys = keys[order]
+        self.__values = vals[order]
+    # pylint: enable=too-many-arguments
+
+    # ------------------------------------------------------
+    def __call__(self, simulator, rng):
+        """Choose the moves for all the games of the simulator."""
+        scores = self.__lookup(self.__afterstate_keys(simulator))
+        moves = _choose_best(simulator, scores, rng)
+        if self.__eps > 0.0:
+            explore = rng.random(simulator.num_games) < self.__eps
+            moves[explore] = random_policy(simulator, rng)[explore]
+        return moves
+
+    # ------------------------------------------------------
+    def __afterstate_keys(self, simulator):
+        """Returns the (N, cells) array of the keys of the boards
+            obtained playing every cell in every game."""
+        boards = simulator.boards.astype(np.int64)
+        player = simulator.player
+        if self.__key == 'zhash':
+            zkeys = self.__zhash_table.reshape(simulator.num_cells, 2).T
+            zhash = np.bitwise_xor.reduce(
+                np.where(boards == 1, zkeys[0], 0) ^ np.where(boards == 2, zkeys[1], 0),
+                axis=1)
+            return zhash[:, None] ^ zkeys[player - 1][None, :]
+        powers = 3 ** np.arange(simulator.num_cells, dtype=np.int64)
+        if self.__key == 'state':
+            return (boards @ powers)[:, None] + player * powers[None, :]
+        geometry = _get_geometry(simulator.height, simulator.width, simulator.win_length)
+        keys = None
+        for cells in geometry.symmetries:
+            sym_powers = powers[[_x * simulator.width + _y for _x, _y in cells]]
+            sym_keys = (boards @ sym_powers)[:, None] + player * sym_powers[None, :]
+            keys = sym_keys if keys is None else np.minimum(keys, sym_keys)
+        return keys
+
+    # ------------------------------------------------------
+    def __lookup(self, keys):
+        """Returns the values of the given keys."""
+        if not self.__keys.size:
+            return np.full(keys.shape, self.__default_value)
+        pos = np.searchsorted(self.__keys, keys)
+        pos[pos == self.__keys.size] = 0
+        found = self.__keys[pos] == keys
+        return np.where(found, self.__values[pos], self.__default_value)
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+# pylint: disable=too-few-public-methods
+class TablebasePolicy:
+    """Policy that plays, in every game, a random optimal move
+        from a perfect-play Tablebase (3x3 boards only)."""
+
+    # ------------------------------------------------------
+    def __init__(self, tablebase):
+        """TablebasePolicy class constructor."""
+        self.__records = tablebase.as_array()
+
+    # ------------------------------------------------------
+    def __call__(self, simulator, rng):
+        """Choose the moves for all the games of the simulator."""
+        if simulator.num_cells != 9 or simulator.win_length != 3:
+            raise ValueError("the tablebase is available only for 3x3 boards")
+        powers = 3 ** np.arange(simulator.num_cells, dtype=np.int64)
+        moves_masks = self.__records['moves'][simulator.boards.astype(np.int64) @ powers]
+        optimal = (moves_masks[:, None].astype(np.int64) >> np.arange(simulator.num_cells)) & 1
+        # positions not in the tablebase have no optimal moves: any move is good
+        optimal[moves_masks == 0] = 1
+        return _choose_best(simulator, optimal.astype(np.float64), rng)
+# pylint: enable=too-few-public-methods
@@ -4,101 +4,465 @@
 # ---
 # Tic Tac Toe Board class definition
 # --------------------------------------------------------------------
-"""Implementation of the Board class: a board to play Tic Tac Toe game."""
-__all__ = ['Board']
+"""Implementation of the Board class: a board to play Tic Tac Toe game.
+    Besides the standard 3x3 game, the board supports the generalized
+    m,n,k-games: a board of the given width and height, where the
+    winner is the first player that puts win_length pieces in a row,
+    in a column or in a diagonal (e.g. 15x15 with 5 in a row, gomoku).
+    The position is stored as two bit masks, one for each piece:
+    the bit x*width+y is set if the piece occupies the [x, y] cell.
+    To find the winner evaluate() does not scan the board: the small
+    boards look up the piece masks in a precomputed table, the larger
+    ones count the winning lines completed by each piece, updated by
+    place_pawn() and remove_pawn() looking only at the lines through
+    the changed cell.
+    The Zobrist keys are generated from a seed and shared by all the
+    boards with the same size and seed: the hash of a position is the
+    same in every process and in every run, as long as the seed and
+    ZOBRIST_VERSION (bumped whenever the key generation changes) are
+    the same, so the values keyed by hash can be stored and reused.
+    The Board objects are slotted and keep only the piece masks, the
+    hash and references to the shared tables: copy() and snapshot() /
+    restore() duplicate only the position, not the tables.
+"""
+__all__ = ['Board', 'ZOBRIST_VERSION', 'DEFAULT_ZOBRIST_SEED']
 
 import sys
 import random
 
-import numpy as np
+# above this number of cells, the tables indexed by board masks
+# (that have 2^cells entries) are not built
+_MAX_TABLE_CELLS = 12
+
+ZOBRIST_VERSION = 1
+DEFAULT_ZOBRIST_SEED = 0
+
+# ------------------------------------------------------
+# ------------------------------------------------------
+class _BoardGeometry:
+    """Precomputed tables for a board of a given size: built once
+        and shared by all the boards with the same size."""
+
+    # pylint: disable=too-many-instance-attributes
+    # ------------------------------------------------------
+    def __init__(self, height, width, win_length):
+        """_BoardGeometry class constructor. Build all the tables."""
+        if height < 1 or width < 1 or height > 26:
+            raise ValueError("invalid board size %dx%d" % (height, width))
+        if win_length < 1 or win_length > max(height, width):
+            raise ValueError("invalid win length %d" % win_length)
+        self.height = height
+        self.width = width
+        self.win_length = win_length
+        self.num_cells = height * width
+        self.full_mask = (1 << self.num_cells) - 1
+        self.cells = tuple((ndx // width, ndx % width) for ndx in range(self.num_cells))
+
+        last_x = height - 1
+        last_y = width - 1
+        self.corners_mask = self.__cells_mask(((0, 0), (0, last_y), (last_x, 0), (last_x, last_y)))
+        self.center_mask = self.__cells_mask((_x, _y)
+                                             for _x in {last_x // 2, height // 2}
+                                             for _y in {last_y // 2, width // 2})
+        # masks of all the cells but the ones in the first/last column,
+        # used to avoid wrapping when a mask is shifted horizontally
+        self.not_first_col_mask = self.full_mask & ~self.__cells_mask(
+            (_x, 0) for _x in range(height))
+        self.not_last_col_mask = self.full_mask & ~self.__cells_mask(
+            (_x, last_y) for _x in range(height))
+
+        self.lines = self.__build_lines()
+        # the winning lines through every cell: after a move only
+        # these lines can be completed (or broken, by a removal)
+        self.cell_lines = tuple(tuple(line for line in self.lines if line & (1 << ndx))
+                                for ndx in range(self.num_cells))
+        self.line_weights = tuple(10 ** count for count in range(win_length))
+
+        # the symmetries of the board: for every symmetry, the (x, y)
+        # cell where each cell x*width+y is moved. A square board has
+        # eight symmetries (the dihedral group), a rectangular one four.
+        transforms = [
+            lambda x, y: (x, y),                    # identity
+            lambda x, y: (last_x - x, last_y - y),  # rotation by 180 degrees
+            lambda x, y: (x, last_y - y),           # reflection on the vertical axis
+            lambda x, y: (last_x - x, y),           # reflection on the horizontal axis
+        ]
+        self.inverse_symmetry = [0, 1, 2, 3]
+        if height == width:
+            transforms += [
+                lambda x, y: (y, last_x - x),           # rotation by 90 degrees clockwise
+                lambda x, y: (last_y - y, x),           # rotation by 270 degrees clockwise
+                lambda x, y: (y, x),                    # reflection on the main diagonal
+                lambda x, y: (last_y - y, last_x - x),  # reflection on the anti-diagonal
+            ]
+            self.inverse_symmetry += [5, 4, 6, 7]
+        self.symmetries = tuple(tuple(transform(_x, _y) for _x, _y in self.cells)
+                                for transform in transforms)
+        self.powers_of_3 = tuple(3 ** ndx for ndx in range(self.num_cells))
+
+        self.is_winning = None
+        self.moves = None
+        self.ternary = None
+        self.symmetric_masks = None
+        if self.num_cells <= _MAX_TABLE_CELLS:
+            self.__build_mask_tables()
+    # pylint: enable=too-many-instance-attributes
+
+    # ------------------------------------------------------
+    def mask_cells(self, mask):
+        """Returns the tuple of the (x, y) cells whose bit is set in mask."""
+        if self.moves is not None:
+            return self.moves[mask]
+        cells = []
+        while mask:
+            low_bit = mask & -mask
+            cells.append(self.cells[low_bit.bit_length() - 1])
+            mask ^= low_bit
+        return tuple(cells)
+
+    # ------------------------------------------------------
+    def mask_is_winning(self, mask):
+        """Returns True if the mask contains at least one winning line."""
+        if self.is_winning is not None:
+            return self.is_winning[mask]
+        for line in self.lines:
+            if mask & line == line:
+                return True
+        return False
 
+    # ------------------------------------------------------
+    def mask_ternary(self, mask):
+        """Returns the base-3 number with a 1 digit for every bit set in mask."""
+        if self.ternary is not None:
+            return self.ternary[mask]
+        value = 0
+        while mask:
+            low_bit = mask & -mask
+            value += self.powers_of_3[low_bit.bit_length() - 1]
+            mask ^= low_bit
+        return value
+
+    # ------------------------------------------------------
+    def transform_mask(self, mask, sym):
+        """Returns the mask transformed by the symmetry sym."""
+        if self.symmetric_masks is not None:
+            return self.symmetric_masks[sym][mask]
+        cells = self.symmetries[sym]
+        transformed = 0
+        while mask:
+            low_bit = mask & -mask
+            _x, _y = cells[low_bit.bit_length() - 1]
+            transformed |= 1 << (_x * self.width + _y)
+            mask ^= low_bit
+        return transformed
+
+    # ------------------------------------------------------
+    def neighbourhood(self, mask):
+        """Returns the mask of the cells at distance at most
+            one (also diagonally) from a cell set in mask."""
+        mask |= ((mask << 1) & self.not_first_col_mask) | \
+                ((mask >> 1) & self.not_last_col_mask)
+        mask |= (mask << self.width) | (mask >> self.width)
+        return mask & self.full_mask
+
+    # ------------------------------------------------------
+    def __cells_mask(self, cells):
+        """Returns the mask with the bits of the given cells set."""
+        mask = 0
+        for _x, _y in cells:
+            mask |= 1 << (_x * self.width + _y)
+        return mask
+
+    # ------------------------------------------------------
+    def __build_lines(self):
+        """Build the masks of all the winning lines: all the
+            win_length long segments in a row, in a column or
+            in a diagonal."""
+        lines = []
+        for _dx, _dy in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            for _x in range(self.height):
+                for _y in range(self.width):
+                    end_x = _x + _dx * (self.win_length - 1)
+                    end_y = _y + _dy * (self.win_length - 1)
+                    if 0 <= end_x < self.height and 0 <= end_y < self.width:
+                        lines.append(self.__cells_mask(
+                            (_x + _dx * _n, _y + _dy * _n) for _n in range(self.win_length)))
+        # with win_length = 1 the same cell is found in all directions
+        return tuple(sorted(set(lines)))
+
+    # ------------------------------------------------------
+    def __build_mask_tables(self):
+        """Build the tables indexed by a board mask."""
+        num_masks = self.full_mask + 1
+        self.moves = tuple(tuple(cell for ndx, cell in enumerate(self.cells)
+                                 if mask & (1 << ndx))
+                           for mask in range(num_masks))
+        self.is_winning = tuple(any(mask & line == line for line in self.lines)
+                                for mask in range(num_masks))
+        self.ternary = tuple(sum(self.powers_of_3[ndx] for ndx in range(self.num_cells)
+                                 if mask & (1 << ndx))
+                             for mask in range(num_masks))
+        self.symmetric_masks = tuple(
+            tuple(self.__cells_mask(cell for ndx, cell in enumerate(cells)
+                                    if mask & (1 << ndx))
+                  for mask in range(num_masks))
+            for cells in self.symmetries)
+
+_GEOMETRIES = {}
+
+# ------------------------------------------------------
+def _get_geometry(height, width, win_length):
+    """Returns the (shared) geometry of a board of the given size."""
+    key = (height, width, win_length)
+    geometry = _GEOMETRIES.get(key)
+    if geometry is None:
+        geometry = _BoardGeometry(height, width, win_length)
+        _GEOMETRIES[key] = geometry
+    return geometry
+
+# ------------------------------------------------------
+# ------------------------------------------------------
+# pylint: disable=too-few-public-methods
+class _ZobristTable:
+    """The Zobrist keys of a board of a given size: immutable,
+        built once and shared by all the boards that use them."""
+
+    # ------------------------------------------------------
+    def __init__(self, height, width, seed=None, init_zhash=None):
+        """_ZobristTable class constructor. Generate the keys from the
+            given seed, or copy the given [x][y][piece] keys."""
+        self.seed = seed
+        self.version = ZOBRIST_VERSION if init_zhash is None else None
+        if init_zhash is None:
+            # a string seed gives the same sequence in every process
+            # (it does not depend on the hash randomization)
+            rng = random.Random("jokettt-zobrist-%d-%d-%dx%d" %
+                                (ZOBRIST_VERSION, seed, height, width))
+            init_zhash = [[[rng.randint(0, sys.maxsize) for _e in range(0, 2)]
+                           for _y in range(0, width)] for _x in range(0, height)]
+        # plain nested tuples: the board does not need numpy (the
+        # optional vectorized modules convert them with np.asarray)
+        self.table = tuple(tuple(tuple(int(key) for key in cell) for cell in row)
+                           for row in init_zhash)
+        # the same keys indexed by [piece][x*width+y], used by the
+        # place/remove hot path
+        self.keys = tuple(tuple(cell[_e] for row in self.table for cell in row)
+                          for _e in range(0, 2))
+# pylint: enable=too-few-public-methods
+
+_ZOBRIST_TABLES = {}
+
+# ------------------------------------------------------
+def _get_zobrist_table(height, width, seed):
+    """Returns the (shared) Zobrist keys of a board of the given size."""
+    key = (height, width, seed)
+    table = _ZOBRIST_TABLES.get(key)
+    if table is None:
+        table = _ZobristTable(height, width, seed)
+        _ZOBRIST_TABLES[key] = table
+    return table
+
+# ------------------------------------------------------
+# ------------------------------------------------------
 class Board:
     """A board to play Tic Tac Toe game."""
-    # ------------------------------------------------------
-    def __init__(self, first_piece, second_piece, init_zhash=None, init_board=None):
+    __slots__ = ('__geometry', '__first_piece', '__second_piece', '__masks',
+                 '__is_winning', '__cell_lines', '__wins', '__zobrist_hash',
+                 '__zobrist', '__zkeys')
 
-        """Board class constructor"""
-        if init_board is not None:
-            self.__board = init_board
-        else:
-            self.__board = [['_', '_', '_'],
-                            ['_', '_', '_'],
-                            ['_', '_', '_']]
+    # ------------------------------------------------------
+    # pylint: disable=too-many-arguments
+    def __init__(self, first_piece, second_piece, init_zhash=None, init_board=None,
+                 width=3, height=3, win_length=3, zobrist_seed=DEFAULT_ZOBRIST_SEED):
 
+        """Board class constructor. width and height are the number
+            of columns and rows of the board, win_length the number
+            of pieces in a row needed to win. The Zobrist keys are
+            the shared ones generated from zobrist_seed, unless a
+            [x][y][piece] table of keys is given in init_zhash."""
+        self.__geometry = _get_geometry(height, width, win_length)
         self.__first_piece = first_piece
         self.__second_piece = second_piece
+        self.__masks = [0, 0]
+        if init_board is not None:
+            self.__load_board(init_board)
+        # the completed lines are counted only if there is no table
+        self.__is_winning = self.__geometry.is_winning
+        self.__cell_lines = None if self.__is_winning is not None else \
+            self.__geometry.cell_lines
+        self.__wins = None if self.__cell_lines is None else [0, 0]
+        self.__count_wins()
+
         self.__zobrist_hash = 0
-        self.__init_zhash(init_zhash)
+        self.__init_zhash(init_zhash, zobrist_seed)
+    # pylint: enable=too-many-arguments
+
+    # ------------------------------------------------------
+    @property
+    def zhash_table(self):
+        """The [x][y][piece] table of the Zobrist keys (nested tuples)"""
+        return self.__zobrist.table
+
+    # ------------------------------------------------------
+    @property
+    def pieces(self):
+        """The (first, second) pieces of the board"""
+        return self.__first_piece, self.__second_piece
+
+    # ------------------------------------------------------
+    @property
+    def zobrist_id(self):
+        """(ZOBRIST_VERSION, seed) of the Zobrist keys of the board, to
+            check that two hashes are comparable; None if the keys
+            were given with init_zhash"""
+        if self.__zobrist.version is None:
+            return None
+        return self.__zobrist.version, self.__zobrist.seed
+
+    # ------------------------------------------------------
+    @property
+    def width(self):
+        """Number of columns of the board"""
+        return self.__geometry.width
+
+    # ------------------------------------------------------
+    @property
+    def height(self):
+        """Number of rows of the board"""
+        return self.__geometry.height
+
+    # ------------------------------------------------------
+    @property
+    def win_length(self):
+        """Number of pieces in a row needed to win"""
+        return self.__geometry.win_length
+
+    # ------------------------------------------------------
+    def is_standard(self):
+        """Returns True if this is the standard 3x3 tic tac toe board."""
+        geometry = self.__geometry
+        return geometry.height == 3 and geometry.width == 3 and geometry.win_length == 3
 
     # ------------------------------------------------------
     def reset(self, init_board=None):
 
         """Reset the board to the given schema (default = empty)."""
+        self.__masks = [0, 0]
         if init_board is not None:
-            for _x in range(0, 3):
-                for _y in range(0, 3):
-                    self.__board[_x][_y] = init_board[_x][_y]
-        else:
-            self.__board = [['_', '_', '_'],
-                            ['_', '_', '_'],
-                            ['_', '_', '_']]
+            self.__load_board(init_board)
+        self.__count_wins()
 
         # initialize Zobrist hash value
         self.__evaluate_zhash()
 
+    # ------------------------------------------------------
+    def copy(self):
+        """Returns a copy of the board. Only the position is copied:
+            the geometry tables and the Zobrist keys are shared."""
+        board = type(self).__new__(type(self))
+        board.__geometry = self.__geometry
+        board.__first_piece = self.__first_piece
+        board.__second_piece = self.__second_piece
+        board.__masks = self.__masks[:]
+        board.__is_winning = self.__is_winning
+        board.__cell_lines = self.__cell_lines
+        board.__wins = None if self.__wins is None else self.__wins[:]
+        board.__zobrist_hash = self.__zobrist_hash
+        board.__zobrist = self.__zobrist
+        board.__zkeys = self.__zkeys
+        return board
+
+    # ------------------------------------------------------
+    def __copy__(self):
+        return self.copy()
+
+    # ------------------------------------------------------
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    # ------------------------------------------------------
+    def snapshot(self):
+        """Returns an immutable snapshot of the position, that can be
+            given to restore() to go back to it."""
+        wins = self.__wins
+        return (self.__geometry, self.__zkeys, self.__masks[0], self.__masks[1],
+                self.__zobrist_hash, None if wins is None else tuple(wins))
+
+    # ------------------------------------------------------
+    def restore(self, snapshot):
+        """Restore the position saved by snapshot(), taken on this
+            board or on a board with the same size and Zobrist keys."""
+        geometry, zkeys, mask0, mask1, zobrist_hash, wins = snapshot
+        if geometry is not self.__geometry or zkeys is not self.__zkeys:
+            raise ValueError("the snapshot was taken on a different kind of board")
+        self.__masks = [mask0, mask1]
+        self.__zobrist_hash = zobrist_hash
+        if wins is not None:
+            self.__wins = list(wins)
+
+    # ------------------------------------------------------
+    def __getstate__(self):
+        """Compact pickle state: the shared tables are rebuilt (or
+            found in the caches) when unpickling."""
+        zobrist = self.__zobrist
+        geometry = self.__geometry
+        return (self.__first_piece, self.__second_piece, geometry.height, geometry.width,
+                geometry.win_length, zobrist.seed,
+                zobrist.table if zobrist.version is None else None,
+                self.__masks[0], self.__masks[1])
+
+    # ------------------------------------------------------
+    def __setstate__(self, state):
+        # pylint: disable=unbalanced-tuple-unpacking
+        first_piece, second_piece, height, width, win_length, zobrist_seed, \
+            init_zhash, mask0, mask1 = state
+        self.__init__(first_piece, second_piece, init_zhash, width=width, height=height,
+                      win_length=win_length, zobrist_seed=zobrist_seed)
+        self.__masks = [mask0, mask1]
+        self.__count_wins()
+        self.__evaluate_zhash()
+
     # ------------------------------------------------------
     def is_empty(self):
         """Returns True if the board is empty"""
-        if self.__board == [['_', '_', '_'],
-                            ['_', '_', '_'],
-                            ['_', '_', '_']]:
-            return True
-
-        return False
+        return not self.__masks[0] | self.__masks[1]
 
     # ------------------------------------------------------
     def only_one_piece_present(self):
         """Returns True if only one piece present on board."""
-        num_pieces = 0
-        for _x in range(0, 3):
-            for _y in range(0, 3):
-                if self.__board[_x][_y] != "_":
-                    num_pieces += 1
-        if num_pieces == 1:
-            return True
-        return False
+        busy = self.__masks[0] | self.__masks[1]
+        return busy != 0 and busy & (busy - 1) == 0
+
+    # ------------------------------------------------------
+    def count_pieces(self, piece):
+        """Returns the number of pawns of the given piece on the board."""
+        return bin(self.__masks[self.__convert_piece_in_index(piece)]).count("1")
 
     # ------------------------------------------------------
     def at_least_a_corner_busy(self):
         """Returns True if at least a corner of the board is busy"""
-        return self.__board[0][0] != '_' or \
-               self.__board[0][2] != '_' or \
-               self.__board[2][0] != '_' or \
-               self.__board[2][2] != '_'
+        return bool((self.__masks[0] | self.__masks[1]) & self.__geometry.corners_mask)
 
     # ------------------------------------------------------
     def center_is_busy(self):
-        """Returns True if the center cell of the board is busy"""
-        return self.__board[1][1] != '_'
+        """Returns True if the center cell of the board is busy
+            (with an even size, one of the central cells)"""
+        return bool((self.__masks[0] | self.__masks[1]) & self.__geometry.center_mask)
 
     # ------------------------------------------------------
     def is_not_full(self):
         """Returns True if the board is not full."""
-        for _x in range(0, 3):
-            for _y in range(0, 3):
-                if self.__board[_x][_y] == "_":
-                    return True
-        return False
+        return (self.__masks[0] | self.__masks[1]) != self.__geometry.full_mask
 
     # ------------------------------------------------------
     def is_full(self):
         """Returns True if the board is full."""
-        return not self.is_not_full()
+        return (self.__masks[0] | self.__masks[1]) == self.__geometry.full_mask
 
     # ------------------------------------------------------
     def pos_is_empty(self, _x, _y):
         """Returns True if the given board position does not contains a pawn."""
-        return bool(self.__board[_x][_y] == "_")
+        return not (self.__masks[0] | self.__masks[1]) & (1 << (_x * self.__geometry.width + _y))
 
     # ------------------------------------------------------
     def pos_is_busy(self, _x, _y):
@@ -108,18 +472,29 @@ class Board:
     # ------------------------------------------------------
     def valid_moves(self):
         """Returns the list of the valid moves in the current board state."""
-        move_list = []
-        for _x in range(0, 3):
-            for _y in range(0, 3):
-                if self.__board[_x][_y] == "_":
-                    move_list.append([_x, _y])
-        return move_list
+        geometry = self.__geometry
+        empty = geometry.full_mask & ~(self.__masks[0] | self.__masks[1])
+        if geometry.moves is not None:
+            return list(geometry.moves[empty])
+        return list(geometry.mask_cells(empty))
+
+    # ------------------------------------------------------
+    def near_moves(self):
+        """Returns the list of the valid moves adjacent (also diagonally)
+            to at least one pawn. On large boards the other moves are
+            seldom worth to be considered. If the board is empty,
+            returns all the valid moves."""
+        busy = self.__masks[0] | self.__masks[1]
+        if not busy:
+            return self.valid_moves()
+        geometry = self.__geometry
+        return list(geometry.mask_cells(geometry.neighbourhood(busy) & ~busy))
 
     # ------------------------------------------------------
     def is_valid_move(self, move):
         """Returns True if the move is valid in the current board state."""
         # check the format of the move
-        if len(move) != 2:
+        if len(move) < 2:
             return False
         _x, _y = self.convert_movestring_to_indexes(move)
         if _x == -1 or _y == -1:
@@ -135,28 +510,98 @@ class Board:
            and the score of the position"""
         zhash, score = self.place_pawn(move[0], move[1], piece)
         # return the board in the previous status
-        _ = self.__remove_pawn(move[0], move[1])
+        _ = self.remove_pawn(move[0], move[1])
         return zhash, score
 
+    # ------------------------------------------------------
+    def is_winning_move(self, _x, _y, piece):
+        """Returns True if placing piece in the given (empty) position
+            completes a winning line. The board is not changed."""
+        geometry = self.__geometry
+        cell = _x * geometry.width + _y
+        mask = self.__masks[self.__convert_piece_in_index(piece)] | (1 << cell)
+        for line in geometry.cell_lines[cell]:
+            if mask & line == line:
+                return True
+        return False
+
     # ------------------------------------------------------
     def place_pawn(self, _x, _y, piece):
         """Places a pawn in the given board position."""
-        if self.pos_is_empty(_x, _y):
-            self.__board[_x][_y] = piece
-            self.__update_zhash(_x, _y, piece)
+        cell = _x * self.__geometry.width + _y
+        bit = 1 << cell
+        if not (self.__masks[0] | self.__masks[1]) & bit:
+            piece_ndx = self.__convert_piece_in_index(piece)
+            mask = self.__masks[piece_ndx] | bit
+            self.__masks[piece_ndx] = mask
+            self.__zobrist_hash ^= self.__zkeys[piece_ndx][cell]
+            if self.__cell_lines is not None:
+                for line in self.__cell_lines[cell]:
+                    if mask & line == line:
+                        self.__wins[piece_ndx] += 1
         return self.evaluate(piece)
 
     # ------------------------------------------------------
     def evaluate(self, piece):
         """Evaluates the board value."""
-        neg_piece = self.__get_other_piece(piece)
-        score = self.__evaluate_rows(piece, neg_piece)
-        if score != 0:
-            return self.__zobrist_hash, score
-        score = self.__evaluate_cols(piece, neg_piece)
-        if score != 0:
-            return self.__zobrist_hash, score
-        return self.__zobrist_hash, self.__evaluate_diags(piece, neg_piece)
+        piece_ndx = self.__convert_piece_in_index(piece)
+        is_winning = self.__is_winning
+        if is_winning is not None:
+            if is_winning[self.__masks[piece_ndx]]:
+                return self.__zobrist_hash, 10
+            if is_winning[self.__masks[1 - piece_ndx]]:
+                return self.__zobrist_hash, -10
+            return self.__zobrist_hash, 0
+        if self.__wins[piece_ndx]:
+            return self.__zobrist_hash, 10
+        if self.__wins[1 - piece_ndx]:
+            return self.__zobrist_hash, -10
+        return self.__zobrist_hash, 0
+
+    # ------------------------------------------------------
+    def evaluate_heuristic(self, piece):
+        """Heuristic evaluation of a position without a winner, used
+            when the search cannot reach the end of the game: every
+            line that contains only pieces of one player is worth
+            10^(number of pieces), positive for the given piece and
+            negative for the other one."""
+        piece_ndx = self.__convert_piece_in_index(piece)
+        own_mask = self.__masks[piece_ndx]
+        other_mask = self.__masks[1 - piece_ndx]
+        weights = self.__geometry.line_weights
+        score = 0
+        for line in self.__geometry.lines:
+            own = own_mask & line
+            other = other_mask & line
+            if own:
+                if not other:
+                    score += weights[bin(own).count("1")]
+            elif other:
+                score -= weights[bin(other).count("1")]
+        return score
+
+    # ------------------------------------------------------
+    def get_zhash(self):
+        """Returns the Zobrist hash of the current board."""
+        return self.__zobrist_hash
+
+    # ------------------------------------------------------
+    def count_lines_through(self, _x, _y):
+        """Returns the number of winning lines through the given
+            position (e.g. 4 for the center of the 3x3 board, 3 for
+            a corner, 2 for an edge): a measure of its strength."""
+        geometry = self.__geometry
+        return len(geometry.cell_lines[_x * geometry.width + _y])
+
+    # ------------------------------------------------------
+    def get_state_index(self):
+        """Returns a collision-free index of the current board in the
+            [0, 3^cells) range: the board read as a base-3 number, with
+            the digit x*width+y equal to 0 for an empty cell, 1 for the
+            first piece and 2 for the second piece."""
+        geometry = self.__geometry
+        return geometry.mask_ternary(self.__masks[0]) + \
+            2 * geometry.mask_ternary(self.__masks[1])
 
     # ------------------------------------------------------
     def convert_movestring_to_indexes(self, move):
@@ -164,7 +609,7 @@ class Board:
         format to the board x,y indexes.
         """
         row = move[0].upper()
-        col = move[1]
+        col = move[1:]
         return self.__convert_move_coords_to_indexes(row, col)
 
     # ------------------------------------------------------
@@ -175,164 +620,90 @@ class Board:
         return self.__convert_indexes_to_movestring(move[0], move[1])
 
     # ------------------------------------------------------
-    def __remove_pawn(self, _x, _y):
-        """Removes a pawn from the given board position."""
-        piece = self.__board[_x][_y]
-        if piece != "_":
-            self.__update_zhash(_x, _y, piece)
-            self.__board[_x][_y] = "_"
-        return piece
-
-    # experimental code that try to explore the concept
-    # of "equivalent boards"... could be used by learner
-    # player to speed up learning. Temporarly disabled...
-    # ------------------------------------------------------
-    #def get_zhash_equivalent_boards(self):
-    #    """Return the zhash of the current board and of all
-    #        the equivant simmetrical boards"""
-    #    zhash2 = self.__rotate_board_clockwise()
-    #    zhash3 = self.__rotate_board_clockwise()
-    #    zhash4 = self.__rotate_board_clockwise()
-    #    zhash1 = self.__rotate_board_clockwise()
-    #    return zhash1, zhash2, zhash3, zhash4
-
-    # ------------------------------------------------------
-    #def __replace_pawn(self, _x, _y, piece):
-    #    """Replace a pawn in the given board position
-    #        with the given piece."""
-    #    old_piece = self.__remove_pawn(_x, _y)
-    #    self.place_pawn(_x, _y, piece)
-    #    return old_piece
-
-    # ------------------------------------------------------
-    #def __move_pawn(self, x0, y0, x1, y1):
-    #    """Move the pawn in the [x0, y0] position to the
-    #       [x1, y1] position. Returns the piece that was
-    #       in the [x1, y1] position"""
-    #    return self.__replace_pawn(x1, y1, self.__remove_pawn(x0, y0))
-
-    #def __rotate_board_clockwise(self):
-    #    """Build the board equivalent to the current one
-    #        rotating it by 90 degrees clockwise"""
-    #    piece = self.__board[0][0]
-    #    piece = self.__replace_pawn(0, 2, piece)
-    #    piece = self.__replace_pawn(2, 2, piece)
-    #    piece = self.__replace_pawn(2, 0, piece)
-    #    _ = self.__replace_pawn(0, 0, piece)
-    #    piece = self.__board[0][1]
-    #    piece = self.__replace_pawn(1, 2, piece)
-    #    piece = self.__replace_pawn(2, 1, piece)
-    #    piece = self.__replace_pawn(1, 0, piece)
-    #    _ = self.__replace_pawn(0, 1, piece)
-    #    return self.__zobrist_hash
-
-    # ------------------------------------------------------
-    @staticmethod
-    def __convert_move_coords_to_indexes(row, col):
+    def remove_pawn(self, _x, _y):
+        """Removes a pawn from the given board position, undoing
+            a previous place_pawn(). Returns the removed piece
+            ('_' if the position was empty)."""
+        cell = _x * self.__geometry.width + _y
+        bit = 1 << cell
+        for piece_ndx in range(0, 2):
+            mask = self.__masks[piece_ndx]
+            if mask & bit:
+                if self.__cell_lines is not None:
+                    for line in self.__cell_lines[cell]:
+                        if mask & line == line:
+                            self.__wins[piece_ndx] -= 1
+                self.__masks[piece_ndx] = mask & ~bit
+                self.__zobrist_hash ^= self.__zkeys[piece_ndx][cell]
+                return self.__convert_index_in_piece(piece_ndx)
+        return "_"
+
+    # ------------------------------------------------------
+    def get_canonical_index(self):
+        """Returns the canonical index of the board, shared by all the
+            boards equivalent to the current one by rotation or
+            reflection, together with the symmetry that transforms
+            the current board in the canonical one.
+            The canonical index is the smallest state index (see
+            get_state_index()) among the equivalent boards."""
+        geometry = self.__geometry
+        mask0, mask1 = self.__masks
+        best_ndx = geometry.mask_ternary(mask0) + 2 * geometry.mask_ternary(mask1)
+        best_sym = 0
+        for sym in range(1, len(geometry.symmetries)):
+            ndx = geometry.mask_ternary(geometry.transform_mask(mask0, sym)) + \
+                2 * geometry.mask_ternary(geometry.transform_mask(mask1, sym))
+            if ndx < best_ndx:
+                best_ndx = ndx
+                best_sym = sym
+        return best_ndx, best_sym
+
+    # ------------------------------------------------------
+    def transform_move(self, move, sym):
+        """Convert a move on the actual board in the corresponding move
+            on the canonical board, given the symmetry returned by
+            get_canonical_index()."""
+        geometry = self.__geometry
+        return geometry.symmetries[sym][move[0] * geometry.width + move[1]]
+
+    # ------------------------------------------------------
+    def untransform_move(self, move, sym):
+        """Convert a move on the canonical board in the corresponding move
+            on the actual board, given the symmetry returned by
+            get_canonical_index()."""
+        geometry = self.__geometry
+        return geometry.symmetries[geometry.inverse_symmetry[sym]][
+            move[0] * geometry.width + move[1]]
+
+    # ------------------------------------------------------
+    def __convert_move_coords_to_indexes(self, row, col):
         """Convert move coordinates (e.g. "A","1") to board x,y indexes."""
-        row_to_x = {
-            "A": 0,
-            "B": 1,
-            "C": 2
-        }
-        col_to_y = {
-            "1": 0,
-            "2": 1,
-            "3": 2
-        }
-        return row_to_x.get(row, -1), col_to_y.get(col, -1)
+        _x = ord(row) - ord("A") if len(row) == 1 else -1
+        if not 0 <= _x < self.__geometry.height:
+            _x = -1
+        # only ASCII digits: str.isdigit() is true also for e.g. "²"
+        _y = int(col) - 1 if col and all("0" <= char <= "9" for char in col) else -1
+        if not 0 <= _y < self.__geometry.width:
+            _y = -1
+        return _x, _y
 
     # ------------------------------------------------------
     @staticmethod
     def __convert_indexes_to_movestring(_x, _y):
         """Convert the move from board x,y indexes to <row><col> format (e.g. "A1")."""
-        x_to_row = {
-            0: "A",
-            1: "B",
-            2: "C"
-        }
-        y_to_col = {
-            0: "1",
-            1: "2",
-            2: "3"
-        }
-        mstring = ""
-        mstring += x_to_row[_x]
-        mstring += y_to_col[_y]
-        return mstring
-
-    # ------------------------------------------------------
-    def __evaluate_rows(self, pos_piece, neg_piece):
-        """Evaluates the board value checking only rows."""
-        val = 0
-        row = 0
-        while val == 0 and row < 3:
-            if self.__board[row][0] == self.__board[row][1] and \
-                    self.__board[row][1] == self.__board[row][2]:
-                if self.__board[row][0] == pos_piece:
-                    val = 10
-                elif self.__board[row][0] == neg_piece:
-                    val = -10
-            row += 1
-
-        return val
-
-    # ------------------------------------------------------
-    def __evaluate_cols(self, pos_piece, neg_piece):
-        """Evaluates the board value checking only columns."""
-        val = 0
-        col = 0
-        while val == 0 and col < 3:
-            if self.__board[0][col] == self.__board[1][col] and \
-               self.__board[1][col] == self.__board[2][col]:
-                if self.__board[0][col] == pos_piece:
-                    val = 10
-                elif self.__board[0][col] == neg_piece:
-                    val = -10
-            col += 1
-
-        return val
-
-    # ------------------------------------------------------
-    def __evaluate_diags(self, pos_piece, neg_piece):
-        """Evaluates the board value checking only diagonals."""
-        val = 0
-        if self.__board[0][0] == self.__board[1][1] and \
-           self.__board[1][1] == self.__board[2][2]:
-            if self.__board[1][1] == pos_piece:
-                val = 10
-            elif self.__board[1][1] == neg_piece:
-                val = -10
-
-        if val != 0:
-            return val
-
-        if self.__board[0][2] == self.__board[1][1] and \
-           self.__board[1][1] == self.__board[2][0]:
-            if self.__board[1][1] == pos_piece:
-                val = 10
-            elif self.__board[1][1] == neg_piece:
-                val = -10
-
-        return val
-
-    # ------------------------------------------------------
-    def __init_zhash(self, init_zhash):
-        """Initialize Zobrist hash table with values provided
-        or generating random values."""
+        return chr(ord("A") + _x) + str(_y + 1)
 
-        self.zhash_table = np.empty([3, 3, 2], dtype=int)
+    # ------------------------------------------------------
+    def __init_zhash(self, init_zhash, zobrist_seed):
+        """Initialize Zobrist hash table with values provided
+        or with the shared keys generated from the seed."""
         if init_zhash is not None:
-            for _x in range(0, 3):
-                for _y in range(0, 3):
-                    for _e in range(0, 2):
-                        self.zhash_table[_x][_y][_e] = init_zhash[_x][_y][_e]
+            self.__zobrist = _ZobristTable(self.__geometry.height, self.__geometry.width,
+                                           init_zhash=init_zhash)
         else:
-            random.seed()
-            for _x in range(0, 3):
-                for _y in range(0, 3):
-                    for _e in range(0, 2):
-                        self.zhash_table[_x][_y][_e] = random.randint(0, sys.maxsize)
+            self.__zobrist = _get_zobrist_table(self.__geometry.height,
+                                                self.__geometry.width, zobrist_seed)
+        self.__zkeys = self.__zobrist.keys
 
         # compute current board Zobrist hash value
         self.__evaluate_zhash()
@@ -341,20 +712,49 @@ class Board:
     def __evaluate_zhash(self):
         """Completely evaluates Zobrist hash value of the current board."""
         self.__zobrist_hash = 0
-        for _x in range(0, 3):
-            for _y in range(0, 3):
-                piece = self.__board[_x][_y]
+        width = self.__geometry.width
+        for piece_ndx in range(0, 2):
+            for _x, _y in self.__geometry.mask_cells(self.__masks[piece_ndx]):
+                self.__zobrist_hash ^= self.__zkeys[piece_ndx][_x * width + _y]
+
+    # ------------------------------------------------------
+    def __count_wins(self):
+        """Completely counts the winning lines completed by each piece."""
+        if self.__cell_lines is None:
+            return
+        for piece_ndx in range(0, 2):
+            mask = self.__masks[piece_ndx]
+            self.__wins[piece_ndx] = sum(1 for line in self.__geometry.lines
+                                         if mask & line == line)
+
+    # ------------------------------------------------------
+    def __load_board(self, init_board):
+        """Set the piece masks from a list of rows of pieces ('_' = empty cell)."""
+        width = self.__geometry.width
+        for _x in range(0, self.__geometry.height):
+            for _y in range(0, width):
+                piece = init_board[_x][_y]
                 if piece != "_":
                     piece_ndx = self.__convert_piece_in_index(piece)
-                    self.__zobrist_hash ^= self.zhash_table[_x][_y][piece_ndx]
-
-    # ------------------------------------------------------
-    def __update_zhash(self, _x, _y, piece):
-        """Update Zobrist hash value after a board status change
-        due to a single place or remove of a pawn.
-        """
-        piece_ndx = self.__convert_piece_in_index(piece)
-        self.__zobrist_hash ^= self.zhash_table[_x][_y][piece_ndx]
+                    self.__masks[piece_ndx] |= 1 << (_x * width + _y)
+
+    # ------------------------------------------------------
+    def __to_rows(self):
+        """Build the list of rows of pieces representation of the board."""
+        rows = []
+        width = self.__geometry.width
+        for _x in range(0, self.__geometry.height):
+            row = []
+            for _y in range(0, width):
+                bit = 1 << (_x * width + _y)
+                if self.__masks[0] & bit:
+                    row.append(self.__first_piece)
+                elif self.__masks[1] & bit:
+                    row.append(self.__second_piece)
+                else:
+                    row.append('_')
+            rows.append(row)
+        return rows
 
     # ------------------------------------------------------
     def __convert_piece_in_index(self, piece):
@@ -364,20 +764,24 @@ class Board:
         return 1
 
     # ------------------------------------------------------
-    def __get_other_piece(self, piece):
-        if piece == self.__first_piece:
-            return self.__second_piece
-        return self.__first_piece
+    def __convert_index_in_piece(self, piece_ndx):
+        """Convert an internal index in the corresponding piece."""
+        if piece_ndx == 0:
+            return self.__first_piece
+        return self.__second_piece
 
     # ------------------------------------------------------
     def __str__(self):
         """__str__ display of the board."""
         ###return '     1    2    3\nA %r\nB %r\nC %r\n--- hash = %r' % \
         ###    (self.__board[0], self.__board[1], self.__board[2], self.__zobrist_hash
-        return '    1    2    3\nA %r\nB %r\nC %r\n' % \
-            (self.__board[0], self.__board[1], self.__board[2])
+        header = '    ' + ''.join('%-5d' % (_y + 1) for _y in range(self.__geometry.width))
+        lines = [header.rstrip()]
+        for _x, row in enumerate(self.__to_rows()):
+            lines.append('%s %r' % (chr(ord("A") + _x), row))
+        return '\n'.join(lines) + '\n'
 
     # ------------------------------------------------------
     def __repr__(self):
         """__repr__ representation of the board."""
-        return 'Board(%s)' % self.__board
+        return 'Board(%s)' % self.__to_rows()
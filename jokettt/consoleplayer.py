@@ -11,7 +11,8 @@
     a player that gets the moves from console. This can be used to make
     able to play an human player using a minimal command line interface.
     The moves shall be entered using the format <row><column>, with
-    <row> = A, B, C and <col> = 1, 2, 3.
+    <row> = A, B, C and <col> = 1, 2, 3 (on larger boards, more
+    letters and numbers, e.g. "H12").
     This class is derived from the Player base class
 """
 __all__ = ['ConsolePlayer']
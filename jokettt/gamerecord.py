@@ -0,0 +1,295 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Compact binary records of the games played
+# --------------------------------------------------------------------
+"""Implementation of the game records: a compact binary format to
+    archive the games played, written as a stream and read back one
+    game at a time.
+    The file contains a 6 bytes header (magic, version) followed by a
+    sequence of entries, each one starting with a tag byte:
+      - b'P': a player definition: player id, name length and name
+        (UTF-8); written by the writer the first time a name is used
+      - b'G': a game: 11 bytes header (width, height, win length, ids
+        of the first and of the second player, flags, number of moves,
+        seed) followed by one byte for every move (the cell x*width+y)
+    The flags byte contains the result (RESULT_DRAW, RESULT_FIRST_WINS,
+    RESULT_SECOND_WINS or RESULT_UNFINISHED) in the two lowest bits,
+    the piece of the first player (bit 2 set if 'o') and the presence
+    of the seed (bit 3). The seed is an unsigned 32 bits number.
+    A file that is truncated (e.g. by a crash while it was written) or
+    corrupted raises ValueError when the damaged entry is read.
+    A 3x3 game between known players takes 12 bytes plus one byte
+    for every move.
+    GameRecordWriter writes the games, as a whole or move by move from
+    a game loop. iter_records() reads the games from a file (through
+    mmap) or a buffer, yielding them one at a time.
+"""
+__all__ = ['GameRecord', 'GameRecordWriter', 'iter_records', 'RESULT_DRAW',
+           'RESULT_FIRST_WINS', 'RESULT_SECOND_WINS', 'RESULT_UNFINISHED']
+
+import io
+import mmap
+import os
+import struct
+
+_MAGIC = b'JTGR'
+_VERSION = 1
+_HEADER = struct.Struct('<4sH')
+_PLAYER_TAG = ord('P')
+_GAME_TAG = ord('G')
+_PLAYER = struct.Struct('<BB')
+_GAME = struct.Struct('<BBBBBBBI')
+_MAX_PLAYERS = 256
+_MAX_CELLS = 256
+_MAX_SEED = 0xffffffff
+
+RESULT_DRAW = 0
+RESULT_FIRST_WINS = 1
+RESULT_SECOND_WINS = 2
+RESULT_UNFINISHED = 3
+
+_RESULT_MASK = 0x03
+_FIRST_PIECE_O = 0x04
+_HAS_SEED = 0x08
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+# pylint: disable=too-few-public-methods,too-many-instance-attributes
+class GameRecord:
+    """A game read from, or to be written to, a game records file."""
+    __slots__ = ('first', 'second', 'first_piece', 'result', 'cells', 'seed',
+                 'width', 'height', 'win_length')
+
+    # ------------------------------------------------------
+    # pylint: disable=too-many-arguments
+    def __init__(self, first, second, cells, result, first_piece='x', seed=None,
+                 width=3, height=3, win_length=3):
+        """GameRecord class constructor. first and second are the names
+            of the players (first moves first, with first_piece), cells
+            the bytes of the cells of the moves (x*width+y), result
+            one of the RESULT_* constants."""
+        self.first = first
+        self.second = second
+        self.cells = cells
+        self.result = result
+        self.first_piece = first_piece
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.win_length = win_length
+    # pylint: enable=too-many-arguments
+
+    # ------------------------------------------------------
+    @property
+    def winner(self):
+        """The name of the winner (None for a draw or unfinished game)"""
+        if self.result == RESULT_FIRST_WINS:
+            return self.first
+        if self.result == RESULT_SECOND_WINS:
+            return self.second
+        return None
+
+    # ------------------------------------------------------
+    def moves(self):
+        """Returns the list of the (x, y) moves of the game."""
+        width = self.width
+        return [divmod(cell, width) for cell in self.cells]
+
+    # ------------------------------------------------------
+    def __repr__(self):
+        return "GameRecord(%s vs %s, %dx%d, %d moves, result=%d)" % \
+            (self.first, self.second, self.height, self.width, len(self.cells), self.result)
+# pylint: enable=too-few-public-methods,too-many-instance-attributes
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+class GameRecordWriter:
+    """Writes the games in a game records file, as a stream."""
+
+    # ------------------------------------------------------
+    def __init__(self, out_file):
+        """GameRecordWriter class constructor. out_file is a path
+            (the file is created) or a binary file object open for
+            writing at its beginning."""
+        self.__own_file = isinstance(out_file, (str, os.PathLike))
+        self.__out_file = open(out_file, 'wb') if self.__own_file else out_file
+        self.__out_file.write(_HEADER.pack(_MAGIC, _VERSION))
+        self.__player_ids = {}
+        self.__game = None
+        self.__cells = None
+        self.num_games = 0
+
+    # ------------------------------------------------------
+    def write(self, record):
+        """Write a GameRecord."""
+        if record.width * record.height > _MAX_CELLS or len(record.cells) >= _MAX_CELLS:
+            raise ValueError("the board is too large for a game record")
+        if record.seed is not None and not 0 <= record.seed <= _MAX_SEED:
+            raise ValueError("the seed of a game record shall fit in 32 bits")
+        first_id = self.__player_id(record.first)
+        second_id = self.__player_id(record.second)
+        flags = record.result & _RESULT_MASK
+        if record.first_piece == 'o':
+            flags |= _FIRST_PIECE_O
+        if record.seed is not None:
+            flags |= _HAS_SEED
+        self.__out_file.write(
+            bytes((_GAME_TAG,)) +
+            _GAME.pack(record.width, record.height, record.win_length, first_id, second_id,
+                       flags, len(record.cells),
+                       record.seed if record.seed is not None else 0) +
+            bytes(record.cells))
+        self.num_games += 1
+
+    # ------------------------------------------------------
+    # pylint: disable=too-many-arguments
+    def start_game(self, first, second, first_piece='x', seed=None, width=3, height=3,
+                   win_length=3):
+        """Start recording a game from a game loop: the moves are
+            added with add_move(), and the game is written by
+            end_game()."""
+        self.__game = GameRecord(first, second, None, RESULT_UNFINISHED, first_piece, seed,
+                                 width, height, win_length)
+        self.__cells = bytearray()
+    # pylint: enable=too-many-arguments
+
+    # ------------------------------------------------------
+    def add_move(self, _x, _y):
+        """Add a move to the game started by start_game()."""
+        self.__cells.append(_x * self.__game.width + _y)
+
+    # ------------------------------------------------------
+    def end_game(self, result):
+        """Write the game started by start_game() with the given result
+            (one of the RESULT_* constants)."""
+        game = self.__game
+        game.cells = self.__cells
+        game.result = result
+        self.__game = None
+        self.__cells = None
+        self.write(game)
+
+    # ------------------------------------------------------
+    def flush(self):
+        """Flush the written games to the file."""
+        self.__out_file.flush()
+
+    # ------------------------------------------------------
+    def close(self):
+        """Close the file (only if opened by the writer)."""
+        if self.__own_file:
+            self.__out_file.close()
+        else:
+            self.__out_file.flush()
+
+    # ------------------------------------------------------
+    def __enter__(self):
+        return self
+
+    # ------------------------------------------------------
+    def __exit__(self, *args):
+        self.close()
+
+    # ------------------------------------------------------
+    def __player_id(self, name):
+        """Returns the id of the given player, writing its definition
+            the first time."""
+        player_id = self.__player_ids.get(name)
+        if player_id is None:
+            player_id = len(self.__player_ids)
+            if player_id >= _MAX_PLAYERS:
+                raise ValueError("too many players in a game records file")
+            encoded = name.encode('utf-8')
+            self.__out_file.write(bytes((_PLAYER_TAG,)) +
+                                  _PLAYER.pack(player_id, len(encoded)) + encoded)
+            self.__player_ids[name] = player_id
+        return player_id
+
+# ----------------------------------------------------------------------------------------
+def iter_records(source):
+    """Generator that yields the GameRecords stored in source: a path
+        or a binary file object (a regular file is memory mapped, other
+        streams such as BytesIO, pipes or gzip files are read), or a
+        buffer (bytes, bytearray, memoryview, mmap)."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as in_file:
+            yield from _iter_file(in_file)
+    elif hasattr(source, 'read'):
+        yield from _iter_file(source)
+    else:
+        yield from _iter_buffer(source)
+
+# ----------------------------------------------------------------------------------------
+def _iter_file(in_file):
+    """Yields the GameRecords of an open file, through mmap when the
+        file can be mapped, otherwise from its buffer or its content."""
+    buffer = _map_file(in_file)
+    if buffer is not None:
+        with buffer:
+            yield from _iter_buffer(buffer)
+    elif hasattr(in_file, 'getbuffer'):
+        yield from _iter_buffer(in_file.getbuffer())
+    else:
+        yield from _iter_buffer(in_file.read())
+
+# ----------------------------------------------------------------------------------------
+def _map_file(in_file):
+    """Returns a read-only mmap of a regular file, or None if the file
+        cannot be mapped (e.g. it is empty, a pipe or a compressed file)."""
+    # only the raw files hold the records: the fileno of e.g. a gzip
+    # file refers to the compressed data
+    if not isinstance(getattr(in_file, 'raw', in_file), io.FileIO):
+        return None
+    try:
+        return mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+# ----------------------------------------------------------------------------------------
+def _iter_buffer(buffer):
+    """Yields the GameRecords stored in a buffer."""
+    if len(buffer) < _HEADER.size or _HEADER.unpack_from(buffer, 0) != (_MAGIC, _VERSION):
+        raise ValueError("not a game records file")
+    names = {}
+    offset = _HEADER.size
+    end = len(buffer)
+    unpack_game = _GAME.unpack_from
+    while offset < end:
+        entry = offset
+        tag = buffer[offset]
+        offset += 1
+        if tag == _GAME_TAG:
+            if offset + _GAME.size > end:
+                raise _corrupted(entry)
+            width, height, win_length, first_id, second_id, flags, num_moves, seed = \
+                unpack_game(buffer, offset)
+            offset += _GAME.size
+            if offset + num_moves > end or first_id not in names or second_id not in names:
+                raise _corrupted(entry)
+            cells = bytes(buffer[offset:offset + num_moves])
+            offset += num_moves
+            yield GameRecord(names[first_id], names[second_id], cells, flags & _RESULT_MASK,
+                             'o' if flags & _FIRST_PIECE_O else 'x',
+                             seed if flags & _HAS_SEED else None, width, height, win_length)
+        elif tag == _PLAYER_TAG:
+            if offset + _PLAYER.size > end:
+                raise _corrupted(entry)
+            player_id, length = _PLAYER.unpack_from(buffer, offset)
+            offset += _PLAYER.size
+            if offset + length > end:
+                raise _corrupted(entry)
+            try:
+                names[player_id] = bytes(buffer[offset:offset + length]).decode('utf-8')
+            except UnicodeDecodeError:
+                raise _corrupted(entry) from None
+            offset += length
+        else:
+            raise _corrupted(entry)
+
+# ----------------------------------------------------------------------------------------
+def _corrupted(offset):
+    """Returns the error raised for a corrupted (or truncated) file,
+        at the entry starting at offset."""
+    return ValueError("corrupted game records file at offset %d" % offset)
@@ -12,13 +12,39 @@
     During games the values of the intermediates position are calibrated
     using the standard reinforcement learning formula:
         V(s) = V(s) + alpha * [ V(s') - V(s) ]
+    If the symmetric option is enabled, the values are stored for the
+    canonical board (see Board.get_canonical_index()) instead of the
+    Zobrist hash, so all the boards that are equivalent by rotation or
+    reflection share the same value and are learned together.
+    The values are kept in a dictionary, or in an ArrayValueStore
+    (see valuestore module) given as init_values: in this case the
+    key is the board state index (see Board.get_state_index()).
+    With the td_lambda option the values are not updated during the
+    game: the positions reached by the moves of the player are
+    recorded, and at the end of the game learn_from_game() backs up
+    the final reward (1 win, 0.5 draw, 0 defeat) along the whole game
+    with the TD(lambda) rule, going backward from the last position:
+        G(t) = (1 - lambda) * V(s(t+1)) + lambda * G(t+1)
+        V(s(t)) = V(s(t)) + alpha * [ G(t) - V(s(t)) ]
+    (lambda = 1 is the Monte Carlo backup, lambda = 0 the one step
+    backup). The backup is not propagated through the exploring moves:
+    the target of the position before an exploring move is the value
+    of the best move. The games can be stored in a ReplayBuffer (see
+    replaybuffer module), to be learned again later.
+    The moves considered, the values updated, the exploring moves and
+    the learning at the end of the games are passed to the tracer (see
+    tracing module).
     This class is derived from the Player base class
 """
 __all__ = ['LearnerPlayer']
 
 from random import shuffle, seed, random
+import time
 
 from .player import Player
+from .searchstats import SearchStats
+from .tracing import MOVE_CONSIDERED, VALUE_UPDATED, EXPLORING_MOVE, \
+    LEARNED_FROM_DEFEAT, LEARNED_FROM_GAME
 
 class LearnerPlayer(Player):
     """A Tic Tac Toe learner automatic player."""
@@ -27,20 +53,45 @@ class LearnerPlayer(Player):
     # pylint: disable=too-many-arguments
     #   --- Currently we need all these parameters, and we do not want
     #   to break backward compatibility
-    def __init__(self, piece, board, init_values=None, alpha=0.1, eps=0.0, verbosity=0):
+    def __init__(self, piece, board, init_values=None, alpha=0.1, eps=0.0, verbosity=0,
+                 symmetric=False, stats_callback=None, td_lambda=None, replay_buffer=None,
+                 replay_batch=8, tracer=None):
         """LearnerPlayer class constructor. Save the given piece,
-            the alpha value and initializes Value vector."""
-        Player.__init__(self, piece, verbosity)
+            the alpha value and initializes Value vector.
+            stats_callback is called with the SearchStats of every move
+            (the nodes are the positions evaluated, the cache is the
+            values vector).
+            td_lambda (between 0 and 1) enables the learning at the
+            end of the game (None for the one step update at every
+            move). In this mode, every game is added to replay_buffer
+            (a ReplayBuffer, if given), and replay_batch random past
+            games of the buffer are learned again at the end of every
+            game.
+            tracer receives the events of the player (see tracing
+            module)."""
+        Player.__init__(self, piece, verbosity, stats_callback, tracer)
         self.__alpha = alpha
         self.__eps = eps
-        self.values = init_values or {}
+        self.__symmetric = symmetric
+        self.values = init_values if init_values is not None else {}
+        self.__state_keys = getattr(self.values, 'indexed_by_state', False)
         self.__best_value = -1000
         self.__best_x = None
         self.__best_y = None
         self.__best_zhash = -1
         self.__exploring_move_done = False
+        self.__nodes = 0
+        self.__cache_hits = 0
+        self.__cache_misses = 0
+        self.__td_lambda = td_lambda
+        self.__replay_buffer = replay_buffer
+        self.__replay_batch = replay_batch
+        # the (key, best value if exploring move else None) of the
+        # positions reached by the moves of the current game
+        self.__trajectory = []
+        self.__empty_cells = None
         seed()
-        zhash, score = board.evaluate(self.piece)
+        zhash, score = self.__evaluate(board)
         if not zhash in self.values:
             if score > 0:
                 # winning board...
@@ -57,7 +108,15 @@ class LearnerPlayer(Player):
     # --------------------------------------------------------------
     def move(self, board):
         """Do a move using reinforcement learning algo"""
-        return self.__find_rl_move(board)
+        start_time = time.perf_counter()
+        self.__nodes = 0
+        self.__cache_hits = 0
+        self.__cache_misses = 0
+        move = self.__find_rl_move(board)
+        self.report_stats(SearchStats(type(self).__name__, self.__nodes, 0,
+                                      1 if self.__nodes else 0, self.__cache_hits,
+                                      self.__cache_misses, time.perf_counter() - start_time))
+        return move
 
     # --------------------------------------------------------------
     def exploring_move_flag(self):
@@ -71,21 +130,83 @@ class LearnerPlayer(Player):
     # --------------------------------------------------------------
     def learn_from_defeat(self, board):
         """Updates the value vector given a final lost position"""
-        ###zhash = board.get_zhash()
-        zhash, score = board.evaluate(self.piece) # score should be negative...
+        if self.__td_lambda is not None:
+            self.learn_from_game(board)
+            return
+        zhash, score = self.__evaluate(board) # score should be negative...
         if score < 0:            # so this check is useless...
             # defeat...
             self.values[zhash] = 0.0
             self.values[self.__last_zhash] += \
             self.__alpha * (self.values[zhash] - \
                             self.values[self.__last_zhash])
-            self.log_info("LEARNED FROM DEFEAT... new value for last position: ",
-                          self.values[self.__last_zhash])
+            if self.tracer is not None:
+                self.tracer(LEARNED_FROM_DEFEAT, self, self.__last_zhash,
+                            self.values[self.__last_zhash])
+
+    # --------------------------------------------------------------
+    def learn_from_game(self, board):
+        """Updates the value vector given the final position of a game
+            (won, drawn or lost). With td_lambda the whole game is
+            learned, and added to the replay buffer; otherwise only
+            the defeats are learned (see learn_from_defeat())."""
+        _, score = board.evaluate(self.piece)
+        if self.__td_lambda is None:
+            if score < 0:
+                self.learn_from_defeat(board)
+            return
+        trajectory = self.__trajectory
+        self.__trajectory = []
+        self.__empty_cells = None
+        if not trajectory:
+            return
+        reward = 1.0 if score > 0 else 0.0 if score < 0 else 0.5
+        self.__backup(trajectory, reward)
+        if self.__replay_buffer is not None:
+            for past_trajectory, past_reward in \
+                    self.__replay_buffer.sample(self.__replay_batch):
+                self.__backup(past_trajectory, past_reward)
+            self.__replay_buffer.add(trajectory, reward)
+        if self.tracer is not None:
+            self.tracer(LEARNED_FROM_GAME, self, reward, len(trajectory))
+
+    # --------------------------------------------------------------
+    def __backup(self, trajectory, reward):
+        """TD(lambda) backup of the reward of a game along its
+            trajectory, from the last position to the first one."""
+        values = self.values
+        alpha = self.__alpha
+        td_lambda = self.__td_lambda
+        tracer = self.tracer
+        target = reward
+        for key, best_value in reversed(trajectory):
+            old_value = values.get(key, 0.5)
+            value = old_value + alpha * (target - old_value)
+            values[key] = value
+            if tracer is not None:
+                tracer(VALUE_UPDATED, self, key, old_value, value)
+            if best_value is not None:
+                # exploring move: the previous position is backed up
+                # with the value of the best move, not of this one
+                target = best_value
+            else:
+                target = (1.0 - td_lambda) * value + td_lambda * target
+
+    # --------------------------------------------------------------
+    def __evaluate(self, board):
+        """Returns the key of the current board in the values
+            vector, and the score of the board"""
+        zhash, score = board.evaluate(self.piece)
+        if self.__symmetric:
+            zhash, _ = board.get_canonical_index()
+        elif self.__state_keys:
+            zhash = board.get_state_index()
+        return zhash, score
 
     # --------------------------------------------------------------
     def __find_rl_move(self, board):
         """Find a move that is considered the best depending on current knowledge"""
-        zhash, value = board.evaluate(self.piece)
+        zhash, value = self.__evaluate(board)
         # value should be zero, otherwise the game is completed
         if value != 0:
             return None, None
@@ -93,10 +214,17 @@ class LearnerPlayer(Player):
         if not zhash in self.values:
             # the board status is not in values array:
             # this is the first time we encounter this position
-            self.log_info("new board status encounted: init to 0.5")
             self.values[zhash] = 0.5
+            self.__cache_misses += 1
+        else:
+            self.__cache_hits += 1
 
         move_list = board.valid_moves()
+        if self.__td_lambda is not None:
+            if self.__empty_cells is not None and len(move_list) >= self.__empty_cells:
+                # a new game was started without learn_from_game()
+                self.__trajectory = []
+            self.__empty_cells = len(move_list)
         # interestingly, if we shuffle the possible moves before to select them,
         # the learning playing against a minimax player is slower
         shuffle(move_list)  # to add some variability to the play (...maybe)
@@ -112,26 +240,53 @@ class LearnerPlayer(Player):
                 if self.__analyze_move(move, board):
                     # winning move found
                     break
+            if self.__td_lambda is not None:
+                self.__trajectory.append((self.__best_zhash, None))
+                return self.__best_x, self.__best_y
 
             # move selected... updates current zhash
+            old_value = self.values[zhash]
             self.values[zhash] += \
                 self.__alpha * (self.values[self.__best_zhash] - \
                                 self.values[zhash])
+            old_last_value = self.values[self.__last_zhash]
             self.values[self.__last_zhash] += \
                 self.__alpha * (self.values[self.__best_zhash] - \
                                 self.values[self.__last_zhash])
-
-            self.log_info("Position value updated. New value = ", self.values[zhash])
+            if self.tracer is not None:
+                self.tracer(VALUE_UPDATED, self, zhash, old_value, self.values[zhash])
+                self.tracer(VALUE_UPDATED, self, self.__last_zhash, old_last_value,
+                            self.values[self.__last_zhash])
 
             self.__last_zhash = self.__best_zhash
             return self.__best_x, self.__best_y
 
         # if here we are doing an exploring move,
         # just returns the first of the (already shuffled) list
-        self.log_info(f"Doing exploring move. Selected move is {move_list[0]}")
+        if self.tracer is not None:
+            self.tracer(EXPLORING_MOVE, self, move_list[0])
         self.__exploring_move_done = True
+        if self.__td_lambda is not None:
+            # the value of the best move is the target of the backup
+            # of the previous position
+            self.__best_value = -1000
+            for move in move_list:
+                if self.__analyze_move(move, board):
+                    break
+            self.__trajectory.append((self.__afterstate(move_list[0], board)[0],
+                                      self.__best_value))
         return move_list[0]
 
+    # --------------------------------------------------------------
+    def __afterstate(self, move, board):
+        """Returns the key and the score of the board after the move"""
+        if self.__symmetric or self.__state_keys:
+            board.place_pawn(move[0], move[1], self.piece)
+            zhash, score = self.__evaluate(board)
+            board.remove_pawn(move[0], move[1])
+            return zhash, score
+        return board.analyze_move(move, self.piece)
+
     # --------------------------------------------------------------
     def __analyze_move(self, move, board):
         """Analyze the move "move" given the current "board" status
@@ -144,32 +299,30 @@ class LearnerPlayer(Player):
         # Note that it is impossible that the score is < 0: it is
         # impossible to enter in lost position when it is our turn
         # to move
-        zhash, score = board.analyze_move(move, self.piece)
-        self.log_info("evaluating move: ", board.convert_move_to_movestring(move),
-                      ", score = ", score, ", zhash = ", zhash)
+        zhash, score = self.__afterstate(move, board)
+        self.__nodes += 1
 
         if score > 0:
             # we win! choose this move
-            self.log_info("WINNING MOVE! Choose it")
             self.values[zhash] = 1.0
         else:
             # neutral move... if the hash is not in dictionary
             # this is the first time we encounter this move:
             # initialize value
-            self.log_info("NEUTRAL MOVE... analyzing it")
             if not zhash in self.values:
-                self.log_info("   - new board status encounted: init to 0.5")
                 self.values[zhash] = 0.5
+                self.__cache_misses += 1
             else:
-                self.log_info("   - I know this move... value = ", self.values[zhash])
+                self.__cache_hits += 1
+        value = self.values[zhash]
+        if self.tracer is not None:
+            self.tracer(MOVE_CONSIDERED, self, move, zhash, score, value)
 
         # It the value of the board after the move is better of values
         # seen until now, save the move data
-        if self.__best_value < self.values[zhash]:
+        if self.__best_value < value:
             self.__best_zhash = zhash
-            self.__best_value = self.values[zhash]
+            self.__best_value = value
             self.__best_x, self.__best_y = move
-            self.log_info("   - move is selected as the new best choice - value = ",
-                          self.__best_value)
 
         return score > 0
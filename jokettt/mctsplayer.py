@@ -0,0 +1,355 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Tic Tac Toe Monte Carlo Tree Search Player class definition
+# --------------------------------------------------------------------
+"""Implementation of the MCTS Player: a Player that chooses its moves
+    with Monte Carlo Tree Search. Every playout:
+      - selects a path in the tree from the root, choosing at every
+        node the child with the best UCT score
+            wins / visits + exploration * sqrt(ln(parent visits) / visits)
+        (the children never visited first)
+      - expands the leaf reached, adding all its moves as children
+        (only the winning move, if there is one)
+      - plays a rollout from the leaf until the end of the game,
+        with random moves ('random') or playing the winning moves and
+        blocking the opponent ones ('heuristic')
+      - backs up the result (1 win, 0.5 draw, 0 defeat, for the player
+        that did the move of every node) along the path
+    The move played is the most visited child of the root.
+    The search is stopped after the given number of playouts or when
+    the time limit is reached (the first that happens), so the player
+    gives a move in a fixed time also on large boards, where the full
+    minimax search is not feasible. On those boards only the moves
+    adjacent to the pawns already placed are considered.
+    The nodes of the tree are stored in flat arrays (move, first
+    child, number of children, visits, wins), preallocated for
+    max_nodes nodes; the children of a node are contiguous. When the
+    arrays are full the leaves are not expanded anymore.
+    The tree is reused between the moves of a game: when the position
+    is the one reached by the last move of the player plus a move of
+    the opponent, the subtree of that position is kept (copied at the
+    beginning of a second set of arrays) as the new tree.
+    The SearchStats of every move report the playouts as nodes, the
+    maximum depth reached in the tree as max_depth, and the reuse of
+    the tree as cache lookup: cache_hits is 1 if the tree was reused,
+    cache_misses is 1 if a new tree was built.
+"""
+__all__ = ['MCTSPlayer']
+
+from array import array
+import math
+import random
+import time
+
+from .player import Player
+from .searchstats import SearchStats
+from .tracing import MOVE_CONSIDERED
+
+_NOT_EXPANDED = -1
+_ROLLOUTS = ('random', 'heuristic')
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+# pylint: disable=too-many-instance-attributes
+class MCTSPlayer(Player):
+    """A Tic Tac Toe Monte Carlo Tree Search automatic player."""
+
+    DEFAULT_PLAYOUTS = 1000
+    DEFAULT_MAX_NODES = 100000
+
+    # ----------------------------------------------------------------------------------------
+    # pylint: disable=too-many-arguments
+    def __init__(self, piece, playouts=DEFAULT_PLAYOUTS, time_limit=None,
+                 exploration=math.sqrt(2), rollout='random', max_nodes=DEFAULT_MAX_NODES,
+                 reuse_tree=True, verbosity=0, stats_callback=None, tracer=None):
+        """MCTSPlayer class constructor.
+            playouts is the number of playouts of every move, time_limit
+            the time (in seconds) given to every move: the search stops
+            at the first limit reached (None to disable a limit, but
+            at least one shall be set).
+            exploration is the constant of the UCT score, rollout the
+            policy of the rollouts ('random' or 'heuristic').
+            max_nodes is the number of nodes of the preallocated tree.
+            reuse_tree keeps the subtree of the position reached
+            between consecutive moves."""
+        Player.__init__(self, piece, verbosity, stats_callback, tracer)
+        if playouts is None and time_limit is None:
+            raise ValueError("a playouts or time limit shall be given")
+        if rollout not in _ROLLOUTS:
+            raise ValueError("unknown rollout policy: %s" % rollout)
+        if max_nodes < 2:
+            raise ValueError("max_nodes shall be at least 2")
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.exploration = exploration
+        self.reuse_tree = reuse_tree
+        self.__heuristic = rollout == 'heuristic'
+        self.__max_nodes = max_nodes
+        # two sets of arrays: the tree kept between moves is copied
+        # from one set to the other
+        self.__arrays = [self.__new_arrays(max_nodes), self.__new_arrays(max_nodes)]
+        self.__num_nodes = 0
+        # zobrist hash of the position of the root (None if the tree is empty)
+        self.__root_zhash = None
+    # pylint: enable=too-many-arguments
+
+    # ----------------------------------------------------------------------------------------
+    @property
+    def tree_size(self):
+        """Number of nodes in the tree"""
+        return self.__num_nodes
+
+    # ----------------------------------------------------------------------------------------
+    @property
+    def root_visits(self):
+        """Number of playouts through the root of the tree"""
+        return self.__arrays[0][3][0] if self.__num_nodes else 0
+
+    # ----------------------------------------------------------------------------------------
+    def reset_tree(self):
+        """Discard the tree (e.g. at the end of a game)."""
+        self.__num_nodes = 0
+        self.__root_zhash = None
+
+    # ----------------------------------------------------------------------------------------
+    def move(self, board):
+        """Do a move, searching the tree from the current position"""
+        start_time = time.perf_counter()
+        if board.is_full() or board.evaluate(self.piece)[1] != 0:
+            return None, None
+        if board.width * board.height >= self.__max_nodes:
+            raise ValueError("max_nodes is too small for the board")
+        reused = self.reuse_tree and self.__find_root(board)
+        if reused and self.__arrays[0][1][0] == _NOT_EXPANDED:
+            # the root may not fit in the arrays: start again
+            reused = False
+        if not reused:
+            self.__new_tree()
+        playouts, max_depth = self.__search(board, start_time)
+        cells, first_child, num_children, visits, wins = self.__arrays[0]
+        first = first_child[0]
+        best = max(range(first, first + num_children[0]), key=visits.__getitem__)
+        best_move = divmod(cells[best], board.width)
+        if self.tracer is not None:
+            for child in range(first, first + num_children[0]):
+                move = divmod(cells[child], board.width)
+                zhash, score = board.analyze_move(move, self.piece)
+                self.tracer(MOVE_CONSIDERED, self, move, zhash, score,
+                            wins[child] / visits[child] if visits[child] else 0.5)
+        if self.reuse_tree:
+            self.__root_zhash = board.analyze_move(best_move, self.piece)[0]
+            self.__set_root(best)
+        # playouts as nodes, tree reuse as cache lookup (see the module docstring)
+        self.report_stats(SearchStats(type(self).__name__, playouts, 0, max_depth,
+                                      int(reused), int(not reused),
+                                      time.perf_counter() - start_time))
+        return best_move
+
+    # ----------------------------------------------------------------------------------------
+    @staticmethod
+    def __new_arrays(max_nodes):
+        """Returns the preallocated arrays of the nodes: move (cell),
+            first child, number of children, visits, wins."""
+        return (array('i', [0]) * max_nodes, array('i', [_NOT_EXPANDED]) * max_nodes,
+                array('i', [0]) * max_nodes, array('i', [0]) * max_nodes,
+                array('d', [0.0]) * max_nodes)
+
+    # ----------------------------------------------------------------------------------------
+    def __new_tree(self):
+        """Start a new tree, with only the root."""
+        cells, first_child, num_children, visits, wins = self.__arrays[0]
+        cells[0] = -1
+        first_child[0] = _NOT_EXPANDED
+        num_children[0] = 0
+        visits[0] = 0
+        wins[0] = 0.0
+        self.__num_nodes = 1
+
+    # ----------------------------------------------------------------------------------------
+    def __find_root(self, board):
+        """Move the root of the tree to the current position, if it is
+            the one reached by the last move plus a move of the
+            opponent. Returns True if the tree is reused."""
+        if self.__root_zhash is None or not self.__num_nodes:
+            return False
+        # the position after the last move (the opponent did not move
+        # yet) is not reused: its children are moves of the opponent
+        cells, first_child, num_children, _, _ = self.__arrays[0]
+        first = first_child[0]
+        if first == _NOT_EXPANDED:
+            return False
+        width = board.width
+        for child in range(first, first + num_children[0]):
+            _x, _y = divmod(cells[child], width)
+            if board.pos_is_empty(_x, _y):
+                continue
+            piece = board.remove_pawn(_x, _y)
+            found = piece == self.other_piece and board.get_zhash() == self.__root_zhash
+            board.place_pawn(_x, _y, piece)
+            if found:
+                self.__set_root(child)
+                return True
+        return False
+
+    # ----------------------------------------------------------------------------------------
+    def __set_root(self, node):
+        """Make node the root of the tree, copying its subtree at the
+            beginning of the other set of arrays."""
+        src_cells, src_first, src_num, src_visits, src_wins = self.__arrays[0]
+        dst_cells, dst_first, dst_num, dst_visits, dst_wins = self.__arrays[1]
+        dst_cells[0] = -1
+        dst_visits[0] = src_visits[node]
+        dst_wins[0] = src_wins[node]
+        # (source node, destination node) still to be copied
+        pending = [(node, 0)]
+        num_nodes = 1
+        while pending:
+            src, dst = pending.pop()
+            first = src_first[src]
+            dst_num[dst] = src_num[src]
+            if first == _NOT_EXPANDED:
+                dst_first[dst] = _NOT_EXPANDED
+                continue
+            dst_first[dst] = num_nodes
+            for child in range(first, first + src_num[src]):
+                dst_cells[num_nodes] = src_cells[child]
+                dst_visits[num_nodes] = src_visits[child]
+                dst_wins[num_nodes] = src_wins[child]
+                pending.append((child, num_nodes))
+                num_nodes += 1
+        self.__arrays.reverse()
+        self.__num_nodes = num_nodes
+
+    # ----------------------------------------------------------------------------------------
+    # pylint: disable=too-many-locals,too-many-branches,too-many-statements
+    def __search(self, board, start_time):
+        """Do the playouts from the current position. Returns the number
+            of playouts and the maximum depth reached in the tree."""
+        cells, first_child, num_children, visits, wins = self.__arrays[0]
+        max_nodes = self.__max_nodes
+        exploration = self.exploration
+        log = math.log
+        sqrt = math.sqrt
+        width = board.width
+        near = not board.is_standard()
+        pieces = (self.piece, self.other_piece)
+        playouts = self.playouts
+        deadline = start_time + self.time_limit if self.time_limit is not None else None
+        snapshot = board.snapshot()
+        num_playouts = 0
+        max_depth = 0
+        # at least one playout, to expand the root
+        while not num_playouts or (playouts is None or num_playouts < playouts) and \
+                (deadline is None or time.perf_counter() < deadline):
+            # selection: the pieces alternate from the player one
+            node = 0
+            path = [0]
+            score = 0
+            full = False
+            while first_child[node] != _NOT_EXPANDED and num_children[node] and \
+                    score == 0 and not full:
+                first = first_child[node]
+                parent_log = log(visits[node]) if visits[node] else 0.0
+                best = -1
+                best_score = -1.0
+                for child in range(first, first + num_children[node]):
+                    child_visits = visits[child]
+                    if not child_visits:
+                        best = child
+                        break
+                    uct = wins[child] / child_visits + \
+                        exploration * sqrt(parent_log / child_visits)
+                    if uct > best_score:
+                        best_score = uct
+                        best = child
+                node = best
+                _x, _y = divmod(cells[node], width)
+                _, score = board.place_pawn(_x, _y, pieces[(len(path) - 1) % 2])
+                full = board.is_full()
+                path.append(node)
+            depth = len(path) - 1
+            max_depth = max(max_depth, depth)
+
+            # expansion: a winning move is the only child worth adding;
+            # the children are shuffled, to add variability to the
+            # choice among the moves never visited
+            if score == 0 and not full and first_child[node] == _NOT_EXPANDED:
+                moves = board.near_moves() if near else board.valid_moves()
+                piece = pieces[depth % 2]
+                for _x, _y in moves:
+                    if board.is_winning_move(_x, _y, piece):
+                        moves = [(_x, _y)]
+                        break
+                if self.__num_nodes + len(moves) <= max_nodes:
+                    random.shuffle(moves)
+                    first = self.__num_nodes
+                    for ndx, (_x, _y) in enumerate(moves):
+                        cells[first + ndx] = _x * width + _y
+                        first_child[first + ndx] = _NOT_EXPANDED
+                        num_children[first + ndx] = 0
+                        visits[first + ndx] = 0
+                        wins[first + ndx] = 0.0
+                    first_child[node] = first
+                    num_children[node] = len(moves)
+                    self.__num_nodes += len(moves)
+
+            # rollout: reward of the player, 1 win, 0.5 draw, 0 defeat
+            if score != 0:
+                # the last move of the path won
+                reward = 1.0 if depth % 2 == 1 else 0.0
+            elif full:
+                reward = 0.5
+            else:
+                reward = self.__rollout(board, depth)
+            board.restore(snapshot)
+
+            # backup: every node gets the reward of the player that
+            # did its move
+            for ndx in range(1, len(path)):
+                node = path[ndx]
+                visits[node] += 1
+                wins[node] += reward if ndx % 2 == 1 else 1.0 - reward
+            visits[0] += 1
+            num_playouts += 1
+        return num_playouts, max_depth
+    # pylint: enable=too-many-locals,too-many-branches,too-many-statements
+
+    # ----------------------------------------------------------------------------------------
+    def __rollout(self, board, depth):
+        """Play the game until the end, starting from the position at
+            the given depth in the tree. Returns the reward of the
+            player (1 win, 0.5 draw, 0 defeat)."""
+        pieces = (self.piece, self.other_piece)
+        moves = board.valid_moves()
+        random.shuffle(moves)
+        heuristic = self.__heuristic
+        ply = depth
+        while moves:
+            piece = pieces[ply % 2]
+            move = moves.pop()
+            if heuristic:
+                move = self.__heuristic_move(board, moves, move, piece, pieces[1 - ply % 2])
+            _, score = board.place_pawn(move[0], move[1], piece)
+            if score != 0:
+                return 1.0 if ply % 2 == 0 else 0.0
+            ply += 1
+        return 0.5
+
+    # ----------------------------------------------------------------------------------------
+    @staticmethod
+    def __heuristic_move(board, moves, move, piece, other_piece):
+        """Returns the move of the heuristic rollout policy: a winning
+            move, else a move that blocks a win of the opponent, else
+            the random move given. The move returned is removed from
+            moves (move is put back if not returned)."""
+        for target in (piece, other_piece):
+            if board.is_winning_move(move[0], move[1], target):
+                return move
+            for ndx, candidate in enumerate(moves):
+                if board.is_winning_move(candidate[0], candidate[1], target):
+                    moves[ndx] = move
+                    return candidate
+        return move
+# pylint: enable=too-many-instance-attributes
@@ -11,6 +11,11 @@
 # Minimax algo applied to TicTacToe game
 #  - with alpha-beta-pruning
 #  - with (Zobrist) hash evaluation function
+#  - with a transposition table keyed by the Zobrist hash
+#  - with optional depth limit and heuristic evaluation for large boards
+#  - with move ordering heuristics (hash move, wins, blocks, killer
+#    moves, history) to cut as many moves as possible
+#  - with pluggable search engines: minimax, negamax, PVS, MTD(f)
 # --------------------------------------------------------------------
 
 """Implementation of the Minimax Player:
@@ -18,25 +23,35 @@
     This class is derived from the Player base class
     This player has a "dumb" mode that can be activated at any step:
     in this mode, a random move is chosen
+    The positions already searched are kept in a transposition table
+    that persists across moves and games played by the same instance.
+    With the symmetric option the transposition table is keyed by the
+    canonical board, so the positions equivalent by rotation or
+    reflection share the same entry.
+    If a perfect-play tablebase is given, moves are looked up in it
+    instead of being searched.
+    On boards larger than the standard 3x3 one the full search is not
+    feasible: a depth limit can be set, and the positions where the
+    search is stopped are scored by a heuristic evaluation of the lines
+    partially filled. On those boards only the moves adjacent to the
+    pawns already placed are considered.
+    The moves are searched in the order given by a MoveOrdering object
+    (see moveordering module). To add some variability to the play,
+    a random move is chosen among the best ones with the same score.
+    The search algorithm is implemented by a search engine (see the
+    searchengines module) selected in the constructor.
 """
 __all__ = ['MinimaxPlayer']
 
-from copy import deepcopy
 import random
+import time
 
+from .moveordering import MoveOrdering
 from .player import Player
-
-# ----------------------------------------------------------------------------------------
-# ----------------------------------------------------------------------------------------
-# pylint: disable=too-few-public-methods
-class MinimaxParameters:
-    """Parameters for a minimax algorithm with alpha-beta pruning."""
-    def __init__(self, depth=0, is_maximizer=True, alpha=-1000, beta=1000):
-        self.depth = depth
-        self.is_maximizer = is_maximizer
-        self.alpha = alpha
-        self.beta = beta
-# pylint: enable=too-few-public-methods
+from .searchengines import create_engine
+from .searchstats import SearchStats
+from .tablebase import Tablebase
+from .transpositiontable import TranspositionTable
 
 # ----------------------------------------------------------------------------------------
 # ----------------------------------------------------------------------------------------
@@ -44,11 +59,57 @@ class MinimaxPlayer(Player):
     """A Tic Tac Toe minimax automatic player."""
 
     # ----------------------------------------------------------------------------------------
-    def __init__(self, piece, dumb_mode=False, verbosity=0):
+    # pylint: disable=too-many-arguments
+    def __init__(self, piece, dumb_mode=False, verbosity=0,
+                 tt_size=TranspositionTable.DEFAULT_MAX_ENTRIES, tablebase=None,
+                 symmetric=False, max_depth=None, move_ordering=True, stats_callback=None,
+                 engine='minimax'):
         """MinimaxPlayer class constructor. Save the given piece,
-            and enable dumb mode is requested."""
-        Player.__init__(self, piece, verbosity)
+            and enable dumb mode is requested.
+            tt_size is the maximum number of positions kept in the
+            transposition table (0 or None disables the table).
+            tablebase is a Tablebase object, or the path of a tablebase
+            file, used to choose the moves without searching.
+            symmetric enables the canonical (symmetry invariant)
+            keys in the transposition table.
+            max_depth is the maximum number of plies searched (None
+            to search until the end of the game).
+            move_ordering is the MoveOrdering object used to sort the
+            moves (True for the default one, None to search the moves
+            in board order).
+            stats_callback is called with the SearchStats of every move.
+            engine is the search engine: 'minimax', 'negamax', 'pvs',
+            'mtdf' (see searchengines module) or a SearchEngine class."""
+        Player.__init__(self, piece, verbosity, stats_callback)
         self.set_dumb_mode(dumb_mode)
+        self.__ttable = TranspositionTable(tt_size) if tt_size else None
+        if move_ordering is True:
+            move_ordering = MoveOrdering()
+        self.__engine = create_engine(engine, ttable=self.__ttable,
+                                      move_ordering=move_ordering or None,
+                                      max_depth=max_depth, symmetric=symmetric)
+        if isinstance(tablebase, str):
+            tablebase = Tablebase(tablebase)
+        self.__tablebase = tablebase
+    # pylint: enable=too-many-arguments
+
+    # ----------------------------------------------------------------------------------------
+    @property
+    def transposition_table(self):
+        """The transposition table used by the player (None if disabled)"""
+        return self.__ttable
+
+    # ----------------------------------------------------------------------------------------
+    @property
+    def nodes_searched(self):
+        """Number of positions visited by the search of the last move"""
+        return self.__engine.nodes
+
+    # ----------------------------------------------------------------------------------------
+    @property
+    def engine(self):
+        """The search engine used by the player"""
+        return self.__engine
 
     # ----------------------------------------------------------------------------------------
     def set_dumb_mode(self, dumb_mode):
@@ -58,9 +119,43 @@ class MinimaxPlayer(Player):
     # ----------------------------------------------------------------------------------------
     def move(self, board):
         """Do a move using currently selected mode (dumb or minimax)"""
+        start_time = time.perf_counter()
+        engine = self.__engine
+        engine.nodes = 0
+        engine.cutoffs = 0
+        engine.depth_reached = 0
+        ttable = self.__ttable
+        hits, misses = (ttable.hits, ttable.misses) if ttable is not None else (0, 0)
         if self.__dumb_mode:
-            return self.__move_dumb(board)
-        return self.__move_smart(board)
+            move = self.__move_dumb(board)
+        elif self.__tablebase is not None:
+            move = self.__move_tablebase(board)
+        else:
+            move = self.__move_smart(board)
+        if ttable is not None:
+            hits = ttable.hits - hits
+            misses = ttable.misses - misses
+        self.report_stats(SearchStats(type(self).__name__, engine.nodes, engine.cutoffs,
+                                      engine.depth_reached, hits, misses,
+                                      time.perf_counter() - start_time))
+        return move
+
+    # ----------------------------------------------------------------------------------------
+    def __move_tablebase(self, board):
+        """Do a perfect move looking up the position in the tablebase.
+            A random move is chosen among the equally optimal ones."""
+        try:
+            entry = self.__tablebase.probe(board, self.piece)
+        except ValueError:
+            # not the turn of the player: the tablebase cannot be used
+            entry = None
+        if entry is None:
+            # position not reachable in a legal game: search it
+            return self.__move_smart(board)
+        moves = entry[2]
+        if not moves:
+            return None, None
+        return random.choice(moves)
 
     # ----------------------------------------------------------------------------------------
     def __move_smart(self, board):
@@ -68,57 +163,16 @@ class MinimaxPlayer(Player):
             performs a random move using dumb mode"""
         if board.is_empty():
             return self.__move_dumb(board)
-        if board.only_one_piece_present():
+        if board.only_one_piece_present() and board.is_standard():
             return self.__do_smart_first_move_as_second(board)
+        if board.is_full() or board.evaluate(self.piece)[1] != 0:
+            # the game is already ended
+            return None, None
 
-        _, best_x, best_y = self.__find_move_minimax(board, MinimaxParameters(0, True, -1000, 1000))
-        return best_x, best_y
-
-    # ----------------------------------------------------------------------------------------
-    def __find_move_minimax(self, board, mm_par):
-        """Find the best move (or one of the best) using the minimax algo"""
-        best_x = None
-        best_y = None
-        _, val = board.evaluate(self.piece)
-        if val != 0 or board.is_full():
-            # evaluate function returns a positive value
-            # if maximizer win, a negative value otherwise
-            if val > 0:
-                return val - mm_par.depth, best_x, best_y
-            return val + mm_par.depth, best_x, best_y
-
-        move_list = board.valid_moves()
-        random.shuffle(move_list)  # to add some variability to the play (...maybe)
-        if mm_par.is_maximizer:
-            best_score = -1000
-            for move in move_list:
-                simul_board = deepcopy(board)
-                simul_board.place_pawn(move[0], move[1], self.piece)
-                score, _, _ = self.__find_move_minimax(simul_board, \
-                       MinimaxParameters(mm_par.depth+1, False, mm_par.alpha, mm_par.beta))
-                if score > best_score:
-                    best_score = score
-                    best_x = move[0]
-                    best_y = move[1]
-                mm_par.alpha = max(mm_par.alpha, best_score)
-                if mm_par.beta <= mm_par.alpha:
-                    break
-        else:
-            best_score = 1000
-            for move in move_list:
-                simul_board = deepcopy(board)
-                simul_board.place_pawn(move[0], move[1], self.other_piece)
-                score, _, _ = self.__find_move_minimax(simul_board, \
-                       MinimaxParameters(mm_par.depth+1, True, mm_par.alpha, mm_par.beta))
-                if score < best_score:
-                    best_score = score
-                    best_x = move[0]
-                    best_y = move[1]
-                mm_par.beta = min(mm_par.beta, best_score)
-                if mm_par.beta <= mm_par.alpha:
-                    break
-
-        return best_score, best_x, best_y
+        _, best_moves = self.__engine.search(board, self.piece, self.other_piece)
+        # sorted, so that the choice depends only on the random seed
+        # (and not on the move ordering, that depends on past searches)
+        return random.choice(sorted(best_moves))
 
     # ----------------------------------------------------------------------------------------
     @staticmethod
@@ -127,8 +181,8 @@ class MinimaxPlayer(Player):
         if board.is_full():
             return None, None
         while True:
-            _x = random.randint(0, 2)
-            _y = random.randint(0, 2)
+            _x = random.randint(0, board.height - 1)
+            _y = random.randint(0, board.width - 1)
             if board.pos_is_empty(_x, _y):
                 return _x, _y
 
@@ -0,0 +1,77 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Move ordering heuristics for the search based players
+# --------------------------------------------------------------------
+"""Implementation of the MoveOrdering class: it sorts the moves to be
+    searched so that the best ones come first, and the alpha-beta
+    search can cut the other ones as soon as possible. The moves are
+    sorted by:
+      - the best move stored in the transposition table (hash move)
+      - the moves that win immediately
+      - the moves that block an immediate win of the opponent
+      - the killer moves: the moves that caused a cutoff in another
+        position at the same depth of the search
+      - the history score: how many cutoffs the move caused so far,
+        weighted by the remaining depth of the search
+      - the number of winning lines through the position (center
+        first, then corners, then edges on the 3x3 board)
+    Other orderings can be plugged in the players deriving from this
+    class and overriding the order_moves() method.
+"""
+__all__ = ['MoveOrdering']
+
+# number of killer moves kept for every depth
+_NUM_KILLERS = 2
+
+class MoveOrdering:
+    """Heuristic move ordering for alpha-beta searches."""
+
+    # ------------------------------------------------------
+    def __init__(self, use_killers=True, use_history=True):
+        """MoveOrdering class constructor. The killer moves and the
+            history heuristics can be disabled."""
+        self.use_killers = use_killers
+        self.use_history = use_history
+        self.__killers = {}
+        self.__history = {}
+
+    # ------------------------------------------------------
+    def new_search(self):
+        """Called at the beginning of every search: the killer moves
+            refer to the depth, so they are forgotten, and the history
+            scores are halved to give more weight to the new ones."""
+        self.__killers.clear()
+        for move in self.__history:
+            self.__history[move] //= 2
+
+    # ------------------------------------------------------
+    # pylint: disable=too-many-arguments
+    def order_moves(self, board, moves, piece, other_piece, depth, hash_move=None):
+        """Returns the given moves of piece sorted from the most to
+            the least promising."""
+        killers = self.__killers.get(depth, ()) if self.use_killers else ()
+        history = self.__history if self.use_history else {}
+
+        def move_key(move):
+            return (move == hash_move,
+                    board.is_winning_move(move[0], move[1], piece),
+                    board.is_winning_move(move[0], move[1], other_piece),
+                    move in killers,
+                    history.get(move, 0),
+                    board.count_lines_through(move[0], move[1]))
+        return sorted(moves, key=move_key, reverse=True)
+    # pylint: enable=too-many-arguments
+
+    # ------------------------------------------------------
+    def record_cutoff(self, move, depth, plies_left):
+        """Called when move caused a cutoff at the given depth of the
+            search, with plies_left plies still to be searched."""
+        if self.use_killers:
+            killers = self.__killers.setdefault(depth, [])
+            if move not in killers:
+                killers.insert(0, move)
+                del killers[_NUM_KILLERS:]
+        if self.use_history:
+            self.__history[move] = self.__history.get(move, 0) + plies_left * plies_left
@@ -0,0 +1,196 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Offline value learning from recorded games
+# --------------------------------------------------------------------
+"""Implementation of the OfflineTrainer class: learns the value table
+    of a LearnerPlayer from recorded games (e.g. read with
+    gamerecord.iter_records(), or any sequence of moves), without
+    playing them.
+    Every game is replayed on a Board to find the positions reached by
+    the moves of the learner piece (its trajectory) and the final
+    reward (1 win, 0.5 draw, 0 defeat). The trajectories are collected
+    in batches, and the values of a batch are updated with vectorized
+    NumPy operations:
+      - the TD(lambda) target of every position is computed from the
+        end of the games, with the values of before the batch
+            G(t) = (1 - lambda) * V(s(t+1)) + lambda * G(t+1)
+        (the target of the last position is the reward)
+      - the n occurrences of a position in the batch are applied as
+        n updates with step alpha toward their mean target:
+            V(s) = V(s) + (1 - (1 - alpha)^n) * [ mean G - V(s) ]
+    The recorded moves are all considered as moves of the policy (no
+    exploring moves). values() returns the dictionary to be given as
+    init_values to a LearnerPlayer (or to an ArrayValueStore, with the
+    'state' keys).
+"""
+__all__ = ['OfflineTrainer', 'replay_game']
+
+import numpy as np
+
+from .board import Board, DEFAULT_ZOBRIST_SEED
+
+_KEYS = ('zhash', 'state', 'canonical')
+DEFAULT_BATCH_SIZE = 10000
+
+# ----------------------------------------------------------------------------------------
+def replay_game(board, moves, piece, first_piece='x', key='zhash'):
+    """Replay the (x, y) moves of a game on board (reset before
+        starting), the first one played with first_piece. Returns the
+        list of the keys of the positions reached by the moves of
+        piece, and the reward of the game for piece (None if the game
+        is not finished). Raises ValueError for an illegal move."""
+    board.reset()
+    other_piece = 'o' if first_piece == 'x' else 'x'
+    pieces = (first_piece, other_piece)
+    trajectory = []
+    score = 0
+    ply = 0
+    for ply, (_x, _y) in enumerate(moves):
+        if score != 0 or not board.pos_is_empty(_x, _y):
+            raise ValueError("illegal move %d in the game: (%d, %d)" % (ply, _x, _y))
+        moving_piece = pieces[ply % 2]
+        zhash, score = board.place_pawn(_x, _y, moving_piece)
+        if moving_piece == piece:
+            if key == 'state':
+                zhash = board.get_state_index()
+            elif key == 'canonical':
+                zhash, _ = board.get_canonical_index()
+            trajectory.append(zhash)
+    if score == 0 and not board.is_full():
+        return trajectory, None
+    # the score is for the piece that did the last move
+    if score == 0:
+        reward = 0.5
+    else:
+        reward = 1.0 if pieces[ply % 2] == piece else 0.0
+    return trajectory, reward
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+class OfflineTrainer:
+    """Batch learning of a value table from recorded games."""
+
+    # ------------------------------------------------------
+    # pylint: disable=too-many-arguments
+    def __init__(self, piece='x', key='zhash', alpha=0.1, td_lambda=0.5, init_values=None,
+                 width=3, height=3, win_length=3, zobrist_seed=DEFAULT_ZOBRIST_SEED):
+        """OfflineTrainer class constructor. piece is the piece of the
+            learner, key the key of the value table ('zhash', 'state'
+            or 'canonical', as the values of a LearnerPlayer with the
+            default, ArrayValueStore or symmetric options), init_values
+            the initial value table. Games on other board sizes are
+            not learned."""
+        if key not in _KEYS:
+            raise ValueError("unknown key type: %s" % key)
+        self.piece = piece
+        self.key = key
+        self.alpha = alpha
+        self.td_lambda = td_lambda
+        self.num_games = 0
+        self.__board = Board('x', 'o', width=width, height=height, win_length=win_length,
+                             zobrist_seed=zobrist_seed)
+        init_values = init_values or {}
+        keys = np.fromiter(init_values.keys(), dtype=np.int64, count=len(init_values))
+        values = np.fromiter(init_values.values(), dtype=np.float64, count=len(init_values))
+        order = np.argsort(keys)
+        self.__keys = keys[order]
+        self.__values = values[order]
+    # pylint: enable=too-many-arguments
+
+    # ------------------------------------------------------
+    def __len__(self):
+        return self.__keys.size
+
+    # ------------------------------------------------------
+    def train(self, games, batch_size=DEFAULT_BATCH_SIZE):
+        """Learn from the given games: GameRecords, or sequences of
+            (x, y) moves (starting with 'x'). The unfinished games, the
+            games on other board sizes and the games without moves of
+            the learner are skipped. Returns the number of games
+            learned."""
+        board = self.__board
+        size = (board.width, board.height, board.win_length)
+        trajectories = []
+        rewards = []
+        learned = 0
+        for game in games:
+            if hasattr(game, 'moves'):
+                if (game.width, game.height, game.win_length) != size:
+                    continue
+                trajectory, reward = replay_game(board, game.moves(), self.piece,
+                                                 game.first_piece, self.key)
+            else:
+                trajectory, reward = replay_game(board, game, self.piece, key=self.key)
+            if reward is None or not trajectory:
+                continue
+            trajectories.append(trajectory)
+            rewards.append(reward)
+            if len(trajectories) == batch_size:
+                self.__learn_batch(trajectories, rewards)
+                learned += len(trajectories)
+                trajectories = []
+                rewards = []
+        if trajectories:
+            self.__learn_batch(trajectories, rewards)
+            learned += len(trajectories)
+        self.num_games += learned
+        return learned
+
+    # ------------------------------------------------------
+    def values(self):
+        """Returns the learned value table, as a dictionary."""
+        return dict(zip(self.__keys.tolist(), self.__values.tolist()))
+
+    # ------------------------------------------------------
+    def __lookup(self, keys):
+        """Returns the current values of the given keys (0.5 for the
+            positions not in the table)."""
+        if not self.__keys.size:
+            return np.full(keys.shape, 0.5)
+        pos = np.searchsorted(self.__keys, keys)
+        pos[pos == self.__keys.size] = 0
+        return np.where(self.__keys[pos] == keys, self.__values[pos], 0.5)
+
+    # ------------------------------------------------------
+    def __learn_batch(self, trajectories, rewards):
+        """Vectorized TD(lambda) update of the values of a batch of
+            trajectories."""
+        lengths = np.fromiter((len(trajectory) for trajectory in trajectories),
+                              dtype=np.int64, count=len(trajectories))
+        max_length = int(lengths.max())
+        keys = np.zeros((len(trajectories), max_length), dtype=np.int64)
+        for ndx, trajectory in enumerate(trajectories):
+            keys[ndx, :len(trajectory)] = trajectory
+        rewards = np.asarray(rewards, dtype=np.float64)
+        steps = np.arange(max_length)
+        valid = steps[None, :] < lengths[:, None]
+        values = self.__lookup(keys)
+
+        # targets, from the last position of the games
+        targets = np.zeros(keys.shape)
+        target = rewards.copy()
+        for step in range(max_length - 1, -1, -1):
+            last = lengths - 1 == step
+            if step + 1 < max_length:
+                target = (1.0 - self.td_lambda) * values[:, step + 1] + \
+                    self.td_lambda * target
+            target = np.where(last, rewards, target)
+            targets[:, step] = target
+
+        keys = keys[valid]
+        unique_keys, inverse, counts = np.unique(keys, return_inverse=True,
+                                                 return_counts=True)
+        mean_targets = np.bincount(inverse, weights=targets[valid]) / counts
+        old_values = self.__lookup(unique_keys)
+        new_values = old_values + (1.0 - (1.0 - self.alpha) ** counts) * \
+            (mean_targets - old_values)
+
+        # merge in the (sorted) table
+        merged_keys = np.union1d(self.__keys, unique_keys)
+        merged_values = np.full(merged_keys.shape, 0.5)
+        merged_values[np.searchsorted(merged_keys, self.__keys)] = self.__values
+        merged_values[np.searchsorted(merged_keys, unique_keys)] = new_values
+        self.__keys = merged_keys
+        self.__values = merged_values
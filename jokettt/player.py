@@ -10,17 +10,30 @@
     a generic player that has a piece and it is able to perform a move.
     This class shall not be used directly: it shall be used as a base
     class for real players
+    The automatic players describe the work done for every move with
+    a SearchStats object (see searchstats module), saved in last_stats
+    and passed to stats_callback, if set.
+    The events of the players (moves considered, values learned, ...)
+    are passed to the tracer, if set (see tracing module).
 """
 __all__ = ['Player']
 
 from abc import ABC, abstractmethod
 
+from .tracing import PrintTracer
+
 class Player(ABC):
     """A Tic Tac Toe player base class."""
-    def __init__(self, piece, verbosity=0):
-        """Player class constructor."""
+    def __init__(self, piece, verbosity=0, stats_callback=None, tracer=None):
+        """Player class constructor. If verbosity > 0 and no tracer
+            is given, the events are printed."""
         self.piece = piece
         self.__verbosity = verbosity
+        self.last_stats = None
+        self.stats_callback = stats_callback
+        if tracer is None and verbosity > 0:
+            tracer = PrintTracer()
+        self.tracer = tracer
         if piece == "x":
             self.other_piece = "o"
         else:
@@ -33,6 +46,12 @@ class Player(ABC):
         """Method to make a move. This is the base player,
             so this method is abstract."""
 
+    def report_stats(self, stats):
+        """save the stats of the last move, and pass them to the callback"""
+        self.last_stats = stats
+        if self.stats_callback is not None:
+            self.stats_callback(stats)
+
     def log_info(self, *args):
         """print a log line if verbosity > 0"""
         if self.__verbosity > 0:
@@ -0,0 +1,51 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Experience replay buffer used by the Learner Player
+# --------------------------------------------------------------------
+"""Implementation of the ReplayBuffer class: a bounded store of the
+    games played by a learner, kept to learn from them again.
+    Every game is stored as its trajectory (the sequence of the
+    positions reached by the moves of the learner, see LearnerPlayer)
+    and its final reward. When the buffer is full the oldest game is
+    dropped.
+"""
+__all__ = ['ReplayBuffer']
+
+from collections import deque
+import random
+
+class ReplayBuffer:
+    """A bounded buffer of past games."""
+
+    DEFAULT_MAX_GAMES = 500
+
+    # ------------------------------------------------------
+    def __init__(self, max_games=DEFAULT_MAX_GAMES):
+        """ReplayBuffer class constructor. max_games is the
+            maximum number of games kept in the buffer."""
+        if max_games <= 0:
+            raise ValueError("max_games shall be a positive number")
+        self.max_games = max_games
+        self.__games = deque(maxlen=max_games)
+
+    # ------------------------------------------------------
+    def __len__(self):
+        return len(self.__games)
+
+    # ------------------------------------------------------
+    def add(self, trajectory, reward):
+        """Add a game to the buffer."""
+        self.__games.append((tuple(trajectory), reward))
+
+    # ------------------------------------------------------
+    def sample(self, num_games):
+        """Returns a list of (trajectory, reward) of num_games games
+            randomly chosen (all the games if there are less)."""
+        return random.sample(self.__games, min(num_games, len(self.__games)))
+
+    # ------------------------------------------------------
+    def clear(self):
+        """Remove all the games."""
+        self.__games.clear()
@@ -0,0 +1,472 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Search engines used by the Minimax Player
+# --------------------------------------------------------------------
+"""Implementation of the search engines of the MinimaxPlayer: all the
+    engines find the best moves of a position with the same game
+    theoretic score, but they visit a different number of positions
+    to get it:
+      - MinimaxEngine: alpha-beta minimax, with separate maximizer
+        and minimizer branches
+      - NegamaxEngine: alpha-beta negamax (every position is scored
+        from the point of view of the player to move)
+      - PVSEngine: principal variation search: the first move of every
+        position is searched with the full window, the other ones with
+        a null window, and searched again only if they are better
+      - MTDfEngine: MTD(f): the score of the root is found with a
+        sequence of null window searches, using the transposition
+        table to avoid searching again the same positions
+    All the engines share the transposition table, the move ordering,
+    the depth limit (with heuristic evaluation of the positions where
+    the search stops) and the search statistics, and work on boards of
+    any size. The engines are selected by name (see ENGINES).
+    The scores are _WIN_SCORE minus the number of plies for a win,
+    the opposite for a loss, 0 for a draw, or the heuristic evaluation.
+"""
+__all__ = ['SearchEngine', 'MinimaxEngine', 'NegamaxEngine', 'PVSEngine', 'MTDfEngine',
+           'ENGINES', 'create_engine']
+
+from abc import ABC, abstractmethod
+
+from .transpositiontable import EXACT, LOWER_BOUND, UPPER_BOUND
+
+# score of a won position: it is greater than any heuristic evaluation.
+# The number of plies needed to win is subtracted, to prefer fast wins
+_WIN_SCORE = 1000000000
+_INFINITY = 2 * _WIN_SCORE
+# scores greater than this (in absolute value) are wins or losses
+_WIN_THRESHOLD = _WIN_SCORE // 2
+# draft stored in the transposition table for searches without depth limit
+_FULL_DEPTH = 1000000
+
+# ----------------------------------------------------------------------------------------
+def _terminal_score(val, depth):
+    """Returns the score of an ended game, given the evaluation
+        of the board (> 0 won, < 0 lost, 0 draw)."""
+    if val > 0:
+        return _WIN_SCORE - depth
+    if val < 0:
+        return -_WIN_SCORE + depth
+    return 0
+
+# ----------------------------------------------------------------------------------------
+def _score_to_tt(score, depth):
+    """Convert a win/loss score, that depends on the distance from the
+        root of the search, to a score relative to the current position"""
+    if score > _WIN_THRESHOLD:
+        return score + depth
+    if score < -_WIN_THRESHOLD:
+        return score - depth
+    return score
+
+# ----------------------------------------------------------------------------------------
+def _score_from_tt(score, depth):
+    """Convert a win/loss score stored in the transposition table back
+        to a score relative to the root of the search"""
+    if score > _WIN_THRESHOLD:
+        return score - depth
+    if score < -_WIN_THRESHOLD:
+        return score + depth
+    return score
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+class SearchEngine(ABC):
+    """Base class of the search engines."""
+
+    # ------------------------------------------------------
+    def __init__(self, ttable=None, move_ordering=None, max_depth=None, symmetric=False):
+        """SearchEngine class constructor.
+            ttable is the TranspositionTable (None to disable it),
+            move_ordering the MoveOrdering object (None to search the
+            moves in board order), max_depth the maximum number of
+            plies searched (None to search until the end of the game),
+            symmetric enables the canonical keys in the ttable."""
+        self.ttable = ttable
+        self.move_ordering = move_ordering
+        self.max_depth = max_depth
+        self.symmetric = symmetric
+        self.piece = None
+        self.other_piece = None
+        self.nodes = 0
+        self.cutoffs = 0
+        self.depth_reached = 0
+
+    # ------------------------------------------------------
+    def search(self, board, piece, other_piece):
+        """Search the position on board, with piece to move. Returns
+            the score of the position and the list of the best moves
+            (all the moves with the best score: none if the game is
+            already ended). The board is changed during the search,
+            but restored at the end."""
+        self.piece = piece
+        self.other_piece = other_piece
+        self.nodes = 0
+        self.cutoffs = 0
+        self.depth_reached = 0
+        _, val = board.evaluate(piece)
+        if val != 0 or board.is_full():
+            return _terminal_score(val, 0), []
+        if self.move_ordering is not None:
+            self.move_ordering.new_search()
+        return self._search_root(board)
+
+    # ------------------------------------------------------
+    def _search_root(self, board):
+        """Search the root position. The moves with the same score as
+            the best one are searched with a window that finds their
+            exact score, so all the best moves are found."""
+        self.nodes += 1
+        tt_key, sym, _, hash_move = self._probe(board, board.get_zhash(), True)
+        moves = self._ordered_moves(board, self.piece, self.other_piece, 0, hash_move)
+        best_score = -_INFINITY
+        best_moves = []
+        for move in moves:
+            board.place_pawn(move[0], move[1], self.piece)
+            score = self._search_child(board, best_score - 1, _INFINITY)
+            board.remove_pawn(move[0], move[1])
+            if score > best_score:
+                best_score = score
+                best_moves = [move]
+            elif score == best_score:
+                best_moves.append(move)
+        if best_moves:
+            self._store(board, tt_key, sym, best_score, 0, self._draft(0),
+                        -_INFINITY, _INFINITY, best_moves[0])
+        return best_score, best_moves
+
+    # ------------------------------------------------------
+    @abstractmethod
+    def _search_child(self, board, alpha, beta):
+        """Returns the score, for the player at the root, of the
+            position after a root move, searched with the given window."""
+
+    # ------------------------------------------------------
+    def _draft(self, depth):
+        """Returns the number of plies still to be searched at depth
+            (None if the search shall stop here)."""
+        if self.max_depth is None:
+            return _FULL_DEPTH
+        if depth >= self.max_depth and depth > 0:
+            return None
+        return max(self.max_depth - depth, 1)
+
+    # ------------------------------------------------------
+    def _probe(self, board, zhash, is_root_piece):
+        """Look up the position in the transposition table. Returns the
+            table key, the symmetry of the canonical board, the entry
+            found (or None) and the best move stored in the entry."""
+        sym = 0
+        if self.symmetric:
+            zhash, sym = board.get_canonical_index()
+        tt_key = zhash * 2 + is_root_piece
+        if self.ttable is None:
+            return tt_key, sym, None, None
+        entry = self.ttable.lookup(tt_key)
+        hash_move = None
+        if entry is not None and entry[3] is not None:
+            hash_move = entry[3]
+            if self.symmetric:
+                hash_move = board.untransform_move(hash_move, sym)
+        return tt_key, sym, entry, hash_move
+
+    # ------------------------------------------------------
+    # pylint: disable=too-many-arguments
+    def _store(self, board, tt_key, sym, score, depth, draft, alpha, beta, best_move):
+        """Store the result of the search of a position, done with
+            the (alpha, beta) window, in the transposition table."""
+        if self.ttable is None:
+            return
+        if score <= alpha:
+            flag = UPPER_BOUND
+        elif score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        if self.symmetric and best_move is not None:
+            # moves are stored in the orientation of the canonical board
+            best_move = board.transform_move(best_move, sym)
+        self.ttable.store(tt_key, _score_to_tt(score, depth), draft, flag, best_move)
+
+    # ------------------------------------------------------
+    def _ordered_moves(self, board, piece, other_piece, depth, hash_move):
+        """Returns the moves of piece to be searched, best first."""
+        if board.is_standard():
+            moves = board.valid_moves()
+        else:
+            moves = board.near_moves()
+        if self.move_ordering is not None:
+            moves = self.move_ordering.order_moves(board, moves, piece, other_piece,
+                                                   depth, hash_move)
+        return moves
+
+    # ------------------------------------------------------
+    def _record_cutoff(self, move, depth, draft, num_moves):
+        """Called when move caused a cutoff."""
+        self.cutoffs += 1
+        if self.move_ordering is not None:
+            self.move_ordering.record_cutoff(move, depth, min(draft, num_moves))
+    # pylint: enable=too-many-arguments
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+class MinimaxEngine(SearchEngine):
+    """Alpha-beta minimax search."""
+
+    # ------------------------------------------------------
+    def _search_child(self, board, alpha, beta):
+        return self.__minimax(board, 1, False, alpha, beta)
+
+    # ------------------------------------------------------
+    # pylint: disable=too-many-arguments,too-many-branches
+    def __minimax(self, board, depth, is_maximizer, alpha, beta):
+        """Returns the score of the position for the root player."""
+        self.nodes += 1
+        if depth > self.depth_reached:
+            self.depth_reached = depth
+        zhash, val = board.evaluate(self.piece)
+        if val != 0 or board.is_full():
+            return _terminal_score(val, depth)
+        draft = self._draft(depth)
+        if draft is None:
+            return board.evaluate_heuristic(self.piece)
+
+        alpha_orig = alpha
+        beta_orig = beta
+        tt_key, sym, entry, hash_move = self._probe(board, zhash, is_maximizer)
+        if entry is not None and entry[1] >= draft:
+            score = _score_from_tt(entry[0], depth)
+            if entry[2] == EXACT:
+                return score
+            if entry[2] == LOWER_BOUND:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if beta <= alpha:
+                return score
+
+        if is_maximizer:
+            piece, other_piece = self.piece, self.other_piece
+        else:
+            piece, other_piece = self.other_piece, self.piece
+        moves = self._ordered_moves(board, piece, other_piece, depth, hash_move)
+        best_move = None
+        if is_maximizer:
+            best_score = -_INFINITY
+            for move in moves:
+                board.place_pawn(move[0], move[1], piece)
+                score = self.__minimax(board, depth + 1, False, alpha, beta)
+                board.remove_pawn(move[0], move[1])
+                if score > best_score:
+                    best_score = score
+                    best_move = move
+                alpha = max(alpha, best_score)
+                if beta <= alpha:
+                    self._record_cutoff(move, depth, draft, len(moves))
+                    break
+        else:
+            best_score = _INFINITY
+            for move in moves:
+                board.place_pawn(move[0], move[1], piece)
+                score = self.__minimax(board, depth + 1, True, alpha, beta)
+                board.remove_pawn(move[0], move[1])
+                if score < best_score:
+                    best_score = score
+                    best_move = move
+                beta = min(beta, best_score)
+                if beta <= alpha:
+                    self._record_cutoff(move, depth, draft, len(moves))
+                    break
+
+        self._store(board, tt_key, sym, best_score, depth, draft, alpha_orig, beta_orig,
+                    best_move)
+        return best_score
+    # pylint: enable=too-many-arguments,too-many-branches
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+class NegamaxEngine(SearchEngine):
+    """Alpha-beta negamax search."""
+
+    # ------------------------------------------------------
+    def _search_child(self, board, alpha, beta):
+        return -self._negamax(board, 1, self.other_piece, self.piece, -beta, -alpha)
+
+    # ------------------------------------------------------
+    # pylint: disable=too-many-arguments
+    def _negamax(self, board, depth, piece, other_piece, alpha, beta):
+        """Returns the score of the position for piece, the player to move."""
+        self.nodes += 1
+        if depth > self.depth_reached:
+            self.depth_reached = depth
+        zhash, val = board.evaluate(piece)
+        if val != 0 or board.is_full():
+            return _terminal_score(val, depth)
+        draft = self._draft(depth)
+        if draft is None:
+            return board.evaluate_heuristic(piece)
+
+        alpha_orig = alpha
+        beta_orig = beta
+        tt_key, sym, entry, hash_move = self._probe(board, zhash, piece == self.piece)
+        if entry is not None and entry[1] >= draft:
+            score = _score_from_tt(entry[0], depth)
+            if entry[2] == EXACT:
+                return score
+            if entry[2] == LOWER_BOUND:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if beta <= alpha:
+                return score
+
+        moves = self._ordered_moves(board, piece, other_piece, depth, hash_move)
+        best_score, best_move = self._search_moves(board, moves, depth, draft, piece,
+                                                   other_piece, alpha, beta)
+        self._store(board, tt_key, sym, best_score, depth, draft, alpha_orig, beta_orig,
+                    best_move)
+        return best_score
+
+    # ------------------------------------------------------
+    def _search_moves(self, board, moves, depth, draft, piece, other_piece, alpha, beta):
+        """Search the moves of a position. Returns the best score and
+            the best move."""
+        best_score = -_INFINITY
+        best_move = None
+        for move in moves:
+            board.place_pawn(move[0], move[1], piece)
+            score = -self._negamax(board, depth + 1, other_piece, piece, -beta, -alpha)
+            board.remove_pawn(move[0], move[1])
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self._record_cutoff(move, depth, draft, len(moves))
+                        break
+        return best_score, best_move
+    # pylint: enable=too-many-arguments
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+class PVSEngine(NegamaxEngine):
+    """Principal variation search."""
+
+    # ------------------------------------------------------
+    def _search_root(self, board):
+        """Search the root position: the first move with the full
+            window, the other ones with a null window that only tells
+            if they are as good as the best one."""
+        self.nodes += 1
+        tt_key, sym, _, hash_move = self._probe(board, board.get_zhash(), True)
+        moves = self._ordered_moves(board, self.piece, self.other_piece, 0, hash_move)
+        best_score = -_INFINITY
+        best_moves = []
+        for move in moves:
+            board.place_pawn(move[0], move[1], self.piece)
+            if best_moves:
+                score = self._search_child(board, best_score - 1, best_score)
+                if score >= best_score:
+                    score = self._search_child(board, best_score - 1, _INFINITY)
+            else:
+                score = self._search_child(board, -_INFINITY, _INFINITY)
+            board.remove_pawn(move[0], move[1])
+            if score > best_score:
+                best_score = score
+                best_moves = [move]
+            elif score == best_score:
+                best_moves.append(move)
+        if best_moves:
+            self._store(board, tt_key, sym, best_score, 0, self._draft(0),
+                        -_INFINITY, _INFINITY, best_moves[0])
+        return best_score, best_moves
+
+    # ------------------------------------------------------
+    # pylint: disable=too-many-arguments
+    def _search_moves(self, board, moves, depth, draft, piece, other_piece, alpha, beta):
+        best_score = -_INFINITY
+        best_move = None
+        for move in moves:
+            board.place_pawn(move[0], move[1], piece)
+            if best_move is None:
+                score = -self._negamax(board, depth + 1, other_piece, piece, -beta, -alpha)
+            else:
+                score = -self._negamax(board, depth + 1, other_piece, piece,
+                                       -alpha - 1, -alpha)
+                if alpha < score < beta:
+                    # better than the principal variation: search it again
+                    score = -self._negamax(board, depth + 1, other_piece, piece,
+                                           -beta, -score)
+            board.remove_pawn(move[0], move[1])
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self._record_cutoff(move, depth, draft, len(moves))
+                        break
+        return best_score, best_move
+    # pylint: enable=too-many-arguments
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+class MTDfEngine(NegamaxEngine):
+    """MTD(f) search: it needs the transposition table to be efficient."""
+
+    # ------------------------------------------------------
+    def __init__(self, ttable=None, move_ordering=None, max_depth=None, symmetric=False):
+        SearchEngine.__init__(self, ttable, move_ordering, max_depth, symmetric)
+        self.__guess = 0
+
+    # ------------------------------------------------------
+    def _search_root(self, board):
+        """Find the score of the root with null window searches, then
+            find the moves that reach it."""
+        guess = self.__guess
+        lower = -_INFINITY
+        upper = _INFINITY
+        while lower < upper:
+            beta = guess + 1 if guess == lower else guess
+            guess = self._negamax(board, 0, self.piece, self.other_piece, beta - 1, beta)
+            if guess < beta:
+                upper = guess
+            else:
+                lower = guess
+        best_score = guess
+        # win and loss scores change at every move: do not use them as guess
+        self.__guess = best_score if abs(best_score) < _WIN_THRESHOLD else 0
+
+        _, _, _, hash_move = self._probe(board, board.get_zhash(), True)
+        moves = self._ordered_moves(board, self.piece, self.other_piece, 0, hash_move)
+        best_moves = []
+        for move in moves:
+            board.place_pawn(move[0], move[1], self.piece)
+            # null window test: is the move as good as the best score?
+            if self._search_child(board, best_score - 1, best_score) >= best_score:
+                best_moves.append(move)
+            board.remove_pawn(move[0], move[1])
+        if not best_moves and moves:
+            best_moves = [hash_move if hash_move in moves else moves[0]]
+        return best_score, best_moves
+
+ENGINES = {
+    'minimax': MinimaxEngine,
+    'negamax': NegamaxEngine,
+    'pvs': PVSEngine,
+    'mtdf': MTDfEngine,
+}
+
+# ----------------------------------------------------------------------------------------
+def create_engine(engine, **kwargs):
+    """Returns a new search engine. engine is the name of the engine
+        (a key of ENGINES) or a SearchEngine subclass; the keyword
+        arguments are passed to the engine constructor."""
+    if isinstance(engine, str):
+        if engine not in ENGINES:
+            raise ValueError("unknown search engine: %s" % engine)
+        engine = ENGINES[engine]
+    return engine(**kwargs)
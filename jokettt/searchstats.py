@@ -0,0 +1,122 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Statistics of the moves of the automatic players
+# --------------------------------------------------------------------
+"""Implementation of the SearchStats class, that describes the work
+    done by an automatic player to choose a move (positions visited,
+    cutoffs, depth reached, cache usage, time), and of the
+    StatsAggregator class, that collects the stats of many moves (e.g.
+    of all the moves of a set of games) and summarizes them.
+    The stats of the last move are available in the last_stats
+    attribute of the player; every new stats object is also passed
+    to the player stats_callback, if set: a StatsAggregator can be
+    used as callback.
+"""
+__all__ = ['SearchStats', 'StatsAggregator']
+
+# pylint: disable=too-few-public-methods,too-many-instance-attributes
+class SearchStats:
+    """The work done to choose a move."""
+
+    # ------------------------------------------------------
+    # pylint: disable=too-many-arguments
+    def __init__(self, player, nodes=0, cutoffs=0, max_depth=0,
+                 cache_hits=0, cache_misses=0, elapsed=0.0):
+        """SearchStats class constructor.
+            player is the class name of the player that did the move,
+            nodes the number of positions visited, cutoffs the number of
+            alpha-beta cutoffs, max_depth the maximum depth (in plies)
+            reached, cache_hits and cache_misses the lookups in the
+            cache of the player (transposition table, value table),
+            elapsed the wall time in seconds."""
+        self.player = player
+        self.nodes = nodes
+        self.cutoffs = cutoffs
+        self.max_depth = max_depth
+        self.cache_hits = cache_hits
+        self.cache_misses = cache_misses
+        self.elapsed = elapsed
+    # pylint: enable=too-many-arguments
+
+    # ------------------------------------------------------
+    @property
+    def cache_hit_rate(self):
+        """Fraction of the cache lookups that found the position
+            (None if the cache was not used)"""
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else None
+
+    # ------------------------------------------------------
+    def as_dict(self):
+        """Returns the stats as a dictionary."""
+        return {'player': self.player, 'nodes': self.nodes, 'cutoffs': self.cutoffs,
+                'max_depth': self.max_depth, 'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses, 'cache_hit_rate': self.cache_hit_rate,
+                'elapsed': self.elapsed}
+
+    # ------------------------------------------------------
+    def __repr__(self):
+        return "SearchStats(%s)" % ", ".join("%s=%r" % item for item in self.as_dict().items())
+# pylint: enable=too-few-public-methods,too-many-instance-attributes
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+class StatsAggregator:
+    """Collects the SearchStats of many moves."""
+
+    # ------------------------------------------------------
+    def __init__(self):
+        """StatsAggregator class constructor."""
+        self.stats = []
+
+    # ------------------------------------------------------
+    def __call__(self, stats):
+        """Add the stats of a move (so the aggregator can be used
+            as stats_callback of the players)."""
+        self.stats.append(stats)
+
+    # ------------------------------------------------------
+    def __len__(self):
+        return len(self.stats)
+
+    # ------------------------------------------------------
+    def clear(self):
+        """Forget all the collected stats."""
+        self.stats = []
+
+    # ------------------------------------------------------
+    def latency_percentile(self, percentile):
+        """Returns the given percentile (0-100) of the move times,
+            in seconds (nearest-rank method; None if no moves)."""
+        return _percentile(sorted(stats.elapsed for stats in self.stats), percentile)
+
+    # ------------------------------------------------------
+    def summary(self):
+        """Returns a dictionary with the totals of the collected stats,
+            the mean nodes per move and the p50, p90, p99 and max
+            move times."""
+        times = sorted(stats.elapsed for stats in self.stats)
+        nodes = sum(stats.nodes for stats in self.stats)
+        hits = sum(stats.cache_hits for stats in self.stats)
+        lookups = hits + sum(stats.cache_misses for stats in self.stats)
+        return {'moves': len(self.stats),
+                'nodes': nodes,
+                'cutoffs': sum(stats.cutoffs for stats in self.stats),
+                'max_depth': max((stats.max_depth for stats in self.stats), default=0),
+                'nodes_per_move': nodes / len(self.stats) if self.stats else 0.0,
+                'cache_hit_rate': hits / lookups if lookups else None,
+                'total_time': sum(times),
+                'p50': _percentile(times, 50),
+                'p90': _percentile(times, 90),
+                'p99': _percentile(times, 99),
+                'max': times[-1] if times else None}
+
+# ----------------------------------------------------------------------------------------
+def _percentile(sorted_values, percentile):
+    """Nearest-rank percentile of a sorted list."""
+    if not sorted_values:
+        return None
+    rank = -(-percentile * len(sorted_values) // 100)
+    return sorted_values[max(0, min(len(sorted_values), int(rank)) - 1)]
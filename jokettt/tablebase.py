@@ -0,0 +1,174 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Tic Tac Toe perfect-play tablebase
+# --------------------------------------------------------------------
+"""Implementation of the perfect-play tablebase: every position that
+    can be reached from the empty board is solved once and stored in
+    a compact binary file, that is then loaded through mmap to answer
+    queries in constant time.
+    The file contains a 12 bytes header (magic, version, board size,
+    number of records) followed by one 4 bytes record for every
+    board state index (see Board.get_state_index()):
+      - game-theoretic value for the side to move (+1 win, 0 draw,
+        -1 loss, -128 for positions not reachable in a legal game)
+      - distance (in plies) to the end of the game with perfect play
+      - bitmask of the optimal moves (bit x*3+y set for move [x, y])
+    Optimal moves are the ones that win in the fewest plies, or that
+    lose in the most plies, exactly as chosen by the minimax player.
+    To build the tablebase file:
+        python -m jokettt.tablebase <file>
+"""
+__all__ = ['Tablebase', 'build_tablebase']
+
+import mmap
+import os
+import struct
+import sys
+
+from .board import Board
+
+_MAGIC = b'JTTB'
+_VERSION = 1
+_BOARD_SIZE = 3
+_HEADER = struct.Struct('<4sHHI')
+_RECORD = struct.Struct('<bBH')
+_NUM_RECORDS = 3 ** (_BOARD_SIZE * _BOARD_SIZE)
+_UNREACHABLE = -128
+_FILE_SIZE = _HEADER.size + _NUM_RECORDS * _RECORD.size
+
+# ----------------------------------------------------------------------------------------
+def build_tablebase(path):
+    """Solve every reachable position and write the tablebase
+        in the given file. Returns the number of positions solved."""
+    records = {}
+    _solve(Board('x', 'o'), 'x', 'o', records)
+
+    with open(path, 'wb') as out_file:
+        out_file.write(_HEADER.pack(_MAGIC, _VERSION, _BOARD_SIZE, _NUM_RECORDS))
+        unreachable = _RECORD.pack(_UNREACHABLE, 0, 0)
+        for ndx in range(0, _NUM_RECORDS):
+            record = records.get(ndx)
+            if record is None:
+                out_file.write(unreachable)
+            else:
+                out_file.write(_RECORD.pack(*record))
+    return len(records)
+
+# ----------------------------------------------------------------------------------------
+def _solve(board, piece, other_piece, records):
+    """Solve the position on board with piece to move. Fills records
+        with the (value, distance, optimal moves mask) of the position
+        and of all the positions reachable from it."""
+    ndx = board.get_state_index()
+    record = records.get(ndx)
+    if record is not None:
+        return record
+
+    _, score = board.evaluate(piece)
+    if score < 0:
+        # the last move of the opponent won the game
+        record = (-1, 0, 0)
+    elif board.is_full():
+        record = (0, 0, 0)
+    else:
+        best_key = None
+        best_distance = 0
+        moves_mask = 0
+        for _x, _y in board.valid_moves():
+            board.place_pawn(_x, _y, piece)
+            value, distance, _ = _solve(board, other_piece, piece, records)
+            board.remove_pawn(_x, _y)
+            # the value of the child is for the opponent
+            value = -value
+            distance += 1
+            # win as soon as possible, lose as late as possible
+            key = (value, -value * distance)
+            if best_key is None or key > best_key:
+                best_key = key
+                best_distance = distance
+                moves_mask = 0
+            if key == best_key:
+                moves_mask |= 1 << (_x * _BOARD_SIZE + _y)
+        record = (best_key[0], best_distance, moves_mask)
+
+    records[ndx] = record
+    return record
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+class Tablebase:
+    """A perfect-play tablebase loaded from file through mmap."""
+
+    # ------------------------------------------------------
+    def __init__(self, path):
+        """Tablebase class constructor. Map the given tablebase file
+            in memory and check its header."""
+        with open(path, 'rb') as tb_file:
+            # an empty or truncated file cannot be mapped or unpacked
+            if os.fstat(tb_file.fileno()).st_size != _FILE_SIZE:
+                raise ValueError("%s is not a valid tablebase file" % path)
+            self.__mmap = mmap.mmap(tb_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, board_size, num_records = _HEADER.unpack_from(self.__mmap, 0)
+        if magic != _MAGIC or version != _VERSION or board_size != _BOARD_SIZE or \
+           num_records != _NUM_RECORDS:
+            self.close()
+            raise ValueError("%s is not a valid tablebase file" % path)
+
+    # ------------------------------------------------------
+    def probe(self, board, piece=None):
+        """Returns the (value, distance, optimal moves) of the current
+            board for the side to move, or None if the position
+            cannot be reached in a legal game (or the board is not
+            the standard 3x3 one).
+            The first piece of the board is assumed to be the one that
+            moved first. If piece is given, it shall be the side to
+            move (found from the number of pawns of the two pieces),
+            otherwise ValueError is raised."""
+        if not board.is_standard():
+            return None
+        if piece is not None:
+            # the first piece moves when the pawns are the same number
+            first, second = board.pieces
+            to_move = first if board.count_pieces(first) == board.count_pieces(second) \
+                else second
+            if piece != to_move:
+                raise ValueError("%s is not the side to move" % piece)
+        value, distance, moves_mask = _RECORD.unpack_from(
+            self.__mmap, _HEADER.size + board.get_state_index() * _RECORD.size)
+        if value == _UNREACHABLE:
+            return None
+        moves = [(bit // _BOARD_SIZE, bit % _BOARD_SIZE)
+                 for bit in range(0, _BOARD_SIZE * _BOARD_SIZE)
+                 if moves_mask & (1 << bit)]
+        return value, distance, moves
+
+    # ------------------------------------------------------
+    def as_array(self):
+        """Returns a read-only NumPy structured array view of the
+            records (fields: value, distance, moves), indexed by
+            board state index. No data is copied."""
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        dtype = np.dtype([('value', '<i1'), ('distance', '<u1'), ('moves', '<u2')])
+        return np.frombuffer(self.__mmap, dtype=dtype, offset=_HEADER.size)
+
+    # ------------------------------------------------------
+    def close(self):
+        """Release the memory mapping of the tablebase file."""
+        self.__mmap.close()
+
+    # ------------------------------------------------------
+    def __enter__(self):
+        return self
+
+    # ------------------------------------------------------
+    def __exit__(self, *args):
+        self.close()
+
+# ----------------------------------------------------------------------------------------
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python -m jokettt.tablebase <file>")
+        sys.exit(1)
+    print("%d positions solved" % build_tablebase(sys.argv[1]))
@@ -0,0 +1,134 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Tracing of the players events
+# --------------------------------------------------------------------
+"""Structured tracing of the events of the automatic players.
+    A tracer is any callable, set in the tracer attribute of a player,
+    that is called as tracer(event, player, *args) with one of the
+    events below and its raw arguments:
+      - MOVE_CONSIDERED: move, key, score, value
+            a move evaluated by the player: the key and the score of
+            the board after the move, and its value
+      - VALUE_UPDATED: key, old value, new value
+            the value of a position was updated by the learning
+      - EXPLORING_MOVE: move
+            the player chose a random move instead of the best one
+      - LEARNED_FROM_DEFEAT: key, value
+            the player learned from a defeat: the position before the
+            defeat and its new value
+      - LEARNED_FROM_GAME: reward, positions
+            the player learned from a whole game (td_lambda mode)
+    When the tracer is None the players only test it (the arguments
+    are not built), so the tracing costs nothing when disabled; the
+    arguments are formatted only by the tracers that print them.
+    The tracers provided are:
+      - PrintTracer: prints every event (the tracer used by the
+        players when verbosity > 0)
+      - RingBufferTracer: keeps the last events in memory, to be
+        examined after the fact (e.g. after an unexpected defeat)
+"""
+__all__ = ['MOVE_CONSIDERED', 'VALUE_UPDATED', 'EXPLORING_MOVE', 'LEARNED_FROM_DEFEAT',
+           'LEARNED_FROM_GAME', 'format_event', 'PrintTracer', 'RingBufferTracer']
+
+from collections import deque
+import sys
+
+MOVE_CONSIDERED = 'move_considered'
+VALUE_UPDATED = 'value_updated'
+EXPLORING_MOVE = 'exploring_move'
+LEARNED_FROM_DEFEAT = 'learned_from_defeat'
+LEARNED_FROM_GAME = 'learned_from_game'
+
+# ------------------------------------------------------
+def _movestring(move):
+    """Returns the move in the <row><col> format (e.g. "A1")."""
+    return chr(ord("A") + move[0]) + str(move[1] + 1)
+
+_FORMATTERS = {
+    MOVE_CONSIDERED: lambda move, key, score, value:
+                     "move %s considered: score = %d, key = %d, value = %.4f" %
+                     (_movestring(move), score, key, value),
+    VALUE_UPDATED: lambda key, old_value, new_value:
+                   "value of %d updated: %.4f -> %.4f" % (key, old_value, new_value),
+    EXPLORING_MOVE: lambda move: "exploring move %s" % _movestring(move),
+    LEARNED_FROM_DEFEAT: lambda key, value:
+                         "learned from defeat: new value of %d = %.4f" % (key, value),
+    LEARNED_FROM_GAME: lambda reward, positions:
+                       "learned from game: reward = %.1f, %d positions" % (reward, positions),
+}
+
+# ------------------------------------------------------
+def format_event(event, piece, args):
+    """Returns a line of text describing an event of the player with
+        the given piece."""
+    formatter = _FORMATTERS.get(event)
+    text = formatter(*args) if formatter is not None else \
+        "%s %s" % (event, " ".join(str(arg) for arg in args))
+    return "[%s] %s" % (piece, text)
+
+# ------------------------------------------------------
+# ------------------------------------------------------
+# pylint: disable=too-few-public-methods
+class PrintTracer:
+    """A tracer that prints every event."""
+
+    # ------------------------------------------------------
+    def __init__(self, out_file=None):
+        """PrintTracer class constructor. The events are printed on
+            out_file (default: the standard output)."""
+        self.__out_file = out_file
+
+    # ------------------------------------------------------
+    def __call__(self, event, player, *args):
+        print(format_event(event, player.piece, args),
+              file=self.__out_file if self.__out_file is not None else sys.stdout)
+# pylint: enable=too-few-public-methods
+
+# ------------------------------------------------------
+# ------------------------------------------------------
+class RingBufferTracer:
+    """A tracer that keeps the last events in memory."""
+
+    DEFAULT_MAX_EVENTS = 10000
+
+    # ------------------------------------------------------
+    def __init__(self, max_events=DEFAULT_MAX_EVENTS):
+        """RingBufferTracer class constructor. When max_events events
+            are stored, every new event drops the oldest one."""
+        if max_events <= 0:
+            raise ValueError("max_events shall be a positive number")
+        self.max_events = max_events
+        self.__events = deque(maxlen=max_events)
+        # bound once: the tracer is called in the hot loops
+        self.__append = self.__events.append
+
+    # ------------------------------------------------------
+    def __call__(self, event, player, *args):
+        # only the raw arguments are stored: formatting is done by dump()
+        self.__append((event, player.piece, args))
+
+    # ------------------------------------------------------
+    def __len__(self):
+        return len(self.__events)
+
+    # ------------------------------------------------------
+    def events(self, event=None):
+        """Returns the list of the (event, piece, args) stored, from
+            the oldest one (only the given event, if not None)."""
+        if event is None:
+            return list(self.__events)
+        return [entry for entry in self.__events if entry[0] == event]
+
+    # ------------------------------------------------------
+    def dump(self, out_file=None):
+        """Print the stored events, from the oldest one."""
+        for event, piece, args in self.__events:
+            print(format_event(event, piece, args),
+                  file=out_file if out_file is not None else sys.stdout)
+
+    # ------------------------------------------------------
+    def clear(self):
+        """Remove all the events."""
+        self.__events.clear()
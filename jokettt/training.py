@@ -0,0 +1,257 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Parallel training driver for the Learner Player
+# --------------------------------------------------------------------
+"""Implementation of a process-parallel training driver for the
+    LearnerPlayer: the training games are split in rounds; in every
+    round each worker process plays a shard of games starting from the
+    current value tables, and at the end of the round the tables
+    learned by the workers are merged and sent back for the next round.
+    The learner can be trained against itself (self-play: the opponent
+    is another learner, with its own value table, that is trained and
+    merged in the same way) or against a minimax player.
+    The value tables can be merged by plain averaging, or weighting
+    every value with the number of visits of the position in the round.
+    The learners can update the values during the games, or learn from
+    the whole game at its end (see the td_lambda option of LearnerPlayer).
+    With the shared option the value tables are kept in shared memory
+    (see valuestore.SharedValueStore) and updated by all the workers at
+    the same time: there are no rounds and no merge, and the tables are
+    not copied in the workers.
+"""
+__all__ = ['TrainingResult', 'merge_value_tables', 'train_parallel']
+
+import multiprocessing
+import random
+import time
+
+from .board import Board
+from .learnerplayer import LearnerPlayer
+from .minimaxplayer import MinimaxPlayer
+
+MERGE_METHODS = ('average', 'visits')
+OPPONENTS = ('self', 'minimax')
+
+# pylint: disable=too-few-public-methods
+class TrainingResult:
+    """Result of a training run."""
+    def __init__(self, values, opponent_values, num_games, elapsed):
+        self.values = values
+        self.opponent_values = opponent_values
+        self.num_games = num_games
+        self.elapsed = elapsed
+        self.games_per_second = num_games / elapsed if elapsed > 0 else 0.0
+# pylint: enable=too-few-public-methods
+
+# ----------------------------------------------------------------------------------------
+def merge_value_tables(base_values, tables, visits=None, method='average'):
+    """Merge the value tables learned by the workers, that all started
+        from base_values. With the 'average' method the merged value is
+        the mean of the values in the tables; with the 'visits' method
+        every value is weighted with the number of times the position
+        was visited by the worker (visits is the list of the visits
+        dictionaries, one for each table): the positions not visited
+        in any table keep the value of base_values."""
+    if method not in MERGE_METHODS:
+        raise ValueError("unknown merge method: %s" % method)
+    merged = dict(base_values)
+    keys = set()
+    for table in tables:
+        keys.update(table)
+    for key in keys:
+        if method == 'visits':
+            total_visits = 0
+            total_value = 0.0
+            for table, table_visits in zip(tables, visits):
+                num_visits = table_visits.get(key, 0)
+                if num_visits and key in table:
+                    total_visits += num_visits
+                    total_value += num_visits * table[key]
+            if total_visits:
+                merged[key] = total_value / total_visits
+                continue
+            if key in base_values:
+                continue
+        values = [table[key] for table in tables if key in table]
+        merged[key] = sum(values) / len(values)
+    return merged
+
+# ----------------------------------------------------------------------------------------
+# pylint: disable=too-many-arguments,too-many-locals
+def train_parallel(num_games, num_workers=None, games_per_round=100, merge='average',
+                   opponent='self', piece='x', init_values=None, opponent_init_values=None,
+                   alpha=0.1, eps=0.1, symmetric=False, seed=None, td_lambda=None,
+                   shared=False):
+    """Train a LearnerPlayer playing num_games games split among
+        num_workers processes (default: the number of cores).
+        Every games_per_round games played by each worker the value
+        tables are merged with the given merge method ('average' or
+        'visits'). The opponent is another learner ('self') or a
+        minimax player ('minimax'). The learner plays first in half
+        of the games. td_lambda is passed to the learners (None for
+        the one step update during the games).
+        If shared is True the workers update the same value tables in
+        shared memory, every games_per_round games is a task for the
+        pool and merge is not used. In this mode the values are keyed
+        by board state index (or canonical index if symmetric), and the
+        result tables are ArrayValueStores. The init values, if given,
+        shall have the same keys; without symmetric, the values keyed
+        by Zobrist hash (e.g. returned by the other mode) are also
+        accepted, and converted to state indexes.
+        Returns a TrainingResult."""
+    if merge not in MERGE_METHODS:
+        raise ValueError("unknown merge method: %s" % merge)
+    if opponent not in OPPONENTS:
+        raise ValueError("unknown opponent: %s" % opponent)
+    if num_workers is None:
+        num_workers = multiprocessing.cpu_count()
+    if seed is None:
+        seed = random.randint(0, 2 ** 31)
+    if shared:
+        return _train_shared(num_games, num_workers, games_per_round, opponent, piece,
+                             init_values, opponent_init_values, alpha, eps, symmetric,
+                             td_lambda, seed)
+
+    # all the workers use the same (shared, seeded) Zobrist keys,
+    # so the learned values can be merged
+    values = dict(init_values or {})
+    opponent_values = dict(opponent_init_values or {}) if opponent == 'self' else None
+
+    start_time = time.time()
+    pool = multiprocessing.Pool(num_workers) if num_workers > 1 else None
+    try:
+        games_played = 0
+        round_ndx = 0
+        while games_played < num_games:
+            shards = []
+            for worker in range(num_workers):
+                shard_games = min(games_per_round, num_games - games_played)
+                if shard_games <= 0:
+                    break
+                games_played += shard_games
+                shards.append((values, opponent_values, shard_games,
+                               opponent, piece, alpha, eps, symmetric, td_lambda,
+                               seed + round_ndx * num_workers + worker))
+            if pool is not None:
+                results = pool.map(_train_shard, shards)
+            else:
+                results = [_train_shard(shard) for shard in shards]
+            visits = [result[1] for result in results] if merge == 'visits' else None
+            values = merge_value_tables(values, [result[0] for result in results],
+                                        visits, merge)
+            if opponent_values is not None:
+                visits = [result[3] for result in results] if merge == 'visits' else None
+                opponent_values = merge_value_tables(
+                    opponent_values, [result[2] for result in results], visits, merge)
+            round_ndx += 1
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return TrainingResult(values, opponent_values, games_played, time.time() - start_time)
+
+# ----------------------------------------------------------------------------------------
+def _train_shared(num_games, num_workers, games_per_round, opponent, piece, init_values,
+                  opponent_init_values, alpha, eps, symmetric, td_lambda, seed):
+    """Shared memory version of train_parallel()."""
+    # numpy is needed only in this mode
+    from .valuestore import SharedValueStore  # pylint: disable=import-outside-toplevel
+
+    def create_store(init):
+        if hasattr(init, 'to_dict'):
+            return SharedValueStore(init_values=init.to_dict())
+        if init and max(init) >= 3 ** 9:
+            # not state indexes: Zobrist hashes, as the values of the
+            # other training mode or of a LearnerPlayer
+            if symmetric:
+                raise ValueError("the init values of a symmetric shared training "
+                                 "shall be keyed by canonical index")
+            return SharedValueStore(init_values=init, zhash_table=Board('x', 'o').zhash_table)
+        return SharedValueStore(init_values=init)
+
+    values = None
+    opponent_values = None
+    start_time = time.time()
+    try:
+        # created in the try block, to free them also if they cannot be filled
+        values = create_store(init_values)
+        if opponent == 'self':
+            opponent_values = create_store(opponent_init_values)
+        shards = [(values, opponent_values, min(games_per_round, num_games - first_game),
+                   opponent, piece, alpha, eps, symmetric, td_lambda, seed + shard_ndx)
+                  for shard_ndx, first_game in enumerate(range(0, num_games, games_per_round))]
+        if num_workers > 1:
+            with multiprocessing.Pool(num_workers) as pool:
+                pool.map(_train_shared_shard, shards)
+        else:
+            for shard in shards:
+                _train_shared_shard(shard)
+        return TrainingResult(values.copy(),
+                              opponent_values.copy() if opponent_values is not None else None,
+                              num_games, time.time() - start_time)
+    finally:
+        if values is not None:
+            values.unlink()
+        if opponent_values is not None:
+            opponent_values.unlink()
+# pylint: enable=too-many-arguments,too-many-locals
+
+# ----------------------------------------------------------------------------------------
+def _train_shard(args):
+    """Worker function: play a shard of training games and returns
+        the learned value tables and the visits of the positions.
+        The shared value stores are updated in place."""
+    (values, opponent_values, num_games, opponent,
+     piece, alpha, eps, symmetric, td_lambda, shard_seed) = args
+    board = Board('x', 'o')
+    other_piece = 'o' if piece == 'x' else 'x'
+    learner = LearnerPlayer(piece, board, _worker_values(values), alpha, eps,
+                            symmetric=symmetric, td_lambda=td_lambda)
+    if opponent == 'self':
+        rival = LearnerPlayer(other_piece, board, _worker_values(opponent_values), alpha, eps,
+                              symmetric=symmetric, td_lambda=td_lambda)
+    else:
+        rival = MinimaxPlayer(other_piece)
+    # LearnerPlayer constructor seeds the random generator:
+    # seed it again to make the shard reproducible
+    random.seed(shard_seed)
+
+    visits = {}
+    rival_visits = {}
+    for game in range(num_games):
+        board.reset()
+        players = (learner, rival) if game % 2 == 0 else (rival, learner)
+        ply = 0
+        while True:
+            player = players[ply % 2]
+            _x, _y = player.move(board)
+            _, score = board.place_pawn(_x, _y, player.piece)
+            key = board.get_canonical_index()[0] if symmetric else board.get_zhash()
+            player_visits = visits if player is learner else rival_visits
+            player_visits[key] = player_visits.get(key, 0) + 1
+            ply += 1
+            if score != 0 or board.is_full():
+                break
+        for player in players:
+            if isinstance(player, LearnerPlayer):
+                player.learn_from_game(board)
+
+    rival_values = rival.values if opponent == 'self' else None
+    return learner.values, visits, rival_values, rival_visits
+
+# ----------------------------------------------------------------------------------------
+def _train_shared_shard(args):
+    """Worker function of the shared memory training: the value
+        stores are updated in place, nothing is returned."""
+    _train_shard(args)
+
+# ----------------------------------------------------------------------------------------
+def _worker_values(values):
+    """Returns the value table to be used by a worker: a copy of the
+        dictionary, or the shared value store itself."""
+    if getattr(values, 'indexed_by_state', False):
+        return values
+    return dict(values)
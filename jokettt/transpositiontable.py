@@ -0,0 +1,83 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Transposition table used by the search based players
+# --------------------------------------------------------------------
+"""Implementation of the TranspositionTable class: a bounded cache
+    of already searched positions, keyed by the board (Zobrist) hash.
+    Every entry stores the score found for the position, the depth
+    of the search that produced it, the type of the score (exact
+    value, lower bound or upper bound, as produced by alpha-beta
+    cutoffs) and the best move found.
+    When the table is full the least recently used entry is evicted.
+"""
+__all__ = ['TranspositionTable', 'EXACT', 'LOWER_BOUND', 'UPPER_BOUND']
+
+from collections import OrderedDict
+
+# type of the score stored in an entry
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+class TranspositionTable:
+    """A bounded, least recently used, transposition table."""
+
+    DEFAULT_MAX_ENTRIES = 100000
+
+    # ------------------------------------------------------
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        """TranspositionTable class constructor. max_entries
+            is the maximum number of positions kept in the table."""
+        if max_entries <= 0:
+            raise ValueError("max_entries shall be a positive number")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+
+    # ------------------------------------------------------
+    def lookup(self, key):
+        """Returns the (score, depth, flag, best_move) entry
+            stored for the given key, or None if not present."""
+        entry = self.__entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.__entries.move_to_end(key)
+        return entry
+
+    # ------------------------------------------------------
+    def store(self, key, score, depth, flag, best_move=None):
+        """Stores a search result for the given key. An entry
+            coming from a deeper search is never replaced by
+            a shallower one."""
+        entries = self.__entries
+        old_entry = entries.get(key)
+        if old_entry is not None:
+            if old_entry[1] > depth:
+                return
+            entries.move_to_end(key)
+        elif len(entries) >= self.max_entries:
+            # evict the least recently used entry
+            entries.popitem(last=False)
+        entries[key] = (score, depth, flag, best_move)
+
+    # ------------------------------------------------------
+    def clear(self):
+        """Removes all the entries and resets the statistics."""
+        self.__entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------
+    def __len__(self):
+        """Number of entries currently stored."""
+        return len(self.__entries)
+
+    # ------------------------------------------------------
+    def __contains__(self, key):
+        """Returns True if an entry is stored for key."""
+        return key in self.__entries
@@ -0,0 +1,271 @@
+# --------------------------------------------------------------------
+# jokettt project, v. 0.1
+# by F. Piantini <francesco.piantini@gmail.com>
+# ---
+# Array-backed value store for the Learner Player
+# --------------------------------------------------------------------
+"""Implementation of the ArrayValueStore class: a compact replacement
+    of the values dictionary of the LearnerPlayer. The values are kept
+    in a dense float32 NumPy array with one slot for every board state
+    index (see Board.get_state_index()): 3^9 = 19683 slots, 77 KB, for
+    the standard board. Empty slots contain NaN.
+    The store can be saved to (and loaded from) a .npy file, also
+    through a memory mapping, without copying the data.
+    A LearnerPlayer that receives an ArrayValueStore as init_values
+    uses the board state index (or the canonical index, if symmetric)
+    as key.
+    A SharedValueStore keeps the array in a shared memory block, that
+    many processes (e.g. the workers of a training) read and update
+    at the same time, without locks (Hogwild! style: an update can
+    rarely be lost when two processes change the same value at the
+    same time, that is harmless for the learning). The store is sent
+    to the other processes by name: pickling it does not copy the
+    values.
+"""
+__all__ = ['ArrayValueStore', 'SharedValueStore']
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# larger stores would not fit in memory anyway
+_MAX_SLOTS = 2 ** 31
+
+class ArrayValueStore:
+    """A dense value table indexed by board state index."""
+
+    # the LearnerPlayer uses the state index as key
+    indexed_by_state = True
+
+    # ------------------------------------------------------
+    def __init__(self, num_cells=9, init_values=None, zhash_table=None, array=None):
+        """ArrayValueStore class constructor. Allocate the slots for a
+            board with num_cells cells, or use the given array.
+            init_values is a dictionary of values to copy in the store:
+            its keys are state indexes or, if zhash_table (the Zobrist
+            table of the Board that learned the values) is given,
+            Zobrist hashes."""
+        if array is None:
+            num_slots = 3 ** num_cells
+            if num_slots > _MAX_SLOTS:
+                raise ValueError("board too large for an array value store")
+            array = np.full(num_slots, np.nan, dtype=np.float32)
+        elif array.dtype != np.float32 or array.ndim != 1:
+            raise ValueError("the array shall be a 1-dimensional float32 array")
+        self.__set_array(array)
+        if init_values:
+            self.update(init_values, zhash_table)
+
+    # ------------------------------------------------------
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        """Load a store saved with save(). With mmap_mode ('r', 'r+'
+            or 'c', see numpy.load()) the file is memory mapped instead
+            of being read."""
+        return cls(array=np.load(path, mmap_mode=mmap_mode))
+
+    # ------------------------------------------------------
+    @classmethod
+    def create_memmap(cls, path, num_cells=9):
+        """Create an empty store backed by a memory mapped .npy file:
+            all the changes to the store are written to the file."""
+        array = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32,
+                                          shape=(3 ** num_cells,))
+        array[:] = np.nan
+        return cls(array=array)
+
+    # ------------------------------------------------------
+    @property
+    def array(self):
+        """The float32 array that holds the values (NaN = no value)"""
+        return self.__array
+
+    # ------------------------------------------------------
+    def save(self, path):
+        """Save the store in a .npy file."""
+        np.save(path, self.__array)
+
+    # ------------------------------------------------------
+    def flush(self):
+        """Write the changes to the file, if the store is memory mapped."""
+        if isinstance(self.__array, np.memmap):
+            self.__array.flush()
+
+    # ------------------------------------------------------
+    def update(self, values, zhash_table=None):
+        """Copy the given dictionary of values in the store. The keys
+            are state indexes, or Zobrist hashes if zhash_table is
+            given: they are converted looking for the state with the
+            same hash (the keys not matching any state are ignored)."""
+        keys = np.fromiter(values.keys(), dtype=np.int64, count=len(values))
+        vals = np.fromiter(values.values(), dtype=np.float32, count=len(values))
+        if zhash_table is not None:
+            state_zhashes = self.__state_zhashes(zhash_table)
+            order = np.argsort(state_zhashes)
+            pos = np.searchsorted(state_zhashes, keys, sorter=order)
+            pos[pos == order.size] = 0
+            found = state_zhashes[order[pos]] == keys
+            keys = order[pos[found]]
+            vals = vals[found]
+        self.__array[keys] = vals
+
+    # ------------------------------------------------------
+    def to_dict(self):
+        """Returns the values as a dictionary keyed by state index."""
+        keys = np.flatnonzero(~np.isnan(self.__array))
+        return dict(zip(keys.tolist(), self.__array[keys].tolist()))
+
+    # ------------------------------------------------------
+    def get(self, key, default=None):
+        """Returns the value of key, or default if not present."""
+        value = self.__view[key]
+        if value != value:  # NaN: no value
+            return default
+        return value
+
+    # ------------------------------------------------------
+    def keys(self):
+        """Returns the state indexes that have a value."""
+        return np.flatnonzero(~np.isnan(self.__array)).tolist()
+
+    # ------------------------------------------------------
+    def __getitem__(self, key):
+        value = self.__view[key]
+        if value != value:  # NaN: no value
+            raise KeyError(key)
+        return value
+
+    # ------------------------------------------------------
+    def __setitem__(self, key, value):
+        self.__view[key] = value
+
+    # ------------------------------------------------------
+    def __delitem__(self, key):
+        self.__view[key] = float('nan')
+
+    # ------------------------------------------------------
+    def __contains__(self, key):
+        value = self.__view[key]
+        return value == value
+
+    # ------------------------------------------------------
+    def __len__(self):
+        return int(np.count_nonzero(~np.isnan(self.__array)))
+
+    # ------------------------------------------------------
+    def close(self):
+        """Release the array: the store cannot be used any more."""
+        if self.__view is not None:
+            self.__view.release()
+        self.__view = None
+        self.__array = None
+
+    # ------------------------------------------------------
+    def __getstate__(self):
+        return {'array': np.asarray(self.__array)}
+
+    # ------------------------------------------------------
+    def __setstate__(self, state):
+        self.__set_array(state['array'])
+
+    # ------------------------------------------------------
+    def __set_array(self, array):
+        """Use the given array as storage."""
+        self.__array = array
+        # scalar access through a memoryview is much faster than
+        # through NumPy indexing, and shares the same memory
+        self.__view = memoryview(array).cast('B').cast('f')
+
+    # ------------------------------------------------------
+    def __state_zhashes(self, zhash_table):
+        """Returns the Zobrist hash of every state index."""
+        zkeys = np.asarray(zhash_table, dtype=np.int64).reshape(-1, 2).T
+        num_cells = zkeys.shape[1]
+        states = np.arange(self.__array.size, dtype=np.int64)
+        digits = (states[:, None] // (3 ** np.arange(num_cells, dtype=np.int64))) % 3
+        return np.bitwise_xor.reduce(np.where(digits == 1, zkeys[0], 0) ^
+                                     np.where(digits == 2, zkeys[1], 0), axis=1)
+
+# ----------------------------------------------------------------------------------------
+# ----------------------------------------------------------------------------------------
+class SharedValueStore(ArrayValueStore):
+    """An ArrayValueStore in shared memory, updated by many processes."""
+
+    # ------------------------------------------------------
+    def __init__(self, num_cells=9, init_values=None, zhash_table=None, name=None):
+        """SharedValueStore class constructor. Create a new shared
+            memory block for a board with num_cells cells, or attach to
+            the existing block with the given name (created by another
+            SharedValueStore). The process that creates the block shall
+            unlink() it when it is not needed any more.
+            As in ArrayValueStore, zhash_table is only used to convert
+            the keys of init_values: the store is always keyed by state
+            index, and the table is not kept (copy() and pickling do
+            not carry it)."""
+        num_slots = 3 ** num_cells
+        if num_slots > _MAX_SLOTS:
+            raise ValueError("board too large for an array value store")
+        if name is None:
+            self.__shm = shared_memory.SharedMemory(create=True, size=4 * num_slots)
+        else:
+            self.__shm = shared_memory.SharedMemory(name=name)
+        self.__num_cells = num_cells
+        self.__owner = name is None
+        array = np.ndarray((num_slots,), dtype=np.float32, buffer=self.__shm.buf)
+        if self.__owner:
+            array[:] = np.nan
+        try:
+            ArrayValueStore.__init__(self, init_values=init_values, zhash_table=zhash_table,
+                                     array=array)
+        except Exception:
+            # do not leak the block if the values cannot be copied
+            # (the memory is freed when the arrays are released)
+            if self.__owner:
+                self.__shm.unlink()
+            raise
+
+    # ------------------------------------------------------
+    @property
+    def name(self):
+        """The name of the shared memory block"""
+        return self.__shm.name
+
+    # ------------------------------------------------------
+    def copy(self):
+        """Returns a private (not shared) ArrayValueStore with a copy
+            of the values, keyed by state index."""
+        return ArrayValueStore(array=self.array.copy())
+
+    # ------------------------------------------------------
+    def close(self):
+        """Detach this process from the shared memory block."""
+        ArrayValueStore.close(self)
+        self.__shm.close()
+
+    # ------------------------------------------------------
+    def unlink(self):
+        """Free the shared memory block (only the creator of the block
+            shall call it, after all the processes detached)."""
+        self.close()
+        if self.__owner:
+            self.__shm.unlink()
+
+    # ------------------------------------------------------
+    def __enter__(self):
+        return self
+
+    # ------------------------------------------------------
+    def __exit__(self, *args):
+        if self.__owner:
+            self.unlink()
+        else:
+            self.close()
+
+    # ------------------------------------------------------
+    def __getstate__(self):
+        # only the block is sent: the values are already keyed by state index
+        return {'name': self.__shm.name, 'num_cells': self.__num_cells}
+
+    # ------------------------------------------------------
+    def __setstate__(self, state):
+        self.__init__(state['num_cells'], name=state['name'])
@@ -15,9 +15,11 @@ setuptools.setup(
     long_description_content_type = 'text/markdown',
     url = 'https://github.com/fpiantini/jokettt',
     download_url = 'https://github.com/fpiantini/jokettt/archive/v1.0.0.tar.gz',
-    install_requires=[
-          'numpy',
-      ],
+    # numpy is needed only by the optional vectorized modules
+    # (batchsimulator, valuestore, Tablebase.as_array())
+    extras_require={
+          'numpy': ['numpy'],
+      },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -0,0 +1,76 @@
+import pytest
+from jokettt.arena import *
+from jokettt.board import Board
+from jokettt.minimaxplayer import MinimaxPlayer
+
+def test_play_game():
+    brd = Board('x', 'o')
+    first = MinimaxPlayer('x')
+    second = MinimaxPlayer('o')
+    winner, plies, move_stats = play_game(first, second, brd)
+    assert winner is None
+    assert plies == 9
+    assert [player for player, _, _ in move_stats[:2]] == [first, second]
+
+def test_head_to_head():
+    games = []
+    result = head_to_head(PlayerSpec('minimax'), PlayerSpec('dumb', dumb_mode=True), 20,
+                          num_workers=1, chunk_size=7, callback=games.append)
+    assert result.num_games == len(games) == 20
+    summary = result.summary()
+    assert summary['minimax']['losses'] == 0
+    assert summary['minimax']['wins'] == summary['dumb']['losses'] > 0
+    assert summary['minimax']['move_p50'] is not None
+    assert sum(result.pairings[('dumb', 'minimax')]) == 20
+
+def test_results_do_not_depend_on_workers():
+    specs = [PlayerSpec('minimax'), PlayerSpec('dumb', dumb_mode=True),
+             PlayerSpec('learner', learner_player, eps=0.1)]
+    outcomes = []
+    for num_workers in (1, 2):
+        games = iter_games([(specs[0], specs[1]), (specs[1], specs[2])], 12,
+                           num_workers=num_workers, seed=7, chunk_size=5)
+        outcomes.append(sorted((game.game_id, game.winner, game.plies) for game in games))
+    assert outcomes[0] == outcomes[1]
+    assert [game_id for game_id, _, _ in outcomes[0]] == list(range(24))
+
+def test_round_robin():
+    specs = [PlayerSpec('a'), PlayerSpec('b'), PlayerSpec('c', dumb_mode=True)]
+    result = round_robin(specs, 4, num_workers=1)
+    assert result.num_games == 12
+    assert set(result.pairings) == {('a', 'b'), ('a', 'c'), ('b', 'c')}
+    assert result.summary()['a']['games'] == 8
+    assert 'player' in str(result)
+
+def test_mcts_player_in_arena():
+    result = head_to_head(PlayerSpec('minimax'), PlayerSpec('mcts', mcts_player, playouts=500),
+                          4, num_workers=1, seed=3)
+    summary = result.summary()
+    assert summary['mcts']['move_p50'] is not None
+    assert summary['mcts']['wins'] + summary['mcts']['draws'] + \
+        summary['mcts']['losses'] == 4
+
+def test_learner_init_values_are_not_shared():
+    init_values = {}
+    specs = [PlayerSpec('learner', learner_player, init_values=init_values),
+             PlayerSpec('dumb', dumb_mode=True)]
+    outcomes = []
+    for num_workers in (1, 2):
+        games = iter_games([(specs[0], specs[1])], 40, num_workers=num_workers, seed=7,
+                           chunk_size=10)
+        outcomes.append(sorted((game.game_id, game.winner, game.plies) for game in games))
+    assert outcomes[0] == outcomes[1]
+    assert init_values == {}
+
+def test_read_only_arguments_are_not_copied():
+    created = []
+    def factory(piece, board, **kwargs):
+        created.append(kwargs)
+        return MinimaxPlayer(piece)
+    tablebase = object()
+    init_values = {1: 0.5}
+    spec = PlayerSpec('p', factory, tablebase=tablebase, init_values=init_values)
+    spec.create('x', Board('x', 'o'))
+    assert created[0]['tablebase'] is tablebase
+    assert created[0]['init_values'] == init_values
+    assert created[0]['init_values'] is not init_values
@@ -0,0 +1,87 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import pytest
+from jokettt.asyncplayer import *
+from jokettt.learnerplayer import LearnerPlayer
+from jokettt.minimaxplayer import MinimaxPlayer
+from jokettt.player import Player
+
+class SlowPlayer(Player):
+    def move(self, board):
+        time.sleep(0.3)
+        return board.valid_moves()[0]
+
+class CountingPlayer(Player):
+    def __init__(self, piece):
+        Player.__init__(self, piece)
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+    def move(self, board):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.01)
+        with self.lock:
+            self.active -= 1
+        return board.valid_moves()[0]
+
+def test_human_against_minimax():
+    async def play():
+        manager = SessionManager()
+        human = QueuePlayer('x')
+        session = manager.start_game('chat-1', human, MinimaxPlayer('o'))
+        while not session.finished:
+            if human.waiting:
+                # the human plays the first free position
+                move = session.board.valid_moves()[0]
+                assert manager.submit_move('chat-1',
+                                           session.board.convert_move_to_movestring(move))
+            await asyncio.sleep(0.001)
+        await manager.wait('chat-1')
+        return session
+    session = asyncio.run(asyncio.wait_for(play(), 5))
+    assert session.moves[0] == (0, 0)
+    assert session.winner == 'o'
+
+def test_invalid_moves_are_rejected():
+    async def play():
+        manager = SessionManager()
+        manager.start_game('g', QueuePlayer('x'), QueuePlayer('o'))
+        await asyncio.sleep(0)
+        results = [manager.submit_move('g', 'D1'), manager.submit_move('g', 'A1')]
+        await asyncio.sleep(0)
+        results.append(manager.submit_move('g', 'A1'))
+        results.append(manager.submit_move('unknown', 'A2'))
+        manager.cancel('g')
+        return results
+    assert asyncio.run(play()) == [False, True, False, False]
+
+def test_slow_search_does_not_stall_other_games():
+    ended = []
+    async def play():
+        manager = SessionManager(on_end=lambda session: ended.append(session.session_id))
+        manager.start_game('slow', SlowPlayer('x'), SlowPlayer('o'))
+        for ndx in range(200):
+            manager.start_game(ndx, manager.wrap(MinimaxPlayer('x', dumb_mode=True), inline=True),
+                               manager.wrap(MinimaxPlayer('o', dumb_mode=True), inline=True))
+        await manager.wait_all()
+        return manager
+    manager = asyncio.run(play())
+    assert ended[-1] == 'slow'
+    assert len(ended) == len(manager) == 201
+    assert len(manager.remove_finished()) == 201
+
+def test_shared_player_moves_one_session_at_a_time():
+    shared = CountingPlayer('x')
+    async def play():
+        manager = SessionManager(executor=ThreadPoolExecutor(4))
+        for ndx in range(4):
+            manager.start_game(ndx, shared, MinimaxPlayer('o', dumb_mode=True))
+        await manager.wait_all()
+        return manager
+    manager = asyncio.run(play())
+    assert all(manager.get(ndx).finished for ndx in range(4))
+    assert shared.max_active == 1
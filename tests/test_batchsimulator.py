@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from jokettt.batchsimulator import *
+from jokettt.board import Board
+
+def test_play_and_win_detection():
+    sim = BatchSimulator(2)
+    for cells in ([0, 4], [3, 0], [1, 8], [6, 2]):
+        sim.play(cells)
+    assert not sim.finished.any()
+    # game 0: first piece completes the A row
+    sim.play([2, 1])
+    assert sim.finished.tolist() == [True, False]
+    assert sim.winner.tolist() == [1, 0]
+    with pytest.raises(ValueError):
+        sim.play([5, 4])
+
+def test_random_rollouts():
+    sim = BatchSimulator(20000)
+    winner = sim.run(random_policy, random_policy, np.random.default_rng(1))
+    assert sim.finished.all()
+    # first player wins about 58.5% of the random games
+    assert abs(np.mean(winner == 1) - 0.585) < 0.02
+
+def test_value_policy_takes_the_win():
+    brd = Board('x', 'o', init_board=[['x', 'x', '_'],
+                                      ['o', 'o', '_'],
+                                      ['_', '_', '_']])
+    brd.place_pawn(0, 2, 'x')
+    values = {brd.get_zhash(): 1.0}
+    sim = BatchSimulator(1)
+    for cells in ([0], [3], [1], [4]):
+        sim.play(cells)
+    policy = ValuePolicy(values, zhash_table=brd.zhash_table)
+    assert policy(sim, np.random.default_rng(1)).tolist() == [2]
@@ -1,6 +1,145 @@
+import pickle
+import subprocess
+import sys
 import pytest
 from jokettt.board import *
 
 def test_default_constructor():
     brd = Board('o', 'x')
     assert brd.is_empty()
+
+def test_init_board_and_evaluate():
+    brd = Board('x', 'o', init_board=[['x', 'o', '_'],
+                                      ['_', 'x', '_'],
+                                      ['o', '_', 'x']])
+    _, score = brd.evaluate('x')
+    assert score == 10
+    _, score = brd.evaluate('o')
+    assert score == -10
+    assert sorted(brd.valid_moves()) == [(0, 2), (1, 0), (1, 2), (2, 1)]
+    assert str(brd) == "    1    2    3\nA ['x', 'o', '_']\n" \
+                       "B ['_', 'x', '_']\nC ['o', '_', 'x']\n"
+
+def test_place_and_analyze_move():
+    brd = Board('x', 'o')
+    empty_zhash, _ = brd.evaluate('x')
+    brd.place_pawn(0, 0, 'x')
+    brd.place_pawn(1, 1, 'o')
+    brd.place_pawn(0, 1, 'x')
+    assert brd.analyze_move((0, 2), 'x')[1] == 10
+    assert brd.pos_is_empty(0, 2)
+    assert len(brd.valid_moves()) == 6
+    brd.reset()
+    assert brd.is_empty()
+    assert brd.evaluate('x')[0] == empty_zhash
+
+def test_remove_pawn_undoes_place_pawn():
+    brd = Board('x', 'o')
+    zhash, _ = brd.evaluate('x')
+    brd.place_pawn(2, 1, 'o')
+    assert brd.remove_pawn(2, 1) == 'o'
+    assert brd.remove_pawn(2, 1) == '_'
+    assert brd.is_empty()
+    assert brd.evaluate('x')[0] == zhash
+
+def test_canonical_index_of_equivalent_boards():
+    # the same position, rotated by 90 degrees clockwise
+    brd1 = Board('x', 'o', init_board=[['x', 'o', '_'],
+                                       ['_', '_', '_'],
+                                       ['_', '_', '_']])
+    brd2 = Board('x', 'o', init_board=[['_', '_', 'x'],
+                                       ['_', '_', 'o'],
+                                       ['_', '_', '_']])
+    assert brd1.get_state_index() != brd2.get_state_index()
+    ndx1, sym1 = brd1.get_canonical_index()
+    ndx2, sym2 = brd2.get_canonical_index()
+    assert ndx1 == ndx2
+    # the same move on the two boards maps to the same canonical move
+    canonical = brd1.transform_move((1, 1), sym1)
+    assert brd2.transform_move((1, 1), sym2) == canonical
+    assert brd2.untransform_move(brd1.transform_move((0, 2), sym1), sym2) == (2, 2)
+    assert brd1.untransform_move(canonical, sym1) == (1, 1)
+
+def test_mnk_board():
+    brd = Board('x', 'o', width=5, height=4, win_length=4)
+    assert brd.is_standard() is False
+    assert len(brd.valid_moves()) == 20
+    assert brd.convert_movestring_to_indexes("D5") == (3, 4)
+    assert brd.convert_movestring_to_indexes("E1") == (-1, 0)
+    assert brd.convert_move_to_movestring((3, 4)) == "D5"
+    for _y in range(0, 3):
+        assert brd.place_pawn(1, _y + 1, 'x')[1] == 0
+    assert brd.evaluate_heuristic('x') > 0
+    assert brd.place_pawn(1, 4, 'x')[1] == 10
+    assert brd.evaluate('o')[1] == -10
+    assert str(brd).splitlines()[0] == "    1    2    3    4    5"
+
+def test_non_ascii_digits_are_invalid_moves():
+    brd = Board('x', 'o', width=12, height=12, win_length=5)
+    assert brd.convert_movestring_to_indexes("B12") == (1, 11)
+    for move in ("A\u00b2", "A\u0663", "A1\u00b2"):
+        assert brd.is_valid_move(move) is False
+        assert brd.convert_movestring_to_indexes(move) == (0, -1)
+
+def test_near_moves():
+    brd = Board('x', 'o', width=15, height=15, win_length=5)
+    assert len(brd.near_moves()) == 225
+    brd.place_pawn(0, 14, 'x')
+    assert sorted(brd.near_moves()) == [(0, 13), (1, 13), (1, 14)]
+
+def test_boards_share_the_seeded_zobrist_keys():
+    brd1 = Board('x', 'o', init_board=[['x', '_', '_'], ['_', 'o', '_'], ['_', '_', '_']])
+    brd2 = Board('o', 'x', init_board=[['o', '_', '_'], ['_', 'x', '_'], ['_', '_', '_']])
+    assert brd1.zhash_table is brd2.zhash_table
+    assert isinstance(brd1.zhash_table, tuple)
+    assert brd1.get_zhash() == brd2.get_zhash()
+    assert brd1.zobrist_id == (ZOBRIST_VERSION, DEFAULT_ZOBRIST_SEED)
+    other = Board('x', 'o', zobrist_seed=1)
+    assert other.zhash_table is not brd1.zhash_table
+    copied = Board('x', 'o', init_zhash=[[list(cell) for cell in row] for row in other.zhash_table])
+    assert copied.zobrist_id is None
+    assert copied.zhash_table == other.zhash_table
+
+def test_incremental_win_detection_on_large_board():
+    brd = Board('x', 'o', width=5, height=4, win_length=3)
+    moves = [(0, 0, 'x'), (1, 1, 'x'), (3, 0, 'o'), (2, 2, 'x'), (3, 1, 'o')]
+    scores = [brd.place_pawn(_x, _y, piece)[1] for _x, _y, piece in moves]
+    # the last 'o' move is evaluated for 'o': 'x' has already won
+    assert scores == [0, 0, 0, 10, -10]
+    brd.remove_pawn(1, 1)
+    assert brd.evaluate('x')[1] == 0
+    brd.place_pawn(3, 2, 'o')
+    assert brd.evaluate('x')[1] == -10
+    brd.reset()
+    assert brd.evaluate('o')[1] == 0
+
+def test_copy_snapshot_and_restore():
+    brd = Board('x', 'o', width=5, height=4, win_length=3)
+    assert not hasattr(brd, '__dict__')
+    brd.place_pawn(0, 0, 'x')
+    saved = brd.snapshot()
+    copied = brd.copy()
+    assert copied.zhash_table is brd.zhash_table
+    for _y in range(1, 3):
+        brd.place_pawn(0, _y, 'x')
+    assert brd.evaluate('x')[1] == 10
+    assert copied.evaluate('x')[1] == 0 and copied.pos_is_empty(0, 1)
+    brd.restore(saved)
+    assert brd.get_zhash() == copied.get_zhash()
+    assert brd.evaluate('x')[1] == 0
+    with pytest.raises(ValueError):
+        Board('x', 'o').restore(saved)
+
+def test_pickle():
+    brd = Board('x', 'o', init_board=[['x', '_', '_'], ['_', 'o', '_'], ['_', '_', '_']])
+    loaded = pickle.loads(pickle.dumps(brd))
+    assert repr(loaded) == repr(brd)
+    assert loaded.get_zhash() == brd.get_zhash()
+    assert loaded.zhash_table is brd.zhash_table
+
+def test_core_modules_do_not_import_numpy():
+    modules = "board, player, consoleplayer, minimaxplayer, learnerplayer, mctsplayer, training, " \
+        "arena"
+    code = "import sys, jokettt.%s; assert 'numpy' not in sys.modules" % \
+        modules.replace(", ", ", jokettt.")
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
@@ -0,0 +1,76 @@
+import io
+import pytest
+from jokettt.board import Board
+from jokettt.gamerecord import *
+
+def test_write_and_read_records(tmp_path):
+    path = str(tmp_path / "games.jgr")
+    with GameRecordWriter(path) as writer:
+        writer.start_game('minimax', 'learner', seed=42)
+        for _x, _y in ((1, 1), (0, 0), (2, 2)):
+            writer.add_move(_x, _y)
+        writer.end_game(RESULT_UNFINISHED)
+        writer.write(GameRecord('learner', 'minimax', bytes([4, 0, 8, 2, 1, 7, 6]),
+                                RESULT_FIRST_WINS, first_piece='o'))
+        writer.write(GameRecord('human', 'learner', bytes([0, 14]), RESULT_DRAW,
+                                width=5, height=4))
+    # file header, three 12 bytes game headers + one byte for every
+    # move, three player definitions
+    with open(path, 'rb') as in_file:
+        assert len(in_file.read()) == 6 + 3 * 12 + (3 + 7 + 2) + (3 + 7) + (3 + 7) + (3 + 5)
+    games = list(iter_records(path))
+    assert [(game.first, game.second, game.result, game.seed) for game in games] == \
+        [('minimax', 'learner', RESULT_UNFINISHED, 42),
+         ('learner', 'minimax', RESULT_FIRST_WINS, None),
+         ('human', 'learner', RESULT_DRAW, None)]
+    assert games[0].moves() == [(1, 1), (0, 0), (2, 2)]
+    assert games[1].winner == 'learner' and games[1].first_piece == 'o'
+    assert games[2].moves() == [(0, 0), (2, 4)]
+
+def test_read_from_buffer():
+    out_file = io.BytesIO()
+    writer = GameRecordWriter(out_file)
+    writer.write(GameRecord('a', 'b', bytes([0, 3, 1, 4, 2]), RESULT_FIRST_WINS))
+    writer.close()
+    game, = iter_records(out_file.getvalue())
+    brd = Board('x', 'o')
+    pieces = ('x', 'o')
+    for ply, (_x, _y) in enumerate(game.moves()):
+        _, score = brd.place_pawn(_x, _y, pieces[ply % 2])
+    assert score == 10 and game.winner == 'a'
+    with pytest.raises(ValueError):
+        list(iter_records(b'JTGR\x02\x00'))
+
+def test_truncated_or_corrupted_file():
+    out_file = io.BytesIO()
+    with GameRecordWriter(out_file) as writer:
+        writer.write(GameRecord('a', 'b', bytes([0, 3, 1]), RESULT_UNFINISHED))
+    data = out_file.getvalue()
+    assert len(list(iter_records(data))) == 1
+    # cut in the moves, in the game header, in the player definition
+    for size in (len(data) - 2, len(data) - 5, 8):
+        with pytest.raises(ValueError):
+            list(iter_records(data[:size]))
+    # game of an undefined player
+    with pytest.raises(ValueError):
+        list(iter_records(data[:6] + data[-15:]))
+    with pytest.raises(ValueError):
+        GameRecordWriter(io.BytesIO()).write(GameRecord('a', 'b', b'', RESULT_DRAW,
+                                                        seed=2 ** 40))
+
+def test_read_from_streams(tmp_path):
+    records = [GameRecord('a', 'b', bytes([0, 3, 1]), RESULT_UNFINISHED),
+               GameRecord('b', 'a', bytes([4, 0]), RESULT_DRAW, seed=5)]
+    out_file = io.BytesIO()
+    with GameRecordWriter(out_file) as writer:
+        for record in records:
+            writer.write(record)
+    out_file.seek(0)
+    assert [game.cells for game in iter_records(out_file)] == [b'\x00\x03\x01', b'\x04\x00']
+    # a stream without getbuffer, a file that cannot be mapped
+    stream = io.BufferedReader(io.BytesIO(out_file.getvalue()))
+    assert [game.seed for game in iter_records(stream)] == [None, 5]
+    path = tmp_path / "empty.jgr"
+    path.write_bytes(b'')
+    with open(path, 'rb') as in_file, pytest.raises(ValueError):
+        list(iter_records(in_file))
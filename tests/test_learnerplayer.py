@@ -0,0 +1,41 @@
+import pytest
+from jokettt.board import Board
+from jokettt.learnerplayer import LearnerPlayer
+from jokettt.replaybuffer import ReplayBuffer
+
+def test_learner_takes_winning_move():
+    brd = Board('x', 'o', init_board=[['x', 'x', '_'],
+                                      ['o', 'o', '_'],
+                                      ['_', '_', '_']])
+    assert LearnerPlayer('x', brd).move(brd) == (0, 2)
+
+def test_symmetric_learner_shares_equivalent_positions():
+    brd = Board('x', 'o')
+    player = LearnerPlayer('x', brd, symmetric=True)
+    player.move(brd)
+    # the nine first moves lead to three different canonical boards
+    # (corner, edge, center), plus the empty board
+    assert len(player.values) == 4
+
+def test_td_lambda_learns_the_whole_game():
+    brd = Board('x', 'o')
+    buffer = ReplayBuffer()
+    player = LearnerPlayer('x', brd, td_lambda=1.0, alpha=0.5, replay_buffer=buffer)
+    rival = LearnerPlayer('o', brd)
+    keys = []
+    while True:
+        _, score = brd.place_pawn(*player.move(brd), 'x')
+        keys.append(brd.get_zhash())
+        if score != 0 or brd.is_full():
+            break
+        _, score = brd.place_pawn(*rival.move(brd), 'o')
+        if score != 0:
+            break
+    # no update during the game
+    assert all(player.values[key] == 0.5 for key in keys[:-1])
+    reward = {10: 1.0, 0: 0.5, -10: 0.0}[brd.evaluate('x')[1]]
+    player.learn_from_game(brd)
+    # Monte Carlo backup of the reward to every position of the game
+    assert all(player.values[key] == 0.5 + 0.5 * (reward - 0.5) for key in keys[:-1])
+    assert player.values[keys[-1]] == (1.0 if reward == 1.0 else 0.5 + 0.5 * (reward - 0.5))
+    assert len(buffer) == 1
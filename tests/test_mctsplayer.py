@@ -0,0 +1,79 @@
+import random
+import pytest
+from jokettt.board import Board
+from jokettt.mctsplayer import MCTSPlayer
+
+def test_takes_winning_move():
+    random.seed(1)
+    brd = Board('x', 'o', init_board=[['x', 'x', '_'],
+                                      ['o', 'o', '_'],
+                                      ['_', '_', '_']])
+    assert MCTSPlayer('x', playouts=200).move(brd) == (0, 2)
+
+def test_search_leaves_board_unchanged():
+    random.seed(1)
+    brd = Board('x', 'o', init_board=[['x', '_', '_'],
+                                      ['_', 'o', '_'],
+                                      ['_', '_', '_']])
+    zhash, _ = brd.evaluate('x')
+    player = MCTSPlayer('x', playouts=300)
+    player.move(brd)
+    assert brd.evaluate('x')[0] == zhash
+    assert player.last_stats.nodes == 300
+
+@pytest.mark.parametrize('rollout', ['random', 'heuristic'])
+def test_blocks_threat_on_large_board(rollout):
+    random.seed(1)
+    brd = Board('x', 'o', width=7, height=7, win_length=4)
+    for _y in range(2, 5):
+        brd.place_pawn(3, _y, 'o')
+    brd.place_pawn(3, 1, 'x')
+    brd.place_pawn(6, 6, 'x')
+    # o threatens to win in D6: x shall block it
+    assert MCTSPlayer('x', playouts=300, rollout=rollout).move(brd) == (3, 5)
+
+def test_tree_is_reused_between_moves():
+    random.seed(1)
+    brd = Board('x', 'o')
+    player = MCTSPlayer('x', playouts=500)
+    _x, _y = player.move(brd)
+    assert player.last_stats.cache_hits == 0
+    brd.place_pawn(_x, _y, 'x')
+    # the root is the position after the move, with its playouts
+    assert player.root_visits > 0
+    assert 0 < player.tree_size < 500
+    brd.place_pawn(*brd.valid_moves()[0], 'o')
+    player.move(brd)
+    assert player.last_stats.cache_hits == 1
+    assert player.last_stats.nodes == 500
+    # a position not reached from the tree: a new tree is built
+    brd.reset()
+    player.move(brd)
+    assert player.last_stats.cache_hits == 0
+
+def test_time_limit():
+    brd = Board('x', 'o', width=7, height=7, win_length=4)
+    player = MCTSPlayer('x', playouts=None, time_limit=0.05)
+    player.move(brd)
+    assert player.last_stats.nodes > 0
+    assert player.last_stats.elapsed < 0.5
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        MCTSPlayer('x', playouts=None)
+    with pytest.raises(ValueError):
+        MCTSPlayer('x', rollout='smart')
+    with pytest.raises(ValueError):
+        MCTSPlayer('x', max_nodes=9).move(Board('x', 'o'))
+
+def test_tree_is_not_reused_before_the_opponent_moves():
+    random.seed(1)
+    brd = Board('x', 'o')
+    player = MCTSPlayer('x', playouts=200)
+    _x, _y = player.move(brd)
+    brd.place_pawn(_x, _y, 'x')
+    # asked again before the reply of o: the children of the root
+    # would be moves of o, so a new tree is built
+    move = player.move(brd)
+    assert player.last_stats.cache_hits == 0
+    assert brd.pos_is_empty(*move)
@@ -0,0 +1,57 @@
+import pytest
+from jokettt.board import Board
+from jokettt.minimaxplayer import MinimaxPlayer
+
+def test_prefers_win_to_draw():
+    # x can win immediately in A3, any other move leads at most to a draw
+    brd = Board('x', 'o', init_board=[['x', 'x', '_'],
+                                      ['o', 'o', '_'],
+                                      ['_', '_', '_']])
+    assert MinimaxPlayer('x').move(brd) == (0, 2)
+
+def test_transposition_table_persists_across_moves():
+    brd = Board('x', 'o', init_board=[['x', '_', '_'],
+                                      ['_', 'o', '_'],
+                                      ['_', '_', '_']])
+    player = MinimaxPlayer('x')
+    player.move(brd)
+    assert len(player.transposition_table) > 0
+    assert MinimaxPlayer('x', tt_size=0).transposition_table is None
+
+def test_search_leaves_board_unchanged():
+    brd = Board('x', 'o', init_board=[['x', '_', '_'],
+                                      ['_', 'o', '_'],
+                                      ['_', '_', '_']])
+    zhash, _ = brd.evaluate('x')
+    MinimaxPlayer('x', tt_size=0).move(brd)
+    assert brd.evaluate('x')[0] == zhash
+    assert str(brd) == "    1    2    3\nA ['x', '_', '_']\n" \
+                       "B ['_', 'o', '_']\nC ['_', '_', '_']\n"
+
+def test_depth_limited_search_on_large_board():
+    brd = Board('x', 'o', width=7, height=7, win_length=4)
+    for _y in range(2, 5):
+        brd.place_pawn(3, _y, 'o')
+    brd.place_pawn(3, 1, 'x')
+    brd.place_pawn(6, 6, 'x')
+    # o threatens to win in D6: x shall block it
+    assert MinimaxPlayer('x', max_depth=2).move(brd) == (3, 5)
+
+def test_move_ordering_reduces_searched_nodes():
+    brd = Board('x', 'o', init_board=[['x', '_', '_'],
+                                      ['_', 'o', '_'],
+                                      ['_', '_', '_']])
+    ordered = MinimaxPlayer('x', tt_size=0)
+    unordered = MinimaxPlayer('x', tt_size=0, move_ordering=None)
+    ordered.move(brd)
+    unordered.move(brd)
+    assert 0 < ordered.nodes_searched < unordered.nodes_searched
+
+def test_random_choice_among_equal_best_moves():
+    # x wins immediately both in A3 and in C3
+    brd = Board('x', 'o', init_board=[['x', 'x', '_'],
+                                      ['o', 'x', 'o'],
+                                      ['_', 'o', '_']])
+    player = MinimaxPlayer('x')
+    moves = {player.move(brd) for _ in range(40)}
+    assert moves == {(0, 2), (2, 2)}
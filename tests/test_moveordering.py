@@ -0,0 +1,24 @@
+import pytest
+from jokettt.board import Board
+from jokettt.moveordering import MoveOrdering
+
+def test_wins_and_blocks_first():
+    brd = Board('x', 'o', init_board=[['x', 'x', '_'],
+                                      ['o', 'o', '_'],
+                                      ['_', '_', '_']])
+    ordered = MoveOrdering().order_moves(brd, brd.valid_moves(), 'o', 'x', 0)
+    assert ordered[:2] == [(1, 2), (0, 2)]
+
+def test_hash_move_then_center_then_corners():
+    brd = Board('x', 'o')
+    ordered = MoveOrdering().order_moves(brd, brd.valid_moves(), 'x', 'o', 0,
+                                         hash_move=(0, 1))
+    assert ordered[:2] == [(0, 1), (1, 1)]
+    assert set(ordered[2:6]) == {(0, 0), (0, 2), (2, 0), (2, 2)}
+
+def test_killer_moves():
+    brd = Board('x', 'o')
+    ordering = MoveOrdering(use_history=False)
+    ordering.record_cutoff((2, 1), 3, 1)
+    assert ordering.order_moves(brd, brd.valid_moves(), 'x', 'o', 3)[0] == (2, 1)
+    assert ordering.order_moves(brd, brd.valid_moves(), 'x', 'o', 2)[0] == (1, 1)
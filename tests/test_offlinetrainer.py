@@ -0,0 +1,46 @@
+import io
+import pytest
+from jokettt.board import Board
+from jokettt.gamerecord import *
+from jokettt.learnerplayer import LearnerPlayer
+from jokettt.offlinetrainer import *
+
+# x wins on the first row, after o blocked nothing
+WON_BY_X = [(0, 0), (1, 1), (0, 1), (2, 2), (0, 2)]
+
+def test_replay_game():
+    brd = Board('x', 'o')
+    trajectory, reward = replay_game(brd, WON_BY_X, 'x')
+    assert len(trajectory) == 3 and trajectory[-1] == brd.get_zhash() and reward == 1.0
+    assert replay_game(brd, WON_BY_X, 'o')[1] == 0.0
+    assert replay_game(brd, WON_BY_X[:4], 'x')[1] is None
+    with pytest.raises(ValueError):
+        replay_game(brd, [(0, 0), (0, 0)], 'x')
+
+def test_train_from_records():
+    buffer = io.BytesIO()
+    writer = GameRecordWriter(buffer)
+    for _ in range(3):
+        writer.write(GameRecord('a', 'b', bytes(_x * 3 + _y for _x, _y in WON_BY_X),
+                                RESULT_FIRST_WINS))
+    writer.write(GameRecord('a', 'b', bytes([0, 1]), RESULT_DRAW, width=4, height=4))
+    writer.close()
+    trainer = OfflineTrainer('x', alpha=0.5, td_lambda=1.0)
+    assert trainer.train(iter_records(buffer.getvalue()), batch_size=2) == 3
+    values = trainer.values()
+    assert len(values) == len(trainer) == 3
+    # three updates toward the reward: two in the first batch, one in the second
+    assert list(values.values()) == pytest.approx([0.9375] * 3)
+    # the values can be used by a learner
+    brd = Board('x', 'o')
+    player = LearnerPlayer('x', brd, init_values=values)
+    assert player.move(brd) == (0, 0)
+
+def test_symmetric_keys():
+    trainer = OfflineTrainer('o', key='canonical', td_lambda=0.0)
+    mirrored = [(_x, 2 - _y) for _x, _y in WON_BY_X]
+    assert trainer.train([WON_BY_X, mirrored]) == 2
+    # the two games reach the same canonical positions
+    assert len(trainer.values()) == 2
+    with pytest.raises(ValueError):
+        OfflineTrainer(key='hash')
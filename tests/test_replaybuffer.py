@@ -0,0 +1,17 @@
+import random
+import pytest
+from jokettt.replaybuffer import ReplayBuffer
+
+def test_replay_buffer():
+    with pytest.raises(ValueError):
+        ReplayBuffer(0)
+    buffer = ReplayBuffer(3)
+    for game in range(5):
+        buffer.add([(game, None)], 1.0)
+    assert len(buffer) == 3
+    random.seed(1)
+    games = buffer.sample(10)
+    assert sorted(games) == [(((game, None),), 1.0) for game in (2, 3, 4)]
+    assert len(buffer.sample(2)) == 2
+    buffer.clear()
+    assert buffer.sample(2) == []
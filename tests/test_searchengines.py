@@ -0,0 +1,60 @@
+import pytest
+from jokettt.board import Board
+from jokettt.minimaxplayer import MinimaxPlayer
+from jokettt.moveordering import MoveOrdering
+from jokettt.searchengines import *
+from jokettt.transpositiontable import TranspositionTable
+
+POSITIONS = [
+    [['x', '_', '_'], ['_', 'o', '_'], ['_', '_', '_']],
+    [['x', 'o', '_'], ['_', '_', '_'], ['_', '_', '_']],
+    [['x', 'x', '_'], ['o', 'o', '_'], ['_', '_', '_']],
+    [['x', 'o', 'x'], ['_', 'o', '_'], ['_', '_', '_']],
+]
+
+@pytest.mark.parametrize("rows", POSITIONS)
+def test_engines_agree(rows):
+    results = set()
+    for name in ENGINES:
+        for ttable in (None, TranspositionTable()):
+            brd = Board('x', 'o', init_board=rows)
+            engine = create_engine(name, ttable=ttable, move_ordering=MoveOrdering())
+            score, moves = engine.search(brd, 'x', 'o')
+            results.add((score, tuple(sorted(moves))))
+            assert str(brd) == str(Board('x', 'o', init_board=rows))
+    assert len(results) == 1
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_engines_on_larger_board(engine):
+    # x threatens to complete a row of four in D6: o shall block it
+    brd = Board('x', 'o', width=7, height=7, win_length=4)
+    for _x, _y, piece in [(3, 2, 'x'), (2, 2, 'o'), (3, 3, 'x'), (4, 4, 'o'),
+                          (3, 4, 'x'), (3, 1, 'o')]:
+        brd.place_pawn(_x, _y, piece)
+    assert MinimaxPlayer('o', max_depth=2, engine=engine).move(brd) == (3, 5)
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        create_engine('alphazero')
+
+def test_engine_without_search_cannot_be_created():
+    class IncompleteEngine(SearchEngine):
+        pass
+    with pytest.raises(TypeError):
+        create_engine(IncompleteEngine)
+    with pytest.raises(TypeError):
+        SearchEngine()
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_engines_on_ended_games(engine):
+    full = Board('x', 'o', init_board=[['x', 'o', 'x'],
+                                       ['x', 'o', 'o'],
+                                       ['o', 'x', 'x']])
+    won = Board('x', 'o', init_board=[['x', 'x', 'x'],
+                                      ['o', 'o', '_'],
+                                      ['_', '_', '_']])
+    for brd in (full, won):
+        assert MinimaxPlayer('o', engine=engine).move(brd) == (None, None)
+        assert create_engine(engine).search(brd, 'o', 'x')[1] == []
+    assert create_engine(engine).search(full, 'o', 'x')[0] == 0
+    assert create_engine(engine).search(won, 'o', 'x')[0] < 0
@@ -0,0 +1,42 @@
+import pytest
+from jokettt.board import Board
+from jokettt.learnerplayer import LearnerPlayer
+from jokettt.minimaxplayer import MinimaxPlayer
+from jokettt.searchstats import SearchStats, StatsAggregator
+
+def test_minimax_stats():
+    brd = Board('x', 'o', init_board=[['x', '_', '_'],
+                                      ['_', 'o', '_'],
+                                      ['_', '_', '_']])
+    player = MinimaxPlayer('x')
+    player.move(brd)
+    stats = player.last_stats
+    assert stats.player == 'MinimaxPlayer'
+    assert stats.nodes == player.nodes_searched > 0
+    assert stats.cutoffs > 0
+    assert stats.max_depth == 7
+    assert stats.cache_misses > 0
+    assert stats.elapsed > 0.0
+
+def test_learner_stats_and_aggregator():
+    brd = Board('x', 'o')
+    aggregator = StatsAggregator()
+    player = LearnerPlayer('x', brd, stats_callback=aggregator)
+    player.move(brd)
+    player.move(brd)
+    assert len(aggregator) == 2
+    assert aggregator.stats[1] is player.last_stats
+    assert player.last_stats.nodes == 9
+    assert player.last_stats.cache_hits == 10
+    summary = aggregator.summary()
+    assert summary['moves'] == 2
+    assert summary['nodes'] == 18
+    assert summary['cache_hit_rate'] == pytest.approx(11 / 20)
+
+def test_latency_percentiles():
+    aggregator = StatsAggregator()
+    for ndx in range(1, 101):
+        aggregator(SearchStats('test', elapsed=ndx / 1000))
+    assert aggregator.latency_percentile(50) == pytest.approx(0.050)
+    assert aggregator.latency_percentile(99) == pytest.approx(0.099)
+    assert aggregator.summary()['max'] == pytest.approx(0.100)
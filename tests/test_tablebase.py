@@ -0,0 +1,56 @@
+import pytest
+from jokettt.board import Board
+from jokettt.minimaxplayer import MinimaxPlayer
+from jokettt.tablebase import *
+
+@pytest.fixture(scope="module")
+def tablebase_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("tb") / "ttt.tb")
+    assert build_tablebase(path) == 5478
+    return path
+
+def test_probe(tablebase_path):
+    with Tablebase(tablebase_path) as tbase:
+        value, distance, moves = tbase.probe(Board('x', 'o'))
+        assert value == 0 and distance == 9 and len(moves) == 9
+        brd = Board('x', 'o', init_board=[['x', 'x', '_'],
+                                          ['o', 'o', '_'],
+                                          ['_', '_', '_']])
+        assert tbase.probe(brd) == (1, 1, [(0, 2)])
+        # o to move with three x on the board: not reachable
+        brd = Board('x', 'o', init_board=[['x', 'x', 'x'],
+                                          ['_', '_', '_'],
+                                          ['_', '_', '_']])
+        assert tbase.probe(brd) is None
+
+def test_minimax_player_with_tablebase(tablebase_path):
+    brd = Board('x', 'o', init_board=[['x', '_', '_'],
+                                      ['_', '_', '_'],
+                                      ['_', '_', '_']])
+    player = MinimaxPlayer('o', tablebase=tablebase_path)
+    assert player.move(brd) == (1, 1)
+
+def test_probe_checks_side_to_move(tablebase_path):
+    brd = Board('x', 'o', init_board=[['x', '_', '_'],
+                                      ['_', '_', '_'],
+                                      ['_', '_', '_']])
+    with Tablebase(tablebase_path) as tbase:
+        assert tbase.probe(brd, 'o') == tbase.probe(brd)
+        with pytest.raises(ValueError):
+            tbase.probe(brd, 'x')
+        # the board pieces in the other order: o moved first
+        brd = Board('o', 'x', init_board=[['o', '_', '_'],
+                                          ['_', '_', '_'],
+                                          ['_', '_', '_']])
+        assert tbase.probe(brd, 'x')[2] == [(1, 1)]
+        with pytest.raises(ValueError):
+            tbase.probe(brd, 'o')
+
+def test_invalid_tablebase_files(tablebase_path, tmp_path):
+    with open(tablebase_path, 'rb') as tb_file:
+        data = tb_file.read()
+    for size in (0, 5, 100, len(data) - 1):
+        path = tmp_path / ("tb%d" % size)
+        path.write_bytes(data[:size])
+        with pytest.raises(ValueError, match="not a valid tablebase file"):
+            Tablebase(str(path))
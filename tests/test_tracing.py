@@ -0,0 +1,43 @@
+import pytest
+from jokettt.board import Board
+from jokettt.learnerplayer import LearnerPlayer
+from jokettt.tracing import *
+
+def test_ring_buffer_keeps_the_last_events():
+    brd = Board('x', 'o', init_board=[['x', 'x', '_'],
+                                      ['o', 'o', '_'],
+                                      ['_', '_', '_']])
+    tracer = RingBufferTracer(3)
+    player = LearnerPlayer('x', brd, tracer=tracer)
+    assert player.move(brd) == (0, 2)
+    assert len(tracer) <= 3
+    events = tracer.events(MOVE_CONSIDERED)
+    assert events[-1][:2] == (MOVE_CONSIDERED, 'x')
+    assert events[-1][2][0] == (0, 2) and events[-1][2][2] > 0
+    tracer.clear()
+    assert tracer.events() == []
+    with pytest.raises(ValueError):
+        RingBufferTracer(0)
+
+def test_verbose_player_prints_the_events(capsys):
+    brd = Board('x', 'o')
+    player = LearnerPlayer('x', brd, eps=1.0, verbosity=1)
+    assert isinstance(player.tracer, PrintTracer)
+    move = player.move(brd)
+    assert capsys.readouterr().out == \
+        "[x] exploring move %s\n" % brd.convert_move_to_movestring(move)
+    assert format_event(VALUE_UPDATED, 'o', (7, 0.5, 0.25)) == \
+        "[o] value of 7 updated: 0.5000 -> 0.2500"
+
+def test_both_value_updates_are_traced():
+    brd = Board('x', 'o')
+    tracer = RingBufferTracer()
+    player = LearnerPlayer('x', brd, tracer=tracer)
+    _x, _y = player.move(brd)
+    after_move = brd.place_pawn(_x, _y, 'x')[0]
+    brd.place_pawn(*brd.valid_moves()[0], 'o')
+    tracer.clear()
+    player.move(brd)
+    updated = [args[0] for _, _, args in tracer.events(VALUE_UPDATED)]
+    # the current position, and the one reached by the previous move
+    assert updated == [brd.get_zhash(), after_move]
@@ -0,0 +1,47 @@
+import pytest
+from jokettt.board import Board
+from jokettt.training import *
+
+def test_merge_value_tables():
+    base = {1: 0.5, 2: 0.5}
+    tables = [{1: 0.7, 2: 0.5, 3: 0.2}, {1: 0.3, 2: 0.5}]
+    merged = merge_value_tables(base, tables)
+    assert merged == pytest.approx({1: 0.5, 2: 0.5, 3: 0.2})
+    visits = [{1: 3, 3: 1}, {1: 1}]
+    merged = merge_value_tables(base, tables, visits, 'visits')
+    assert merged == pytest.approx({1: 0.6, 2: 0.5, 3: 0.2})
+
+def test_train_parallel():
+    result = train_parallel(40, num_workers=2, games_per_round=10,
+                            opponent='self', merge='visits', seed=1)
+    assert result.num_games == 40
+    assert result.values and result.opponent_values
+    result = train_parallel(10, num_workers=1, opponent='minimax', seed=1, td_lambda=0.5)
+    assert result.opponent_values is None
+
+def test_values_are_keyed_by_the_board_keys():
+    result = train_parallel(20, num_workers=1, opponent='minimax', seed=1)
+    brd = Board('x', 'o')
+    first_moves = {brd.analyze_move(move, 'x')[0] for move in brd.valid_moves()}
+    assert first_moves & set(result.values)
+
+def test_train_shared():
+    result = train_parallel(40, num_workers=2, games_per_round=10, opponent='self',
+                            shared=True, seed=1)
+    assert result.num_games == 40
+    assert len(result.values) > 1 and len(result.opponent_values) > 1
+    result = train_parallel(10, num_workers=1, opponent='minimax', shared=True, seed=1,
+                            init_values=result.values)
+    assert result.opponent_values is None
+
+def test_train_shared_from_zhash_values():
+    values = train_parallel(20, num_workers=1, opponent='minimax', seed=1).values
+    brd = Board('x', 'o')
+    brd.place_pawn(1, 1, 'x')
+    values[brd.get_zhash()] = 0.75
+    result = train_parallel(1, num_workers=1, opponent='minimax', shared=True, seed=1,
+                            init_values=values, alpha=0.0)
+    assert result.values.get(brd.get_state_index()) == 0.75
+    with pytest.raises(ValueError):
+        train_parallel(1, num_workers=1, opponent='minimax', shared=True, seed=1,
+                       init_values=values, symmetric=True)
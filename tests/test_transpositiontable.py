@@ -0,0 +1,24 @@
+import pytest
+from jokettt.transpositiontable import *
+
+def test_store_and_lookup():
+    ttable = TranspositionTable(10)
+    assert ttable.lookup(1234) is None
+    ttable.store(1234, 5, 3, EXACT, (1, 1))
+    assert ttable.lookup(1234) == (5, 3, EXACT, (1, 1))
+    assert ttable.hits == 1 and ttable.misses == 1
+
+def test_deeper_entry_is_kept():
+    ttable = TranspositionTable(10)
+    ttable.store(1, 5, 4, EXACT)
+    ttable.store(1, -2, 2, UPPER_BOUND)
+    assert ttable.lookup(1)[:3] == (5, 4, EXACT)
+
+def test_lru_eviction():
+    ttable = TranspositionTable(2)
+    ttable.store(1, 0, 1, EXACT)
+    ttable.store(2, 0, 1, EXACT)
+    ttable.lookup(1)
+    ttable.store(3, 0, 1, EXACT)
+    assert len(ttable) == 2
+    assert 1 in ttable and 3 in ttable and 2 not in ttable
@@ -0,0 +1,66 @@
+import os
+import pickle
+import pytest
+import numpy as np
+from jokettt.board import Board
+from jokettt.learnerplayer import LearnerPlayer
+from jokettt.valuestore import ArrayValueStore, SharedValueStore
+
+def test_store_behaves_like_a_dict():
+    store = ArrayValueStore()
+    assert len(store) == 0
+    assert 42 not in store
+    assert store.get(42, 0.5) == 0.5
+    store[42] = 0.25
+    assert 42 in store
+    assert store[42] == 0.25
+    with pytest.raises(KeyError):
+        store[43]
+    assert store.to_dict() == {42: 0.25}
+
+def test_store_converts_zhash_dictionary():
+    brd = Board('x', 'o', init_board=[['x', '_', '_'],
+                                      ['_', 'o', '_'],
+                                      ['_', '_', '_']])
+    zhash, _ = brd.evaluate('x')
+    store = ArrayValueStore(init_values={zhash: 0.75}, zhash_table=brd.zhash_table)
+    assert store.to_dict() == {brd.get_state_index(): 0.75}
+
+def test_store_save_and_memory_mapped_load(tmp_path):
+    path = str(tmp_path / "values.npy")
+    store = ArrayValueStore(init_values={0: 0.5, 100: 1.0})
+    store.save(path)
+    loaded = ArrayValueStore.load(path, mmap_mode='r+')
+    assert isinstance(loaded.array, np.memmap)
+    assert loaded.to_dict() == {0: 0.5, 100: 1.0}
+    loaded[7] = 0.0
+    loaded.flush()
+    assert ArrayValueStore.load(path).to_dict() == {0: 0.5, 7: 0.0, 100: 1.0}
+
+def test_learner_uses_state_index_with_array_store():
+    brd = Board('x', 'o', init_board=[['x', 'x', '_'],
+                                      ['o', 'o', '_'],
+                                      ['_', '_', '_']])
+    store = ArrayValueStore()
+    player = LearnerPlayer('x', brd, store)
+    assert player.values is store
+    assert player.move(brd) == (0, 2)
+    assert brd.get_state_index() in store
+
+def test_shared_store_is_shared_by_pickling():
+    with SharedValueStore(init_values={5: 0.75}) as store:
+        attached = pickle.loads(pickle.dumps(store))
+        assert attached.name == store.name
+        attached[6] = 0.25
+        assert store.to_dict() == {5: 0.75, 6: 0.25}
+        copied = store.copy()
+        copied[7] = 1.0
+        assert 7 not in store
+        attached.close()
+
+def test_shared_store_is_freed_if_the_values_cannot_be_copied():
+    blocks = set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+    with pytest.raises(IndexError):
+        SharedValueStore(init_values={3 ** 9: 0.5})
+    if os.path.isdir('/dev/shm'):
+        assert set(os.listdir('/dev/shm')) <= blocks